@@ -0,0 +1,117 @@
+"""
+서비스 계정 및 부하 테스트용 토큰 일괄 발급 벤치마크.
+
+    python benchmarks/bench_batch_token_issuance.py --users 50000 --naive-sample 200
+
+임시 SQLite DB에 인증된 유저를 만든 뒤, 유저마다 로그인해 토큰을 받는 방식(--naive-sample명으로 측정해 환산)과
+UserManager.issue_tokens의 batch 조회 + bulk insert 방식의 소요 시간과 쿼리 수를 비교한다.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from io import StringIO
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'login_is_boring.settings_production')
+os.environ.setdefault('DATABASE_URL', f'sqlite:///{tempfile.mkdtemp()}/bench.sqlite3')
+os.environ.setdefault('ALLOWED_HOSTS', 'testserver')
+
+import django
+
+django.setup()
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from db.models import UserActiveType
+
+
+User = get_user_model()
+
+PASSWORD = 'bench-password'
+
+
+def create_users(count: int, batch_size: int = 5000) -> list[int]:
+    """
+    인증된 유저를 만들고 유저 id 목록을 return하는 함수.
+    """
+    password = make_password(PASSWORD)
+
+    for start in range(0, count, batch_size):
+        User.objects.bulk_create([
+            User(
+                email=f'user{i}@bench.local', email_normalized=f'user{i}@bench.local', username='벤치',
+                password=password, active_type_id=UserActiveType.TYPES.ACTIVE.value
+            )
+            for i in range(start, min(start + batch_size, count))
+        ])
+
+    return list(User.objects.order_by('id').values_list('id', flat=True))
+
+
+def naive(user_ids: list[int]) -> None:
+    """
+    유저마다 로그인(조회, 비밀번호 확인)하고 토큰을 발급받는 방식.
+    """
+    for user_id in user_ids:
+        user = User.objects.get(id=user_id)
+        user.check_password(PASSWORD)
+        user.get_token()
+
+
+def bulk(user_ids: list[int]) -> int:
+    return sum(tokens is not None for _, tokens in User.objects.issue_tokens(user_ids))
+
+
+def measure(func, *args):
+    """
+    (return 값, 소요 시간(초), 쿼리 수)를 return하는 함수.
+    """
+    with CaptureQueriesContext(connection) as queries:
+        started = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - started
+
+    return result, elapsed, len(queries)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=50000, help='토큰을 발급할 유저 수')
+    parser.add_argument('--naive-sample', type=int, default=200, help='유저마다 로그인하는 방식으로 측정할 유저 수')
+    args = parser.parse_args()
+
+    call_command('migrate', verbosity=0)
+
+    if not settings.SIGNING_KEYS['ALGORITHM'].startswith('HS'):
+        call_command('rotate_signing_keys', stdout=StringIO())
+
+    started = time.perf_counter()
+    user_ids = create_users(args.users + args.naive_sample)
+    print(f'created {len(user_ids)} users in {time.perf_counter() - started:.2f}s')
+
+    sample, user_ids = user_ids[:args.naive_sample], user_ids[args.naive_sample:]
+
+    _, naive_elapsed, naive_queries = measure(naive, sample)
+    issued, bulk_elapsed, bulk_queries = measure(bulk, user_ids)
+
+    scale = args.users / args.naive_sample
+
+    print(
+        f"users={args.users} batch_size={settings.TOKEN_BATCH_ISSUANCE['BATCH_SIZE']} issued={issued} "
+        f"algorithm={settings.SIGNING_KEYS['ALGORITHM']}"
+    )
+    print(f"{'method':<24}{'seconds':>12}{'queries':>12}")
+    print(f"{'login each (estimated)':<24}{naive_elapsed * scale:>12.2f}{round(naive_queries * scale):>12}")
+    print(f"{'issue_tokens':<24}{bulk_elapsed:>12.2f}{bulk_queries:>12}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""
+유저 일괄 탈퇴 처리 및 리프레시 토큰 블랙리스트 벤치마크.
+
+    python benchmarks/bench_bulk_revocation.py --users 100000 --naive-sample 1000
+
+임시 SQLite DB에 인증된 유저와 유저마다 리프레시 토큰 기록(OutstandingToken)을 만든 뒤,
+관리자 화면처럼 유저마다 저장하고 토큰을 하나씩 블랙리스트에 올리는 방식(--naive-sample명으로 측정해 환산)과
+UserManager.change_active_type의 batch UPDATE + bulk insert 방식의 소요 시간과 쿼리 수를 비교한다.
+"""
+import argparse
+from datetime import timedelta
+import os
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'login_is_boring.settings_production')
+os.environ.setdefault('DATABASE_URL', f'sqlite:///{tempfile.mkdtemp()}/bench.sqlite3')
+os.environ.setdefault('ALLOWED_HOSTS', 'testserver')
+
+import django
+
+django.setup()
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from db.models import UserActiveType
+
+
+User = get_user_model()
+
+
+def create_users(count: int, batch_size: int = 5000) -> list[str]:
+    """
+    인증된 유저와 유저마다 리프레시 토큰 기록 하나를 만들고 이메일 목록을 return하는 함수.
+    """
+    emails = [f'user{i}@bench.local' for i in range(count)]
+    expires_at = timezone.now() + timedelta(days=7)
+
+    for start in range(0, count, batch_size):
+        User.objects.bulk_create([
+            User(
+                email=email, email_normalized=email, username='벤치', password='!',
+                active_type_id=UserActiveType.TYPES.ACTIVE.value
+            )
+            for email in emails[start:start + batch_size]
+        ])
+
+    user_ids = list(User.objects.order_by('id').values_list('id', flat=True))
+
+    for start in range(0, count, batch_size):
+        OutstandingToken.objects.bulk_create([
+            OutstandingToken(user_id=user_id, jti=uuid.uuid4().hex, token='bench', expires_at=expires_at)
+            for user_id in user_ids[start:start + batch_size]
+        ])
+
+    return emails
+
+
+def naive(emails: list[str]) -> None:
+    """
+    유저를 하나씩 저장하고 토큰을 하나씩 블랙리스트에 올리는 방식.
+    """
+    for email in emails:
+        user = User.objects.get_by_email(email)
+        user.active_type_id = UserActiveType.TYPES.SECESSION.value
+        user.save(update_fields=('active_type',))
+
+        for token in OutstandingToken.objects.filter(user_id=user.id):
+            BlacklistedToken.objects.get_or_create(token=token)
+
+
+def measure(func, *args):
+    """
+    (return 값, 소요 시간(초), 쿼리 수)를 return하는 함수.
+    """
+    with CaptureQueriesContext(connection) as queries:
+        started = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - started
+
+    return result, elapsed, len(queries)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=100000, help='탈퇴 처리할 유저 수')
+    parser.add_argument('--naive-sample', type=int, default=1000, help='하나씩 처리하는 방식으로 측정할 유저 수')
+    args = parser.parse_args()
+
+    call_command('migrate', verbosity=0)
+
+    started = time.perf_counter()
+    emails = create_users(args.users + args.naive_sample)
+    print(f'created {len(emails)} users and refresh tokens in {time.perf_counter() - started:.2f}s')
+
+    sample, emails = emails[:args.naive_sample], emails[args.naive_sample:]
+
+    _, naive_elapsed, naive_queries = measure(naive, sample)
+    result, bulk_elapsed, bulk_queries = measure(
+        User.objects.change_active_type, emails, UserActiveType.TYPES.SECESSION.value
+    )
+
+    scale = args.users / args.naive_sample
+
+    print(f"users={args.users} batch_size={settings.ACCOUNT_BULK_CHANGES['BATCH_SIZE']} result={result}")
+    print(f"{'method':<24}{'seconds':>12}{'queries':>12}")
+    print(f"{'one by one (estimated)':<24}{naive_elapsed * scale:>12.2f}{round(naive_queries * scale):>12}")
+    print(f"{'change_active_type':<24}{bulk_elapsed:>12.2f}{bulk_queries:>12}")
+
+
+if __name__ == '__main__':
+    main()
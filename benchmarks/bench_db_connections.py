@@ -0,0 +1,168 @@
+"""
+DB 연결 유지 벤치마크.
+
+    python benchmarks/bench_db_connections.py --requests 200 --connect-delay 0.005
+
+임시 SQLite DB에 마이그레이션을 적용하고 회원가입, 이메일 인증, 로그인, 토큰 재발급 API를
+WSGI 핸들러로 직접 호출하면서, 요청마다 연결을 닫는 기본 설정(CONN_MAX_AGE=0)과
+연결을 유지하는 운영 설정(settings_production)의 요청당 새 연결 수와 평균 응답 시간을 비교한다.
+SQLite는 연결 비용이 거의 없으므로, --connect-delay로 연결마다 드는 TCP+TLS+인증 지연을 흉내낸다.
+"""
+import argparse
+from io import BytesIO
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'login_is_boring.settings_production')
+os.environ.setdefault('DATABASE_URL', f'sqlite:///{tempfile.mkdtemp()}/bench.sqlite3')
+os.environ.setdefault('TOKEN_ISSUANCE_OUTSTANDING_TOKENS', 'sync')
+os.environ.setdefault('ALLOWED_HOSTS', 'testserver')
+
+import django
+
+django.setup()
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management import call_command
+from django.db import connection
+from django.db.backends.signals import connection_created
+
+from db.verification import get_verification_code_store
+
+
+MAIN_THREAD = threading.main_thread().ident
+
+# 인증 코드는 응답에 담기지 않으므로 발급할 때 따로 기록해 이메일 인증 요청에 쓴다.
+issued_codes = {}
+
+
+def record_issued_code(issue):
+    def wrapper(email):
+        issued_codes[email] = issue(email)
+        return issued_codes[email]
+
+    return wrapper
+
+
+class ConnectionCounter:
+    """
+    요청 스레드에서 새로 맺은 연결 수를 세고, 연결마다 connect_delay초를 기다리는 클래스.
+    """
+    def __init__(self, connect_delay: float):
+        self.connect_delay = connect_delay
+        self.count = 0
+
+    def __call__(self, sender, connection, **kwargs):
+        # 메일 릴레이처럼 요청 밖의 백그라운드 스레드가 맺은 연결은 세지 않는다.
+        if threading.get_ident() == MAIN_THREAD:
+            self.count += 1
+            time.sleep(self.connect_delay)
+
+
+def call(handler: WSGIHandler, path: str, payload: dict) -> tuple[int, dict]:
+    body = json.dumps(payload).encode()
+    path, _, query_string = path.partition('?')
+    environ = {
+        'REQUEST_METHOD': 'POST',
+        'PATH_INFO': path,
+        'QUERY_STRING': query_string,
+        'SERVER_NAME': 'testserver',
+        'SERVER_PORT': '80',
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': BytesIO(body),
+        'wsgi.errors': sys.stderr,
+    }
+    result = {}
+
+    def start_response(status, headers, exc_info=None):
+        result['status'] = int(status.split()[0])
+
+    content = b''.join(handler(environ, start_response))
+
+    return result['status'], json.loads(content or b'{}')
+
+
+def measure(handler: WSGIHandler, counter: ConnectionCounter, requests: list[tuple[str, dict]]):
+    """
+    요청을 차례로 보내고 (응답 목록, 요청당 새 연결 수, 평균 응답 시간(ms))을 return하는 함수.
+    """
+    bodies = []
+    counter.count = 0
+    started = time.perf_counter()
+
+    for path, payload in requests:
+        status, body = call(handler, path, payload)
+
+        if status >= 400:
+            raise RuntimeError(f'{path} failed with {status}: {body}')
+
+        bodies.append(body)
+
+    elapsed = time.perf_counter() - started
+
+    return bodies, counter.count / len(requests), elapsed * 1000 / len(requests)
+
+
+def bench(handler: WSGIHandler, counter: ConnectionCounter, prefix: str, count: int) -> dict[str, tuple[float, float]]:
+    """
+    API마다 (요청당 새 연결 수, 평균 응답 시간(ms))를 return하는 함수.
+    """
+    password = 'benchpassword777!'
+    emails = [f'{prefix}{i}@bench.local' for i in range(count)]
+    results = {}
+
+    _, *results['sign-up'] = measure(handler, counter, [
+        ('/v1/accounts/sign-up', {'email': email, 'username': '벤치', 'password': password}) for email in emails
+    ])
+    _, *results['email-verify'] = measure(handler, counter, [
+        (f'/v1/accounts/email-verify?email={email}', {'verify_code': issued_codes[email]}) for email in emails
+    ])
+    bodies, *results['login'] = measure(handler, counter, [
+        ('/v1/accounts/login', {'email': email, 'password': password}) for email in emails
+    ])
+    _, *results['token-refresh'] = measure(handler, counter, [
+        ('/v1/accounts/token-refresh', {'refresh_token': body['refresh_token']}) for body in bodies
+    ])
+
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=100, help='API마다 보낼 요청 수')
+    parser.add_argument('--connect-delay', type=float, default=0.0, help='연결마다 흉내낼 연결 지연(초)')
+    args = parser.parse_args()
+
+    call_command('migrate', verbosity=0)
+    connection.close()
+
+    store = get_verification_code_store()
+    store.issue = record_issued_code(store.issue)
+
+    counter = ConnectionCounter(args.connect_delay)
+    connection_created.connect(counter, weak=False)
+    handler = WSGIHandler()
+
+    print(f"requests={args.requests} connect_delay={args.connect_delay} engine={connection.settings_dict['ENGINE']}")
+    print(f"{'endpoint':<16}{'CONN_MAX_AGE':>14}{'connections/req':>18}{'avg(ms)':>10}")
+
+    for conn_max_age in (0, connection.settings_dict['CONN_MAX_AGE']):
+        connection.settings_dict['CONN_MAX_AGE'] = conn_max_age
+        connection.close()
+
+        results = bench(handler, counter, f'age{conn_max_age}-', args.requests)
+
+        for endpoint, (connections_per_request, avg_ms) in results.items():
+            print(f'{endpoint:<16}{conn_max_age:>14}{connections_per_request:>18.2f}{avg_ms:>10.2f}')
+
+
+if __name__ == '__main__':
+    main()
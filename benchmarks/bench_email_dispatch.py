@@ -0,0 +1,158 @@
+"""
+인증 메일 전송 벤치마크.
+
+    python benchmarks/bench_email_dispatch.py --messages 500 --handshake-delay 0.05
+
+로컬에 SMTP 서버를 띄우고(aiosmtpd가 설치되어 있으면 aiosmtpd, 아니면 같은 역할의 간단한 asyncio 서버)
+메일마다 새로 연결하는 send_mail 방식과 연결을 유지하며 모아 보내는 PooledMailer의 초당 전송 수를 비교한다.
+로컬 서버는 TLS를 쓰지 않으므로, --handshake-delay로 연결마다 드는 TCP+TLS 핸드셰이크 지연을 흉내낸다.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'login_is_boring.settings')
+
+import django
+
+django.setup()
+
+from django.conf import settings
+from django.core.mail import send_mail
+
+from v1.accounts.mailer import PooledMailer
+from v1.accounts.tasks import build_sign_up_verify_code_email
+
+
+class SinkSMTPServer:
+    """
+    받은 메일을 세기만 하는 SMTP 서버. 연결마다 handshake_delay초 뒤에 인사말을 보낸다.
+    """
+    def __init__(self, handshake_delay: float):
+        self.handshake_delay = handshake_delay
+        self.received = 0
+        self.connections = 0
+        self.port = None
+        self._ready = threading.Event()
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        await asyncio.sleep(self.handshake_delay)
+        writer.write(b'220 localhost ESMTP bench\r\n')
+        in_data = False
+
+        while line := await reader.readline():
+            if in_data:
+                if line == b'.\r\n':
+                    in_data = False
+                    self.received += 1
+                    writer.write(b'250 OK\r\n')
+            else:
+                command = line[:4].upper()
+
+                if command == b'EHLO':
+                    writer.write(b'250-localhost\r\n250 8BITMIME\r\n')
+                elif command == b'DATA':
+                    in_data = True
+                    writer.write(b'354 End data with <CR><LF>.<CR><LF>\r\n')
+                elif command == b'QUIT':
+                    writer.write(b'221 Bye\r\n')
+                    await writer.drain()
+                    break
+                else:
+                    writer.write(b'250 OK\r\n')
+
+            await writer.drain()
+
+        writer.close()
+
+    async def _serve(self):
+        server = await asyncio.start_server(self._handle, '127.0.0.1', 0)
+        self.port = server.sockets[0].getsockname()[1]
+        self._ready.set()
+
+        async with server:
+            await server.serve_forever()
+
+    def start(self) -> None:
+        threading.Thread(target=lambda: asyncio.run(self._serve()), daemon=True).start()
+        self._ready.wait()
+
+
+def bench_send_mail(count: int, concurrency: int) -> float:
+    def send(i):
+        send_mail(
+            subject='회원가입 인증 메일입니다.',
+            message='000000\n해당 문자를 다른 사람과 공유하지 마십시오.',
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            recipient_list=[f'user{i}@bench.local'],
+        )
+
+    started = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(send, range(count)))
+
+    return count / (time.perf_counter() - started)
+
+
+def bench_pooled_mailer(count: int, concurrency: int) -> float:
+    mailer = PooledMailer(
+        pool_size=settings.EMAIL_DISPATCH['POOL_SIZE'],
+        batch_size=settings.EMAIL_DISPATCH['BATCH_SIZE'],
+        batch_window=settings.EMAIL_DISPATCH['BATCH_WINDOW'],
+        idle_timeout=settings.EMAIL_DISPATCH['IDLE_TIMEOUT']
+    )
+
+    def send(i):
+        mailer.send(build_sign_up_verify_code_email({'email': f'user{i}@bench.local', 'verify_code': '000000'}))
+
+    started = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(send, range(count)))
+
+    return count / (time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--messages', type=int, default=300, help='방식마다 보낼 메일 수')
+    parser.add_argument('--concurrency', type=int, default=8, help='동시에 메일을 보내는 태스크 수')
+    parser.add_argument('--handshake-delay', type=float, default=0.0, help='연결마다 흉내낼 핸드셰이크 지연(초)')
+    args = parser.parse_args()
+
+    try:
+        from aiosmtpd.controller import Controller
+        from aiosmtpd.handlers import Sink
+
+        controller = Controller(Sink(), hostname='127.0.0.1', port=0)
+        controller.start()
+        port = controller.server.sockets[0].getsockname()[1]
+        server_name = 'aiosmtpd'
+    except ImportError:
+        server = SinkSMTPServer(args.handshake_delay)
+        server.start()
+        port = server.port
+        server_name = 'asyncio sink'
+
+    settings.EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+    settings.EMAIL_HOST = '127.0.0.1'
+    settings.EMAIL_PORT = port
+    settings.EMAIL_USE_TLS = False
+    settings.EMAIL_HOST_USER = ''
+    settings.EMAIL_HOST_PASSWORD = ''
+
+    print(f'server={server_name} messages={args.messages} concurrency={args.concurrency} handshake_delay={args.handshake_delay}')
+    print(f"{'send_mail (connection per message)':<38}{bench_send_mail(args.messages, args.concurrency):10.1f} msg/s")
+    print(f"{'PooledMailer':<38}{bench_pooled_mailer(args.messages, args.concurrency):10.1f} msg/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""
+비밀번호 해싱 백엔드 벤치마크.
+
+    python benchmarks/bench_password_hashing.py --concurrency 8 --requests 400
+
+요청 스레드 여러 개가 동시에 로그인(check_password)과 회원가입(make_password)을 처리하는 상황을
+스레드 풀 백엔드와 프로세스 풀 백엔드에서 각각 재현해 초당 처리량을 비교한다.
+--hasher pure-python 옵션을 주면 GIL을 잡고 도는 순수 파이썬 해셔로 측정한다.
+"""
+import argparse
+import hashlib
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'login_is_boring.settings')
+
+import django
+
+django.setup()
+
+from django.conf import settings
+from django.contrib.auth.hashers import BasePasswordHasher, get_hashers, get_hashers_by_algorithm
+from django.utils.crypto import constant_time_compare
+
+from db.hashers import ProcessPoolHashingBackend, ThreadPoolHashingBackend
+
+
+class PurePythonSHA256PasswordHasher(BasePasswordHasher):
+    """
+    해싱 루프를 파이썬에서 돌려 GIL을 놓지 않는 벤치마크용 해셔.
+    """
+    algorithm = 'bench_pure_python_sha256'
+    rounds = 20000
+
+    def salt(self):
+        return 'benchmarksalt'
+
+    def encode(self, password, salt):
+        digest = (salt + password).encode()
+
+        for _ in range(self.rounds):
+            digest = hashlib.sha256(digest).digest()
+
+        return f'{self.algorithm}${salt}${digest.hex()}'
+
+    def decode(self, encoded):
+        algorithm, salt, hash = encoded.split('$', 2)
+
+        return {'algorithm': algorithm, 'hash': hash, 'salt': salt}
+
+    def verify(self, password, encoded):
+        decoded = self.decode(encoded)
+
+        return constant_time_compare(encoded, self.encode(password, decoded['salt']))
+
+    def safe_summary(self, encoded):
+        return {}
+
+
+def use_pure_python_hasher() -> None:
+    settings.PASSWORD_HASHERS = [f'{__name__}.PurePythonSHA256PasswordHasher']
+    get_hashers.cache_clear()
+    get_hashers_by_algorithm.cache_clear()
+
+
+def run(backend, concurrency: int, requests: int) -> tuple[float, float]:
+    encoded = backend.make_password('benchmark123!')
+
+    # 워커 생성 비용이 측정에 섞이지 않도록 미리 한 바퀴 돌린다.
+    for _ in range(backend.max_workers):
+        backend.check_password('benchmark123!', encoded)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as request_threads:
+        started = time.perf_counter()
+        list(request_threads.map(lambda _: backend.check_password('benchmark123!', encoded), range(requests)))
+        login_rps = requests / (time.perf_counter() - started)
+
+        started = time.perf_counter()
+        list(request_threads.map(lambda _: backend.make_password('benchmark123!'), range(requests)))
+        sign_up_rps = requests / (time.perf_counter() - started)
+
+    return login_rps, sign_up_rps
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--concurrency', type=int, default=os.cpu_count() or 1, help='동시 요청 스레드 수')
+    parser.add_argument('--requests', type=int, default=200, help='백엔드마다 처리할 요청 수')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='해싱 풀의 워커 수')
+    parser.add_argument('--hasher', choices=('default', 'pure-python'), default='default')
+    args = parser.parse_args()
+
+    if args.hasher == 'pure-python':
+        use_pure_python_hasher()
+
+    print(f'hasher={settings.PASSWORD_HASHERS[0]} workers={args.workers} concurrency={args.concurrency}')
+
+    for backend_class in (ThreadPoolHashingBackend, ProcessPoolHashingBackend):
+        backend = backend_class(max_workers=args.workers, max_queue_size=args.concurrency)
+
+        try:
+            login_rps, sign_up_rps = run(backend, args.concurrency, args.requests)
+        finally:
+            backend.shutdown()
+
+        print(f'{backend_class.__name__:<28} login {login_rps:8.1f} req/s   sign-up {sign_up_rps:8.1f} req/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+import mock
+import pytest
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+def pytest_collection_modifyitems(items):
+    """
+    유저를 나눠 저장하는 설정(--ds=login_is_boring.settings_shards)에서는 모든 shard를 쓰는 테스트만 실행한다.
+    나머지 DB 테스트는 유저와 토큰이 default DB 하나에 있다고 가정한다.
+    """
+    from db.sharding import is_sharded
+
+    if not is_sharded():
+        return
+
+    skip = pytest.mark.skip(reason='DB 하나를 쓰는 설정에서만 실행한다.')
+
+    for item in items:
+        marker = item.get_closest_marker('django_db')
+
+        if marker is not None and marker.kwargs.get('databases') != '__all__':
+            item.add_marker(skip)
+
+
+@pytest.fixture(scope='session', autouse=True)
+def signing_keys(django_db_setup, django_db_blocker):
+    """
+    배포할 때처럼 rotate_signing_keys로 테스트 DB에 서명 키를 만들어 둔다. 요청 중에는 키를 만들지 않는다.
+    """
+    from db.signing import rotate_signing_keys
+
+    if settings.SIGNING_KEYS['ALGORITHM'].startswith('HS'):
+        return
+
+    with django_db_blocker.unblock():
+        rotate_signing_keys(settings.SIGNING_KEYS['ALGORITHM'], settings.SIMPLE_JWT['REFRESH_TOKEN_LIFETIME'])
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """
+    인증 코드처럼 캐시에 저장되는 데이터가 테스트 사이에 남지 않게 한다.
+    """
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def row_buffers():
+    """
+    모아둔 기록을 백그라운드 스레드나 프로세스 종료 시 테스트 DB에 저장하지 않게 한다. 테스트에서는 flush()를 직접 호출한다.
+    """
+    from db.families import token_family_event_buffer
+    from db.tokens import outstanding_token_buffer
+
+    with mock.patch('db.tokens.ModelRowBuffer._ensure_flusher'):
+        yield
+
+    for buffer in (outstanding_token_buffer, token_family_event_buffer):
+        buffer._rows.clear()
@@ -0,0 +1,132 @@
+from asyncio import CancelledError, wrap_future
+from concurrent.futures import Future, ThreadPoolExecutor
+import threading
+import time
+
+
+class AdmissionRejected(Exception):
+    """
+    대기열이 가득 찼거나 대기 시간이 초과되어 작업이 거절되었을 때 발생하는 예외.
+    """
+    def __init__(self, retry_after: int):
+        super().__init__(f'admission rejected, retry after {retry_after} seconds.')
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    동시에 처리할 작업 수와 대기열 길이를 제한하는 클래스.\n
+    동시 처리 한도가 차면 최대 max_queue_size개까지 max_wait초 동안 기다리게 하고,
+    대기열이 가득 찼거나 대기 시간이 초과되면 AdmissionRejected를 발생시켜 바로 거절한다.
+    """
+    def __init__(self, max_concurrency: int, max_queue_size: int, max_wait: float, retry_after: int):
+        self.max_concurrency = max_concurrency
+        self.max_queue_size = max_queue_size
+        self.max_wait = max_wait
+        self.retry_after = retry_after
+
+        self._condition = threading.Condition()
+        self._in_flight = 0
+        self._waiting = 0
+
+        self._admitted = 0
+        self._shed = 0
+        self._wait_count = 0
+        self._wait_time_total = 0.0
+        self._wait_time_max = 0.0
+
+        # 비동기 요청이 이벤트 루프를 막지 않고 기다릴 수 있도록 대기열 크기만큼의 스레드를 둔다.
+        self._waiters = ThreadPoolExecutor(
+            max_workers=max(max_queue_size, 1),
+            thread_name_prefix='admission-waiter'
+        )
+
+    def acquire(self) -> None:
+        """
+        처리할 자리가 날 때까지 기다린다. 거절되면 AdmissionRejected를 발생시킨다.
+        """
+        with self._condition:
+            if self._admit_or_reject():
+                return
+
+            self._waiting += 1
+            started = time.monotonic()
+
+            try:
+                is_admitted = self._condition.wait_for(
+                    lambda: self._in_flight < self.max_concurrency,
+                    timeout=self.max_wait
+                )
+            finally:
+                self._waiting -= 1
+
+            waited = time.monotonic() - started
+            self._wait_count += 1
+            self._wait_time_total += waited
+            self._wait_time_max = max(self._wait_time_max, waited)
+
+            if not is_admitted:
+                self._shed += 1
+                raise AdmissionRejected(self.retry_after)
+
+            self._in_flight += 1
+            self._admitted += 1
+
+    async def aacquire(self) -> None:
+        """
+        acquire의 비동기 버전. 대기는 대기 전용 스레드에서 한다.\n
+        기다리던 코루틴이 취소되어도 대기 스레드는 계속 기다리므로, 그 스레드가 차지한 자리는 바로 반환한다.
+        """
+        with self._condition:
+            if self._admit_or_reject():
+                return
+
+        future = self._waiters.submit(self.acquire)
+
+        try:
+            await wrap_future(future)
+        except CancelledError:
+            future.add_done_callback(self._release_if_acquired)
+            raise
+
+    def _release_if_acquired(self, future: Future) -> None:
+        if not future.cancelled() and future.exception() is None:
+            self.release()
+
+    def _admit_or_reject(self) -> bool:
+        """
+        기다리지 않고 처리할 수 있으면 자리를 차지하고 True를, 기다려야 하면 False를 return한다.\n
+        대기열이 가득 찼다면 AdmissionRejected를 발생시킨다. lock을 잡은 상태에서 호출해야 한다.
+        """
+        if self._in_flight < self.max_concurrency and self._waiting == 0:
+            self._in_flight += 1
+            self._admitted += 1
+            return True
+
+        if self._waiting >= self.max_queue_size:
+            self._shed += 1
+            raise AdmissionRejected(self.retry_after)
+
+        return False
+
+    def release(self) -> None:
+        with self._condition:
+            self._in_flight -= 1
+            self._condition.notify()
+
+    def stats(self) -> dict[str, int | float]:
+        """
+        모니터링용 지표를 return하는 함수.
+        """
+        with self._condition:
+            return {
+                'max_concurrency': self.max_concurrency,
+                'max_queue_size': self.max_queue_size,
+                'in_flight': self._in_flight,
+                'queue_depth': self._waiting,
+                'admitted': self._admitted,
+                'shed': self._shed,
+                'wait_count': self._wait_count,
+                'wait_time_total': self._wait_time_total,
+                'wait_time_max': self._wait_time_max,
+            }
@@ -3,4 +3,7 @@ from django.apps import AppConfig
 
 class ModelsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'db'
\ No newline at end of file
+    name = 'db'
+
+    def ready(self):
+        from db import signals  # noqa: F401
\ No newline at end of file
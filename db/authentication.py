@@ -0,0 +1,164 @@
+from collections import OrderedDict
+from hashlib import blake2b
+import threading
+import time
+
+from django.conf import settings
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+from db.models import UserActiveType
+from db.sharding import SHARD_CLAIM
+from db.tokens import ACTIVE_TYPE_CLAIM, IS_STAFF_CLAIM
+
+
+class ClaimsUser(TokenUser):
+    """
+    DB를 조회하지 않고 토큰의 claim만으로 만든 유저.\n
+    claim은 리프레시 토큰을 발급할 때의 값이므로, 그 뒤의 유저 변경은 다시 로그인할 때까지 반영되지 않는다.
+    """
+    @cached_property
+    def active_type_id(self) -> int:
+        return self.token[ACTIVE_TYPE_CLAIM]
+
+    @property
+    def active_type_info(self):
+        return UserActiveType.get_info(self.active_type_id)
+
+    def has_perm(self, perm, obj=None):
+        return True
+
+    def has_module_perms(self, app_label):
+        return True
+
+
+class VerifiedTokenCache:
+    """
+    검증을 마친 엑세스 토큰의 인증 결과를 토큰 digest로 최대 max_size개까지 담아두는 LRU 캐시.\n
+    토큰 원문 대신 digest를 키로 써 메모리를 아끼며, 토큰의 exp가 지난 결과는 꺼낼 때 버린다.
+    """
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+        self._hits = 0
+        self._misses = 0
+
+    def _key(self, raw_token: bytes) -> bytes:
+        return blake2b(raw_token, digest_size=16).digest()
+
+    def get(self, raw_token: bytes):
+        key = self._key(raw_token)
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None or entry[0] <= time.time():
+                self._entries.pop(key, None)
+                self._misses += 1
+
+                return None
+
+            self._entries.move_to_end(key)
+            self._hits += 1
+
+            return entry[1]
+
+    def set(self, raw_token: bytes, expires_at: float, value) -> None:
+        key = self._key(raw_token)
+
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        """
+        모니터링용 지표를 return하는 함수.
+        """
+        with self._lock:
+            return {
+                'max_size': self.max_size,
+                'size': len(self._entries),
+                'hits': self._hits,
+                'misses': self._misses,
+            }
+
+
+verified_token_cache = VerifiedTokenCache(max_size=settings.JWT_AUTHENTICATION_CACHE['MAX_SIZE'])
+
+
+class ShardedJWTAuthentication(JWTAuthentication):
+    """
+    토큰의 shard claim이 가리키는 shard에서 유저를 조회하는 JWT 인증 클래스.\n
+    claim이 없다면 데이터베이스 라우터가 정한 곳에서 조회한다.
+    """
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        try:
+            user = self.user_model.objects.db_manager(validated_token.get(SHARD_CLAIM)).get(
+                **{api_settings.USER_ID_FIELD: user_id}
+            )
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+
+        if not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+
+        return user
+
+
+class CachedJWTAuthentication(ShardedJWTAuthentication):
+    """
+    한번 검증한 엑세스 토큰은 만료될 때까지 서명 검증과 유저 조회 없이 인증하는 JWT 인증 클래스.\n
+    JWT_AUTHENTICATION_CACHE['CLAIMS_ONLY_USER']가 켜져 있고 토큰에 active_type, is_staff claim이 있다면
+    처음 볼 때도 유저를 조회하지 않고 ClaimsUser를 쓴다.
+    캐시한 유저는 여러 요청이 함께 쓰므로 뷰에서 수정하지 않아야 하며, 토큰이 만료될 때까지 유저 변경이 반영되지 않는다.
+    change_active_type, logout 같은 일괄 변경도 리프레시 토큰만 폐기하므로,
+    이미 캐시된(CLAIMS_ONLY_USER라면 이미 발급된) 엑세스 토큰은 만료될 때까지 그대로 인증된다.
+    """
+    def authenticate(self, request):
+        header = self.get_header(request)
+
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+
+        if raw_token is None:
+            return None
+
+        result = verified_token_cache.get(raw_token)
+
+        if result is None:
+            validated_token = self.get_validated_token(raw_token)
+            result = (self.get_user(validated_token), validated_token)
+            verified_token_cache.set(raw_token, validated_token['exp'], result)
+
+        return result
+
+    def get_user(self, validated_token):
+        if (
+            settings.JWT_AUTHENTICATION_CACHE['CLAIMS_ONLY_USER']
+            and ACTIVE_TYPE_CLAIM in validated_token
+            and IS_STAFF_CLAIM in validated_token
+        ):
+            return ClaimsUser(validated_token)
+
+        return super().get_user(validated_token)
@@ -0,0 +1,173 @@
+from datetime import timedelta
+from hashlib import blake2b
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from db.sharding import get_shards
+
+
+class BloomFilter:
+    """
+    capacity개를 넣었을 때 오탐률이 error_rate가 되도록 크기를 정하는 블룸 필터.\n
+    없다고 판단한 값은 확실히 없고, 있다고 판단한 값은 오탐일 수 있다.
+    """
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = max(capacity, 1)
+        self.size = math.ceil(-self.capacity * math.log(error_rate) / (math.log(2) ** 2))
+        self.hash_count = max(round(self.size / self.capacity * math.log(2)), 1)
+        self.count = 0
+
+        self._bits = bytearray(math.ceil(self.size / 8))
+        self._lock = threading.Lock()
+
+    def _positions(self, key: str):
+        digest = blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'big')
+        h2 = int.from_bytes(digest[8:], 'big') | 1
+
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, key: str) -> None:
+        with self._lock:
+            for position in self._positions(key):
+                self._bits[position >> 3] |= 1 << (position & 7)
+
+            self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class BlacklistIndex:
+    """
+    블랙리스트에 오른 리프레시 토큰 jti의 프로세스 내 인덱스.\n
+    처음 조회할 때 BlacklistedToken 테이블 전체로 만들고, 이 프로세스에서 블랙리스트에 추가된 토큰은
+    signal로 바로 반영하며, 다른 프로세스에서 추가된 토큰은 sync_interval초마다 shard별로 id 순으로 이어 읽는다.
+    동시에 커밋된 트랜잭션의 id는 순서가 뒤바뀔 수 있으므로, 마지막으로 읽은 id 이후뿐 아니라
+    직전 동기화 lookback초 전부터 블랙리스트에 오른 토큰도 다시 읽고, rebuild_interval초마다 필터를 새로 만든다.
+    """
+    def __init__(
+        self,
+        capacity: int,
+        error_rate: float,
+        sync_interval: float,
+        lookback: float,
+        rebuild_interval: float
+    ):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_interval = sync_interval
+        self.lookback = timedelta(seconds=lookback)
+        self.rebuild_interval = rebuild_interval
+
+        self._lock = threading.Lock()
+        self._filter = None
+        self._last_ids = {}
+        self._synced_at = 0.0
+        self._built_at = 0.0
+        self._read_since = None
+
+    def might_contain(self, jti: str) -> bool:
+        """
+        jti가 블랙리스트에 있을 수 있으면 True를 return한다. False라면 DB를 조회할 필요가 없다.
+        """
+        return jti in self._ensure_fresh()
+
+    def add(self, jti: str) -> None:
+        if self._filter is not None:
+            self._filter.add(jti)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._filter = None
+            self._last_ids = {}
+            self._synced_at = 0.0
+            self._built_at = 0.0
+            self._read_since = None
+
+    def rebuild(self) -> None:
+        with self._lock:
+            self._rebuild()
+
+    def sync(self) -> None:
+        with self._lock:
+            self._sync()
+
+    def _ensure_fresh(self) -> BloomFilter:
+        bloom_filter = self._filter
+
+        if bloom_filter is not None and time.monotonic() - self._synced_at < self.sync_interval:
+            return bloom_filter
+
+        with self._lock:
+            if self._filter is None or time.monotonic() - self._built_at >= self.rebuild_interval:
+                self._rebuild()
+            elif time.monotonic() - self._synced_at >= self.sync_interval:
+                self._sync()
+
+            return self._filter
+
+    def _rebuild(self) -> None:
+        shards = get_shards()
+        read_since = timezone.now()
+        total = sum(BlacklistedToken.objects.using(shard).count() for shard in shards)
+        bloom_filter = BloomFilter(max(self.capacity, total * 2), self.error_rate)
+        last_ids = {}
+
+        for shard in shards:
+            last_ids[shard] = self._read(bloom_filter, shard, 0)
+
+        self._filter = bloom_filter
+        self._last_ids = last_ids
+        self._read_since = read_since
+        self._synced_at = self._built_at = time.monotonic()
+
+    def _sync(self) -> None:
+        read_since = timezone.now()
+        since = self._read_since - self.lookback
+
+        for shard in get_shards():
+            self._last_ids[shard] = self._read(self._filter, shard, self._last_ids.get(shard, 0), since)
+
+        self._read_since = read_since
+        self._synced_at = time.monotonic()
+
+        if self._filter.count > self._filter.capacity:
+            # 용량을 넘으면 오탐률이 올라가므로 더 큰 필터로 다시 만든다.
+            self._rebuild()
+
+    def _read(self, bloom_filter: BloomFilter, shard: str, last_id: int, since=None) -> int:
+        """
+        shard에서 last_id 다음부터(since가 있다면 since 이후 블랙리스트에 오른 것도) jti를 필터에 넣고
+        지금까지 읽은 가장 큰 id를 return한다.
+        """
+        condition = Q(id__gt=last_id)
+
+        if since is not None:
+            condition |= Q(blacklisted_at__gte=since)
+
+        rows = BlacklistedToken.objects.using(shard).filter(condition).values_list('id', 'token__jti')
+
+        for id, jti in rows.order_by('id').iterator(chunk_size=5000):
+            if jti not in bloom_filter:
+                # 다시 읽은 토큰은 세지 않아야 필터가 용량보다 빨리 다시 만들어지지 않는다.
+                bloom_filter.add(jti)
+
+            last_id = max(last_id, id)
+
+        return last_id
+
+
+blacklist_index = BlacklistIndex(
+    capacity=settings.TOKEN_BLACKLIST_INDEX['CAPACITY'],
+    error_rate=settings.TOKEN_BLACKLIST_INDEX['ERROR_RATE'],
+    sync_interval=settings.TOKEN_BLACKLIST_INDEX['SYNC_INTERVAL'],
+    lookback=settings.TOKEN_BLACKLIST_INDEX['SYNC_LOOKBACK'],
+    rebuild_interval=settings.TOKEN_BLACKLIST_INDEX['REBUILD_INTERVAL']
+)
@@ -0,0 +1,114 @@
+import threading
+
+from django.conf import settings
+from django.db import connections
+
+
+class PersistentConnectionLimiter:
+    """
+    워커 프로세스에서 요청 사이에 유지할 DB 연결을 alias마다 max_connections개로 제한하는 클래스.\n
+    연결을 스레드끼리 나눠 쓰는 pool이 아니며, Django가 스레드마다 두는 연결 중 유지할 연결의 수만 제한한다.
+    CONN_MAX_AGE로 연결을 유지할 때 요청 스레드가 많으면 연결도 그만큼 늘어나므로,
+    요청이 끝났을 때 연결을 유지 중인 스레드가 이미 max_connections개라면 넘친 스레드의 연결은 닫는다.
+    health_checks가 켜져 있으면 요청이 시작될 때 유지된 연결을 확인해, 끊겼다면 닫고 새로 연결하게 한다.
+    Django 3.2에는 DATABASES의 CONN_HEALTH_CHECKS가 없으므로(4.1부터 지원) 같은 확인을 여기서 한다.
+    """
+    def __init__(self, max_connections: int, health_checks: bool):
+        self.max_connections = max_connections
+        self.health_checks = health_checks
+
+        self._lock = threading.Lock()
+        self._holders = {}
+
+        self._opened = 0
+        self._reused = 0
+        self._closed_overflow = 0
+        self._closed_unhealthy = 0
+
+    def connection_created(self, connection) -> None:
+        with self._lock:
+            self._opened += 1
+
+    def request_started(self) -> None:
+        """
+        유지된 연결을 확인한다. Django가 CONN_MAX_AGE가 지난 연결을 닫은 뒤에 호출되어야 한다.
+        """
+        for connection in connections.all():
+            if connection.connection is None:
+                continue
+
+            if self.health_checks and not connection.is_usable():
+                connection.close()
+                self._release(connection.alias)
+
+                with self._lock:
+                    self._closed_unhealthy += 1
+
+                continue
+
+            with self._lock:
+                self._reused += 1
+
+    def request_finished(self) -> None:
+        """
+        연결을 유지할 자리가 없다면 닫는다. Django가 CONN_MAX_AGE가 지난 연결을 닫은 뒤에 호출되어야 한다.
+        """
+        for connection in connections.all():
+            if connection.connection is None:
+                self._release(connection.alias)
+                continue
+
+            if self._hold(connection.alias):
+                continue
+
+            connection.close()
+
+            with self._lock:
+                self._closed_overflow += 1
+
+    def stats(self) -> dict[str, int | dict[str, int]]:
+        """
+        모니터링용 지표를 return하는 함수.
+        """
+        with self._lock:
+            return {
+                'max_connections': self.max_connections,
+                'persistent': {alias: len(holders) for alias, holders in self._holders.items()},
+                'opened': self._opened,
+                'reused': self._reused,
+                'closed_overflow': self._closed_overflow,
+                'closed_unhealthy': self._closed_unhealthy,
+            }
+
+    def _hold(self, alias: str) -> bool:
+        """
+        현재 스레드가 alias의 연결을 유지할 수 있으면 자리를 차지하고 True를 return한다.
+        """
+        ident = threading.get_ident()
+
+        with self._lock:
+            holders = self._holders.setdefault(alias, set())
+
+            if ident in holders:
+                return True
+
+            if len(holders) >= self.max_connections:
+                # 연결을 닫지 못하고 끝난 스레드의 자리는 비운다.
+                holders &= {thread.ident for thread in threading.enumerate()}
+
+            if len(holders) >= self.max_connections:
+                return False
+
+            holders.add(ident)
+
+            return True
+
+    def _release(self, alias: str) -> None:
+        with self._lock:
+            self._holders.get(alias, set()).discard(threading.get_ident())
+
+
+connection_limiter = PersistentConnectionLimiter(
+    max_connections=settings.DATABASE_CONNECTIONS['MAX_PERSISTENT'],
+    health_checks=settings.DATABASE_CONNECTIONS['HEALTH_CHECKS']
+)
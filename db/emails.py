@@ -0,0 +1,6 @@
+def normalize_email(email: str) -> str:
+    """
+    대소문자나 앞뒤 공백이 달라도 같은 이메일로 조회되도록 정규화하는 함수.\n
+    User.email_normalized 컬럼과 이메일로 유저를 찾는 모든 조회에 사용한다.
+    """
+    return email.strip().lower()
@@ -0,0 +1,182 @@
+from datetime import datetime
+from enum import Enum
+import atexit
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+
+from db.models import TokenFamilyEvent
+from db.tokens import FAMILY_CLAIM, ModelRowBuffer, RefreshToken, record_outstanding_token
+
+
+class FamilyCheck(Enum):
+    ROTATED = 'rotated'
+    RETRIED = 'retried'
+    REUSED = 'reused'
+    REVOKED = 'revoked'
+
+
+class TokenFamilyStore:
+    """
+    리프레시 토큰 family마다 지금 쓸 수 있는 jti를 Django 캐시에 저장하는 저장소.\n
+    로그인으로 발급된 리프레시 토큰과 그 토큰을 교체해 나온 토큰들이 한 family이며, 처음 토큰의 jti가 family id다.
+    한번 교체에 쓰인 jti는 cache.add로 표시해 여러 프로세스에서도 한번만 쓸 수 있게 하고,
+    이미 쓰인 jti가 다시 오면 토큰이 탈취된 것으로 보고 family 전체를 폐기한다.
+    단, 교체한 지 grace_period초가 지나지 않았다면 응답을 받지 못한 클라이언트의 재시도로 보고 교체 결과를 다시 준다.
+    유저 단위로 폐기하면 폐기한 시각을 저장해 두고, 그 전에 발급된 토큰은 교체하지 않는다.
+    토큰 기록(OutstandingToken)이 아직 저장되지 않아 블랙리스트에 올릴 수 없는 토큰도 이것으로 폐기된다.
+    모든 키는 리프레시 토큰 수명(ttl초)이 지나면 사라지므로, 캐시는 그 전에 키를 내보내지 않도록 설정해야 한다.
+    """
+    def __init__(self, cache_alias: str, key_prefix: str, ttl: int, grace_period: float):
+        self.cache = caches[cache_alias]
+        self.key_prefix = key_prefix
+        self.ttl = ttl
+        self.grace_period = grace_period
+
+    def _key(self, kind: str, value: str) -> str:
+        return f'{self.key_prefix}:{kind}:{value}'
+
+    def _user_key(self, user_id: int, shard: str | None) -> str:
+        # 유저를 나눠 저장한다면 유저 id는 shard마다 따로 매긴다.
+        return self._key('user-revoked', f'{shard}:{user_id}' if shard else str(user_id))
+
+    def rotate(
+        self, family: str, jti: str, new_jti: str, user_id: int, issued_at: float, shard: str | None = None
+    ) -> FamilyCheck:
+        """
+        family의 jti를 new_jti로 교체하는 함수.\n
+        재사용이 감지되거나 issued_at(토큰의 발급 시각)이 유저를 폐기한 시각 이전이면 family를 폐기한다.
+        grace_period초 안에 교체한 jti가 다시 오면 family를 그대로 두고 RETRIED를 return한다.
+        """
+        if self.is_revoked(family):
+            return FamilyCheck.REVOKED
+
+        if self.is_user_revoked(user_id, issued_at, shard):
+            self.revoke(family)
+            return FamilyCheck.REVOKED
+
+        if not self.cache.add(self._key('used', jti), time.time(), timeout=self.ttl):
+            used_at = self.cache.get(self._key('used', jti))
+
+            if used_at is not None and time.time() - used_at < self.grace_period:
+                return FamilyCheck.RETRIED
+
+            self.revoke(family)
+            return FamilyCheck.REUSED
+
+        current = self.cache.get(self._key('current', family))
+
+        if current is not None and current != jti:
+            # 사용 표시가 캐시에서 사라졌더라도 지금 jti가 아닌 토큰은 재사용으로 본다.
+            self.revoke(family)
+            return FamilyCheck.REUSED
+
+        self.cache.set(self._key('current', family), new_jti, timeout=self.ttl)
+
+        return FamilyCheck.ROTATED
+
+    def remember_rotation(self, jti: str, result: dict[str, str]) -> None:
+        """
+        jti를 교체해 발급한 토큰을 grace_period초 동안 저장하는 함수.
+        """
+        self.cache.set(self._key('rotation', jti), result, timeout=self.grace_period)
+
+    def get_rotation(self, jti: str) -> dict[str, str] | None:
+        return self.cache.get(self._key('rotation', jti))
+
+    def revoke(self, family: str) -> None:
+        self.cache.set(self._key('revoked', family), 1, timeout=self.ttl)
+        self.cache.delete(self._key('current', family))
+
+    def is_revoked(self, family: str) -> bool:
+        return self.cache.get(self._key('revoked', family)) is not None
+
+    def revoke_users(self, user_ids: list[int], shard: str | None = None) -> None:
+        """
+        유저들에게 지금까지 발급된 리프레시 토큰을 모두 폐기하는 함수.
+        """
+        revoked_at = time.time()
+
+        self.cache.set_many(
+            {self._user_key(user_id, shard): revoked_at for user_id in user_ids}, timeout=self.ttl
+        )
+
+    def is_user_revoked(self, user_id: int, issued_at: float, shard: str | None = None) -> bool:
+        # 발급 시각은 밀리초 단위로 내림되어 있으므로, 폐기한 뒤 1ms 안에 발급된 토큰은 폐기된 것으로 볼 수 있다.
+        revoked_at = self.cache.get(self._user_key(user_id, shard))
+
+        return revoked_at is not None and issued_at < revoked_at
+
+
+token_family_store = TokenFamilyStore(
+    cache_alias=settings.TOKEN_FAMILIES['CACHE_ALIAS'],
+    key_prefix=settings.TOKEN_FAMILIES['KEY_PREFIX'],
+    ttl=int(api_settings.REFRESH_TOKEN_LIFETIME.total_seconds()),
+    grace_period=settings.TOKEN_FAMILIES['GRACE_PERIOD']
+)
+
+token_family_event_buffer = ModelRowBuffer(
+    name='token-family-event-flusher',
+    flush_interval=settings.TOKEN_FAMILIES['AUDIT_FLUSH_INTERVAL'],
+    batch_size=settings.TOKEN_FAMILIES['AUDIT_BATCH_SIZE']
+)
+
+atexit.register(token_family_event_buffer.flush)
+
+
+def rotate_tokens(refresh_token: RefreshToken) -> dict[str, str]:
+    """
+    검증을 마친 리프레시 토큰을 새 토큰으로 교체하고 엑세스 토큰 및 리프레시 토큰과 각 토큰의 만료일을 return하는 함수.\n
+    감사 기록은 모아서 저장하고, 새 리프레시 토큰의 OutstandingToken은 TOKEN_ISSUANCE 설정에 따라 기록한다.
+    GRACE_PERIOD초 안에 교체한 토큰이 다시 오면 새로 발급하지 않고 그때 발급한 토큰을 return한다.
+    이미 교체된 토큰이거나 폐기된 family나 유저의 토큰이면 TokenError를 발생시킨다.
+    """
+    jti = refresh_token[api_settings.JTI_CLAIM]
+    family = refresh_token.get(FAMILY_CLAIM, jti)
+    user_id = refresh_token[api_settings.USER_ID_CLAIM]
+    issued_at = refresh_token.issued_at
+
+    refresh_token[FAMILY_CLAIM] = family
+    refresh_token.set_jti()
+    refresh_token.set_exp()
+    refresh_token.set_iat()
+
+    check = token_family_store.rotate(
+        family, jti, refresh_token[api_settings.JTI_CLAIM], user_id, issued_at, refresh_token.shard
+    )
+
+    if check == FamilyCheck.RETRIED:
+        result = token_family_store.get_rotation(jti)
+
+        if result is None:
+            # 먼저 온 요청이 아직 교체 중이다. 재사용이 아니므로 family는 폐기하지 않는다.
+            raise TokenError(_('Token is being rotated'))
+
+        return result
+
+    token_family_event_buffer.add(TokenFamilyEvent(family=family, user_id=user_id, jti=jti, event=check.value))
+
+    if check == FamilyCheck.REUSED:
+        raise TokenError(_('Token has been reused'))
+
+    if check == FamilyCheck.REVOKED:
+        raise TokenError(_('Token has been revoked'))
+
+    access_token = refresh_token.access_token
+    encoded_refresh_token = str(refresh_token)
+
+    record_outstanding_token(user_id, refresh_token, encoded_refresh_token, using=refresh_token.shard)
+
+    result = {
+        'access_token': str(access_token),
+        'access_token_expiration': datetime.fromtimestamp(access_token['exp']).isoformat(),
+        'refresh_token': encoded_refresh_token,
+        'refresh_token_expiration': datetime.fromtimestamp(refresh_token['exp']).isoformat()
+    }
+    token_family_store.remember_rotation(jti, result)
+
+    return result
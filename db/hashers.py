@@ -0,0 +1,251 @@
+from abc import ABC, abstractmethod
+from asyncio import wrap_future
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+import threading
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model, hashers
+from django.db import close_old_connections
+from django.utils.module_loading import import_string
+
+from db.admission import AdmissionController, AdmissionRejected
+
+
+class TunablePBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """
+    PASSWORD_HASHING['WORK_FACTOR']를 반복 횟수로 사용하는 PBKDF2 해셔.\n
+    WORK_FACTOR가 없으면 Django 기본 반복 횟수를 사용한다.
+    """
+    @property
+    def iterations(self) -> int:
+        return settings.PASSWORD_HASHING['WORK_FACTOR'] or hashers.PBKDF2PasswordHasher.iterations
+
+
+class TunableBCryptSHA256PasswordHasher(hashers.BCryptSHA256PasswordHasher):
+    """
+    PASSWORD_HASHING['WORK_FACTOR']를 rounds로 사용하는 bcrypt 해셔.\n
+    WORK_FACTOR가 없으면 Django 기본 rounds를 사용한다.
+    """
+    @property
+    def rounds(self) -> int:
+        return settings.PASSWORD_HASHING['WORK_FACTOR'] or hashers.BCryptSHA256PasswordHasher.rounds
+
+
+def _init_worker() -> None:
+    """
+    프로세스 풀 워커가 시작될 때 Django 설정을 불러오는 함수.\n
+    spawn 방식으로 생성된 워커도 PASSWORD_HASHERS 설정을 사용할 수 있게 한다.
+    """
+    django.setup()
+
+
+class HashingBackend(ABC):
+    """
+    비밀번호 해싱/검증 작업을 executor에 넘기는 백엔드의 기본 클래스.\n
+    하위 클래스는 create_executor를 구현해야 한다.
+    동시에 처리하는 작업은 max_workers개, 대기열은 max_queue_size개로 제한되며
+    대기열이 가득 찼거나 max_wait초 안에 자리가 나지 않으면 AdmissionRejected를 발생시킨다.
+    """
+    def __init__(
+        self, 
+        max_workers: int, 
+        max_queue_size: int, 
+        max_wait: float = 2.0, 
+        retry_after: int = 1
+    ):
+        self.max_workers = max_workers
+        self.max_queue_size = max_queue_size
+        self.executor = self.create_executor()
+        self.admission = AdmissionController(
+            max_concurrency=max_workers,
+            max_queue_size=max_queue_size,
+            max_wait=max_wait,
+            retry_after=retry_after
+        )
+
+    @abstractmethod
+    def create_executor(self) -> Executor:
+        ...
+
+    def submit(self, fn, *args) -> Future:
+        self.admission.acquire()
+
+        return self._submit(fn, *args)
+
+    async def asubmit(self, fn, *args):
+        await self.admission.aacquire()
+
+        return await wrap_future(self._submit(fn, *args))
+
+    def _submit(self, fn, *args) -> Future:
+        try:
+            future = self.executor.submit(fn, *args)
+        except BaseException:
+            self.admission.release()
+            raise
+
+        future.add_done_callback(lambda _: self.admission.release())
+
+        return future
+
+    def make_password(self, password: str) -> str:
+        return self.submit(hashers.make_password, password).result()
+
+    def check_password(self, password: str, encoded: str) -> bool:
+        return self.submit(hashers.check_password, password, encoded).result()
+
+    async def amake_password(self, password: str) -> str:
+        return await self.asubmit(hashers.make_password, password)
+
+    async def acheck_password(self, password: str, encoded: str) -> bool:
+        return await self.asubmit(hashers.check_password, password, encoded)
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=True)
+
+
+class ThreadPoolHashingBackend(HashingBackend):
+    """
+    스레드 풀에서 해싱하는 백엔드.\n
+    hashlib처럼 해싱 중 GIL을 놓는 구현에 적합하다.
+    """
+    def create_executor(self) -> Executor:
+        return ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix='password-hashing'
+        )
+
+
+class ProcessPoolHashingBackend(HashingBackend):
+    """
+    프로세스 풀에서 해싱하는 백엔드.\n
+    GIL을 잡고 도는 순수 파이썬 해셔도 코어 수만큼 병렬로 처리할 수 있다.
+    """
+    def create_executor(self) -> Executor:
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            initializer=_init_worker
+        )
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_hashing_backend() -> HashingBackend:
+    """
+    PASSWORD_HASHING 설정에 지정된 해싱 백엔드를 return하는 함수.
+    """
+    global _backend
+
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                config = settings.PASSWORD_HASHING
+                backend_class = import_string(config['BACKEND'])
+                _backend = backend_class(
+                    max_workers=config['MAX_WORKERS'],
+                    max_queue_size=config['MAX_QUEUE_SIZE'],
+                    max_wait=config['MAX_WAIT'],
+                    retry_after=config['RETRY_AFTER']
+                )
+
+    return _backend
+
+
+def password_must_update(encoded: str) -> bool:
+    """
+    저장된 해시가 현재 기본 해셔 설정과 달라 다시 해싱해야 하는지를 return하는 함수.
+    """
+    preferred = hashers.get_hasher('default')
+
+    try:
+        hasher = hashers.identify_hasher(encoded)
+    except ValueError:
+        return False
+
+    return hasher.algorithm != preferred.algorithm or preferred.must_update(encoded)
+
+
+_rehash_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='password-rehash')
+_rehash_lock = threading.Lock()
+# 대기 중이거나 처리 중인 재해싱 작업의 (using, 유저 id). 작업은 비밀번호 원문을 들고 있으므로 수를 제한한다.
+_pending_rehashes = set()
+
+
+def _rehash_password(user_id: int, password: str, encoded: str, using: str | None = None) -> bool:
+    """
+    비밀번호를 현재 기본 해셔로 다시 해싱해 저장하는 함수.\n
+    그 사이 비밀번호가 바뀌었다면 덮어쓰지 않도록 기존 해시가 같을 때만 저장한다.
+    """
+    try:
+        new_encoded = get_hashing_backend().make_password(password)
+
+        return get_user_model().objects.db_manager(using).filter(
+            pk=user_id, password=encoded
+        ).update(password=new_encoded) == 1
+    except AdmissionRejected:
+        # 해싱 작업이 몰릴 때는 건너뛰고 다음 로그인 때 다시 시도한다.
+        return False
+    finally:
+        close_old_connections()
+
+
+def schedule_rehash_if_needed(
+    user_id: int, password: str, encoded: str, using: str | None = None
+) -> Future | None:
+    """
+    저장된 해시가 현재 해셔 설정과 다르면 응답과 별개로 백그라운드에서 다시 해싱하는 함수.\n
+    비밀번호 검증에 성공한 뒤에만 호출해야 하며, 유저를 나눠 저장한다면 using에 유저의 shard를 넘긴다.
+    같은 유저의 작업이 이미 있거나 PASSWORD_HASHING['MAX_PENDING_REHASHES']개가 쌓였다면 건너뛰고 None을 return한다.
+    재해싱은 다음 로그인 때 다시 시도하므로 건너뛰어도 된다.
+    """
+    if not password_must_update(encoded):
+        return None
+
+    key = (using, user_id)
+    max_pending = settings.PASSWORD_HASHING['MAX_PENDING_REHASHES']
+
+    with _rehash_lock:
+        if key in _pending_rehashes or len(_pending_rehashes) >= max_pending:
+            return None
+
+        _pending_rehashes.add(key)
+
+    try:
+        future = _rehash_executor.submit(_rehash_password, user_id, password, encoded, using)
+    except BaseException:
+        _finish_rehash(key)
+        raise
+
+    future.add_done_callback(lambda _: _finish_rehash(key))
+
+    return future
+
+
+def _finish_rehash(key: tuple[str | None, int]) -> None:
+    with _rehash_lock:
+        _pending_rehashes.discard(key)
+
+
+def make_password(password: str) -> str:
+    return get_hashing_backend().make_password(password)
+
+
+def check_password(password: str, encoded: str) -> bool:
+    return get_hashing_backend().check_password(password, encoded)
+
+
+async def amake_password(password: str) -> str:
+    """
+    비밀번호 해시를 해싱 백엔드에서 생성하는 코루틴.
+    """
+    return await get_hashing_backend().amake_password(password)
+
+
+async def acheck_password(password: str, encoded: str) -> bool:
+    """
+    비밀번호와 저장된 해시의 일치 여부를 해싱 백엔드에서 검사하는 코루틴.
+    """
+    return await get_hashing_backend().acheck_password(password, encoded)
@@ -0,0 +1,58 @@
+import sys
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from db.models import UserActiveType
+
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        '여러 유저의 활성화 정보를 한번에 바꾸거나 로그아웃시킨다. '
+        '유저는 ACCOUNT_BULK_CHANGES의 BATCH_SIZE명씩 UPDATE 한번으로 바꾸며, '
+        '인증 완료가 아닌 상태로 바뀐 유저와 로그아웃시킨 유저의 리프레시 토큰은 블랙리스트에 bulk insert로 올린다.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--active-type', choices=[active_type.name for active_type in UserActiveType.TYPES],
+            help='바꿀 활성화 정보. 지정하지 않으면 로그아웃만 시킨다.'
+        )
+        parser.add_argument(
+            '--email', action='append', default=[],
+            help='대상 유저의 이메일. 여러번 지정할 수 있다.'
+        )
+        parser.add_argument(
+            '--emails-file',
+            help='대상 유저의 이메일을 한 줄에 하나씩 적은 파일. -라면 표준 입력에서 읽는다.'
+        )
+
+    def handle(self, *args, **options):
+        emails = list(options['email'])
+
+        if options['emails_file'] == '-':
+            emails += [line.strip() for line in sys.stdin if line.strip()]
+        elif options['emails_file']:
+            with open(options['emails_file']) as f:
+                emails += [line.strip() for line in f if line.strip()]
+
+        if not emails:
+            raise CommandError('no emails given; use --email or --emails-file')
+
+        started = time.perf_counter()
+
+        if options['active_type']:
+            result = User.objects.change_active_type(emails, UserActiveType.TYPES[options['active_type']].value)
+        else:
+            result = {'revoked_tokens': User.objects.logout(emails)}
+
+        self.stdout.write(f'requested users: {len(emails)}')
+
+        for key, count in result.items():
+            self.stdout.write(f"{key.replace('_', ' ')}: {count}")
+
+        self.stdout.write(f'elapsed: {time.perf_counter() - started:.2f}s')
@@ -0,0 +1,71 @@
+import json
+import sys
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        '서비스 계정이나 부하 테스트용 계정의 토큰을 비밀번호 확인 없이 한번에 발급해 NDJSON으로 출력한다. '
+        '유저는 TOKEN_BATCH_ISSUANCE의 BATCH_SIZE명씩 한번에 조회하고 토큰 기록은 bulk insert로 저장한다.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user-id', type=int, action='append', default=[],
+            help='토큰을 발급할 유저 id. 여러번 지정할 수 있다.'
+        )
+        parser.add_argument(
+            '--user-ids-file',
+            help='토큰을 발급할 유저 id를 한 줄에 하나씩 적은 파일. -라면 표준 입력에서 읽는다.'
+        )
+        parser.add_argument(
+            '--database',
+            help='유저를 나눠 저장할 때 유저가 저장된 데이터베이스 alias.'
+        )
+        parser.add_argument(
+            '--output',
+            help='NDJSON을 저장할 파일. 지정하지 않으면 표준 출력에 쓴다.'
+        )
+
+    def handle(self, *args, **options):
+        user_ids = list(options['user_id'])
+
+        if options['user_ids_file'] == '-':
+            user_ids += [int(line) for line in sys.stdin if line.strip()]
+        elif options['user_ids_file']:
+            with open(options['user_ids_file']) as f:
+                user_ids += [int(line) for line in f if line.strip()]
+
+        if not user_ids:
+            raise CommandError('no user ids given; use --user-id or --user-ids-file')
+
+        if options['database'] and options['database'] not in connections.databases:
+            raise CommandError(f"unknown database alias: {options['database']}")
+
+        output = open(options['output'], 'w') if options['output'] else self.stdout
+        started = time.perf_counter()
+        issued_count = 0
+
+        try:
+            for user_id, tokens in User.objects.db_manager(options['database']).issue_tokens(user_ids):
+                if tokens is None:
+                    line = {'user_id': user_id, 'error': 'user does not exist or is not authenticated.'}
+                else:
+                    line = {'user_id': user_id, **tokens}
+                    issued_count += 1
+
+                output.write(json.dumps(line) + '\n')
+        finally:
+            if options['output']:
+                output.close()
+
+        self.stderr.write(
+            f'issued tokens: {issued_count}/{len(user_ids)} in {time.perf_counter() - started:.2f}s'
+        )
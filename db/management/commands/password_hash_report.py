@@ -0,0 +1,97 @@
+from collections import Counter
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import (
+    UNUSABLE_PASSWORD_PREFIX, check_password, get_hasher, identify_hasher
+)
+from django.core.management.base import BaseCommand
+
+from db.hashers import password_must_update
+from db.sharding import get_shards
+
+
+User = get_user_model()
+
+
+def describe_cost(encoded: str) -> tuple[str, str]:
+    """
+    저장된 해시의 알고리즘과 작업량을 return하는 함수.
+    """
+    if not encoded or encoded.startswith(UNUSABLE_PASSWORD_PREFIX):
+        return 'unusable', '-'
+
+    try:
+        hasher = identify_hasher(encoded)
+    except ValueError:
+        return 'unknown', '-'
+
+    try:
+        decoded = hasher.decode(encoded)
+    except Exception:
+        return hasher.algorithm, '?'
+
+    if 'iterations' in decoded:
+        return hasher.algorithm, f"iterations={decoded['iterations']}"
+
+    if 'work_factor' in decoded:
+        return hasher.algorithm, f"work_factor={decoded['work_factor']}"
+
+    if 'time_cost' in decoded:
+        return hasher.algorithm, (
+            f"t={decoded['time_cost']},m={decoded['memory_cost']},p={decoded['parallelism']}"
+        )
+
+    return hasher.algorithm, '-'
+
+
+class Command(BaseCommand):
+    help = '해싱 알고리즘과 작업량별 유저 수를 집계한다. 작업량 변경 전후의 검증 비용을 비교할 때 사용한다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--timing', action='store_true',
+            help='작업량별로 비밀번호 검증 1회에 걸리는 시간을 측정한다.'
+        )
+        parser.add_argument(
+            '--rounds', type=int, default=3,
+            help='--timing 측정 시 반복 횟수.'
+        )
+
+    def handle(self, *args, **options):
+        counts = Counter()
+        samples = {}
+        outdated = 0
+
+        for shard in get_shards():
+            passwords = User.objects.using(shard).values_list('password', flat=True)
+
+            for encoded in passwords.iterator(chunk_size=2000):
+                bucket = describe_cost(encoded)
+                counts[bucket] += 1
+                samples.setdefault(bucket, encoded)
+
+                if bucket[0] not in ('unusable', 'unknown') and password_must_update(encoded):
+                    outdated += 1
+
+        target = get_hasher('default')
+        target_cost = describe_cost(target.encode('password-hash-report', target.salt()))[1]
+
+        self.stdout.write(f'target: {target.algorithm} ({target_cost})')
+        self.stdout.write(f"{'algorithm':<24}{'cost':<28}{'users':>10}{'verify(ms)':>14}")
+
+        for (algorithm, cost), count in sorted(counts.items()):
+            verify_ms = '-'
+
+            if options['timing'] and algorithm not in ('unusable', 'unknown'):
+                # 틀린 비밀번호로 검증해도 맞는 비밀번호와 같은 작업량이 든다.
+                started = time.perf_counter()
+
+                for _ in range(options['rounds']):
+                    check_password('password-hash-report', samples[(algorithm, cost)])
+
+                verify_ms = f"{(time.perf_counter() - started) * 1000 / options['rounds']:.1f}"
+
+            self.stdout.write(f'{algorithm:<24}{cost:<28}{count:>10}{verify_ms:>14}')
+
+        self.stdout.write(f'users to rehash on next login: {outdated}')
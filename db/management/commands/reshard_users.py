@@ -0,0 +1,108 @@
+from collections import Counter
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+
+from db.sharding import get_shards, shard_for_email
+
+
+User = get_user_model()
+
+
+def copy_user(user) -> User:
+    """
+    다른 shard에 저장할 유저 사본을 만드는 함수. 기본 키는 shard마다 따로 매기므로 비워둔다.
+    """
+    return User(**{
+        field.attname: getattr(user, field.attname)
+        for field in User._meta.concrete_fields
+        if not field.primary_key
+    })
+
+
+class Command(BaseCommand):
+    help = (
+        'USER_SHARDS 기준으로 다른 shard에 있어야 하는 유저를 batch 단위로 옮긴다. '
+        'shard를 늘리거나 줄인 뒤 실행하며, 옮겨진 유저는 새 기본 키를 받으므로 다시 로그인해야 한다.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--source', action='append', default=None,
+            help='유저를 훑을 데이터베이스 alias. 여러번 지정할 수 있으며, 기본값은 USER_SHARDS 전체이다. '
+                 '더 이상 쓰지 않는 shard를 비울 때 지정한다.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='한번에 읽고 옮길 유저 수.'
+        )
+        parser.add_argument(
+            '--pause', type=float, default=0.0,
+            help='batch 사이에 쉬는 시간(초).'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='옮기지 않고 옮겨야 하는 유저 수만 집계한다.'
+        )
+
+    def handle(self, *args, **options):
+        shards = get_shards()
+        sources = options['source'] or shards
+
+        for alias in sources:
+            if alias not in connections.databases:
+                raise CommandError(f'unknown database alias: {alias}')
+
+        moved = Counter()
+
+        for source in sources:
+            cursor = 0
+
+            while True:
+                users = list(
+                    User.objects.using(source).filter(id__gt=cursor).order_by('id')[:options['batch_size']]
+                )
+
+                if not users:
+                    break
+
+                cursor = users[-1].id
+                misplaced = {}
+
+                for user in users:
+                    target = shard_for_email(user.email, shards)
+
+                    if target != source:
+                        misplaced.setdefault(target, []).append(user)
+
+                for target, target_users in misplaced.items():
+                    moved[(source, target)] += len(target_users)
+
+                    if not options['dry_run']:
+                        self.move(source, target, target_users)
+
+                if options['pause']:
+                    time.sleep(options['pause'])
+
+        for (source, target), count in sorted(moved.items()):
+            self.stdout.write(f'{source} -> {target}: {count}')
+
+        action = 'users to move' if options['dry_run'] else 'moved users'
+        self.stdout.write(f'{action}: {sum(moved.values())}')
+
+    def move(self, source: str, target: str, users: list) -> None:
+        """
+        유저를 target shard에 저장한 뒤 source shard에서 지우는 함수.\n
+        두 shard를 한 트랜잭션으로 묶을 수 없으므로 먼저 저장하고 나중에 지운다.
+        중간에 멈췄다면 다시 실행했을 때 이미 옮겨진 유저는 이메일 unique 제약으로 건너뛰고 source에서만 지운다.
+        """
+        with transaction.atomic(using=target):
+            User.objects.db_manager(target).bulk_create(
+                [copy_user(user) for user in users], ignore_conflicts=True
+            )
+
+        with transaction.atomic(using=source):
+            # source shard의 토큰 기록은 유저와의 연결이 끊기며, 그 토큰으로는 더 이상 유저를 찾을 수 없다.
+            User.objects.using(source).filter(id__in=[user.id for user in users]).delete()
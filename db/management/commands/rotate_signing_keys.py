@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from db.signing import rotate_signing_keys
+
+
+class Command(BaseCommand):
+    help = (
+        '토큰 서명 키를 교체한다. 미리 공개해 둔 next 키로 서명을 시작하고 새 next 키를 공개하며, '
+        '교체된 키는 그 키로 서명한 토큰이 모두 만료될 때까지 JWKS에 남긴다. '
+        'JWKS를 캐시한 서비스가 새 키를 받아둘 수 있도록 SIGNING_KEYS의 JWKS_MAX_AGE보다 긴 간격으로 실행한다.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--algorithm', default=settings.SIGNING_KEYS['ALGORITHM'], choices=('RS256', 'EdDSA'),
+            help='새로 만들 키의 서명 알고리즘. 기본값은 SIGNING_KEYS의 ALGORITHM이다.'
+        )
+
+    def handle(self, *args, **options):
+        # 교체된 키로 서명한 토큰 중 가장 늦게 만료되는 것은 교체 직전에 발급한 리프레시 토큰이다.
+        retire_after = max(settings.SIMPLE_JWT['ACCESS_TOKEN_LIFETIME'], settings.SIMPLE_JWT['REFRESH_TOKEN_LIFETIME'])
+        result = rotate_signing_keys(options['algorithm'], retire_after)
+
+        for action, kids in result.items():
+            for kid in kids:
+                self.stdout.write(f'{action}: {kid}')
@@ -0,0 +1,22 @@
+# Generated by Django 3.2.1 on 2026-10-18 11:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('db', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailOutbox',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('kind', models.CharField(help_text='메일 종류 (예: sign_up_verify_code)', max_length=63)),
+                ('payload', models.JSONField(help_text='메일 태스크에 넘길 데이터')),
+                ('created', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
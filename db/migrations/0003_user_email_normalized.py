@@ -0,0 +1,77 @@
+# Generated by Django 3.2.1 on 2026-10-18 15:02
+
+from django.db import migrations, models
+from django.db.models.functions import Lower, Trim
+
+
+BACKFILL_CHUNK_SIZE = 1000
+
+
+def check_duplicated_emails(apps, schema_editor):
+    """
+    대소문자나 앞뒤 공백만 다른 이메일의 유저가 있다면 스키마를 바꾸기 전에 멈춘다.\n
+    마이그레이션 전체를 하나의 트랜잭션으로 묶지 않으므로 컬럼을 추가하고 채운 뒤에 확인하면 실패해도 컬럼이 남아 다시 실행할 수 없다.
+    """
+    User = apps.get_model('db', 'User')
+    duplicated = list(
+        User.objects.using(schema_editor.connection.alias)
+        .annotate(normalized=Lower(Trim('email')))
+        .values('normalized')
+        .annotate(count=models.Count('id'))
+        .filter(count__gt=1)
+        .values_list('normalized', flat=True)
+    )
+
+    if duplicated:
+        raise RuntimeError(
+            f'users with emails differing only in case must be merged before migrating: {duplicated}'
+        )
+
+
+def backfill_email_normalized(apps, schema_editor):
+    """
+    기존 유저의 email_normalized를 기본 키 순서로 BACKFILL_CHUNK_SIZE명씩 나눠 채운다.\n
+    마이그레이션 전체를 하나의 트랜잭션으로 묶지 않으므로 chunk마다 커밋되어 테이블을 오래 잠그지 않는다.
+    """
+    User = apps.get_model('db', 'User')
+    using = schema_editor.connection.alias
+    cursor = 0
+
+    while True:
+        rows = list(
+            User.objects.using(using).filter(id__gt=cursor).order_by('id').values_list('id', 'email')[:BACKFILL_CHUNK_SIZE]
+        )
+
+        if not rows:
+            break
+
+        cursor = rows[-1][0]
+
+        User.objects.using(using).bulk_update(
+            [User(id=id, email_normalized=email.strip().lower()) for id, email in rows],
+            ['email_normalized']
+        )
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('db', '0002_emailoutbox'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicated_emails, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='user',
+            name='email_normalized',
+            field=models.CharField(help_text='조회용으로 정규화한 이메일', max_length=255, null=True),
+        ),
+        migrations.RunPython(backfill_email_normalized, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='user',
+            name='email_normalized',
+            field=models.CharField(help_text='조회용으로 정규화한 이메일', max_length=255, unique=True),
+        ),
+    ]
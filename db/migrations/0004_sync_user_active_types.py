@@ -0,0 +1,30 @@
+# Generated by Django 3.2.1 on 2026-10-18 16:20
+
+from django.db import migrations
+
+
+# 0001_initial의 데이터 마이그레이션은 행을 만들지 못하므로, 외래 키 무결성을 위해 UserActiveType.TYPES와 같은 행을 채운다.
+USER_ACTIVE_TYPES = (
+    (1, 'DEACTIVE', '이메일 인증 전 유저'),
+    (2, 'ACTIVE', '이메일 인증을 마친 유저'),
+    (3, 'SECESSION', '탈퇴한 유저'),
+)
+
+
+def sync_user_active_types(apps, schema_editor):
+    UserActiveType = apps.get_model('db', 'UserActiveType')
+    using = schema_editor.connection.alias
+
+    for id, name, description in USER_ACTIVE_TYPES:
+        UserActiveType.objects.using(using).update_or_create(id=id, defaults={'name': name, 'description': description})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('db', '0003_user_email_normalized'),
+    ]
+
+    operations = [
+        migrations.RunPython(sync_user_active_types, migrations.RunPython.noop),
+    ]
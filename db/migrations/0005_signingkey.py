@@ -0,0 +1,31 @@
+# Generated by Django 3.2.1 on 2026-10-18 19:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('db', '0004_sync_user_active_types'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SigningKey',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('kid', models.CharField(help_text='JWT 헤더와 JWKS의 키 id', max_length=64, unique=True)),
+                ('algorithm', models.CharField(help_text='서명 알고리즘 (예: RS256, EdDSA)', max_length=15)),
+                ('private_key', models.TextField(help_text='SECRET_KEY로 암호화한 PKCS8 PEM 개인 키')),
+                ('public_key', models.TextField(help_text='PEM 공개 키')),
+                ('status', models.CharField(choices=[('next', '다음에 서명할 키'), ('current', '지금 서명하는 키'), ('retired', '서명하지 않지만 검증을 위해 공개하는 키')], help_text='키 상태', max_length=15)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('activated', models.DateTimeField(help_text='서명을 시작한 시각', null=True)),
+                ('expires', models.DateTimeField(help_text='JWKS에서 내릴 시각', null=True)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='signingkey',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'current')), fields=('status',), name='unique_current_signing_key'),
+        ),
+    ]
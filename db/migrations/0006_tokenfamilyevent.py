@@ -0,0 +1,25 @@
+# Generated by Django 3.2.1 on 2026-10-18 21:12
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('db', '0005_signingkey'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TokenFamilyEvent',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('family', models.CharField(db_index=True, help_text='처음 발급된 리프레시 토큰의 jti', max_length=255)),
+                ('user_id', models.BigIntegerField(db_index=True, help_text='토큰의 유저 id')),
+                ('jti', models.CharField(help_text='요청에 쓰인 리프레시 토큰의 jti', max_length=255)),
+                ('event', models.CharField(choices=[('rotated', '리프레시 토큰 교체'), ('reused', '이미 교체된 리프레시 토큰 재사용 (family 폐기)'), ('revoked', '폐기된 family의 리프레시 토큰 사용')], help_text='기록 종류', max_length=15)),
+                ('created', models.DateTimeField(default=django.utils.timezone.now, help_text='요청 시각 (저장 시각이 아님)')),
+            ],
+        ),
+    ]
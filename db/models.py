@@ -1,20 +1,35 @@
-from datetime import datetime, timedelta
-import random
-import string
+from types import MappingProxyType
+from typing import Iterator, NamedTuple
 
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib.auth.models import (
     AbstractBaseUser, BaseUserManager, User
 )
-from django.db import models
+from django.db import models, router
+from django.utils import timezone
 from django.core.exceptions import PermissionDenied
-from rest_framework_simplejwt.tokens import RefreshToken
+
+from db.emails import normalize_email
+from db.hashers import (
+    amake_password, check_password, make_password, schedule_rehash_if_needed
+)
+from db.sharding import group_by_shard, is_sharded, shard_for_email, shard_of
+from db.tokens import issue_tokens, issue_tokens_in_bulk, revoke_refresh_tokens
+from db.verification import get_verification_code_store
+
+
+class ActiveTypeInfo(NamedTuple):
+    id: int
+    name: str
+    description: str
 
 
 class UserActiveType(models.Model):
     class TYPES(models.IntegerChoices):
-        DEACTIVE = 1
-        ACTIVE = 2
-        SECESSION = 3
+        DEACTIVE = 1, '이메일 인증 전 유저'
+        ACTIVE = 2, '이메일 인증을 마친 유저'
+        SECESSION = 3, '탈퇴한 유저'
 
     id = models.AutoField(primary_key=True)
     name = models.CharField(max_length=255, help_text='권한명')
@@ -23,6 +38,21 @@ class UserActiveType(models.Model):
     def __str__(self):
         return self.name
 
+    @staticmethod
+    def get_info(active_type_id: int) -> ActiveTypeInfo:
+        """
+        DB를 조회하지 않고 프로세스 내 레지스트리에서 활성화 정보를 return하는 함수.
+        """
+        return ACTIVE_TYPES[active_type_id]
+
+
+# TYPES로 만든 변경할 수 없는 활성화 정보 레지스트리.
+# 테이블은 외래 키 무결성을 위해서만 두고, 이름과 설명은 항상 여기서 읽는다.
+ACTIVE_TYPES = MappingProxyType({
+    active_type.value: ActiveTypeInfo(active_type.value, active_type.name, active_type.label)
+    for active_type in UserActiveType.TYPES
+})
+
 
 class UserManager(BaseUserManager):
     def create_user(
@@ -35,19 +65,184 @@ class UserManager(BaseUserManager):
         """
         유저를 생성하는 함수.
         """
-        verify_code = ''.join(random.choices(string.digits, k=6))
+        return self.create_user_with_encoded_password(
+            username=username,
+            email=email,
+            encoded_password=make_password(password),
+            nickname=nickname
+        )
+
+    async def acreate_user(
+        self, 
+        username: str, 
+        email: str, 
+        password: str, 
+        nickname: str | None = None
+    ) -> User:
+        """
+        유저를 생성하는 코루틴.\n
+        비밀번호 해싱은 해싱 전용 executor에서, DB 저장은 sync_to_async로 처리한다.
+        """
+        encoded_password = await amake_password(password)
+
+        return await sync_to_async(self.create_user_with_encoded_password)(
+            username=username,
+            email=email,
+            encoded_password=encoded_password,
+            nickname=nickname
+        )
+
+    def create_user_with_encoded_password(
+        self, 
+        username: str, 
+        email: str, 
+        encoded_password: str, 
+        nickname: str | None = None
+    ) -> User:
+        """
+        이미 해싱된 비밀번호로 유저를 생성하는 함수.
+        """
         user = self.model(
             username=username,
             email=email,
             nickname=nickname,
-            verify_code=verify_code
+            password=encoded_password
         )
 
-        user.set_password(password)
-        user.save(using=self._db)
+        user.save(using=self._db or shard_for_email(email))
+
+        # 인증 코드는 유저 테이블이 아닌 인증 코드 저장소에 두고, 응답과 메일에 쓰도록 인스턴스에만 담는다.
+        user.verify_code = get_verification_code_store().issue(email)
 
         return user
 
+    def for_email(self, email: str) -> 'UserManager':
+        """
+        유저를 나눠 저장할 때 이메일의 유저가 있는 shard를 쓰는 매니저를 return하는 함수.\n
+        나누지 않을 때는 그대로 return해 데이터베이스 라우터가 정하게 한다.
+        """
+        if self._db or not is_sharded():
+            return self
+
+        return self.db_manager(shard_for_email(email))
+
+    def get_by_natural_key(self, email: str) -> User:
+        return self.get_by_email(email)
+
+    def get_by_email(self, email: str) -> User:
+        """
+        정규화한 이메일의 unique 인덱스로 유저를 한번에 조회하는 함수.
+        """
+        return self.for_email(email).get(email_normalized=normalize_email(email))
+
+    def activate(self, email: str) -> int:
+        """
+        미인증 유저를 조건부 UPDATE 한번으로 인증 상태로 바꾸는 함수.\n
+        바뀐 row 수를 return하며, 0이라면 유저가 없거나 이미 인증된 것이다.
+        """
+        return self.for_email(email).filter(
+            email_normalized=normalize_email(email),
+            active_type_id=UserActiveType.TYPES.DEACTIVE.value
+        ).update(active_type_id=UserActiveType.TYPES.ACTIVE.value, verify_code=None)
+
+    def verify_email(self, email: str, verify_code: str) -> int:
+        """
+        verify_code 컬럼에 인증 코드가 저장된 이전 유저를 조건부 UPDATE 한번으로 인증 상태로 바꾸는 함수.\n
+        바뀐 row 수를 return하며, 0이라면 유저가 없거나 이미 인증되었거나 인증 코드가 틀린 것이다.
+        """
+        return self.for_email(email).filter(
+            email_normalized=normalize_email(email),
+            verify_code=verify_code,
+            active_type_id=UserActiveType.TYPES.DEACTIVE.value
+        ).update(active_type_id=UserActiveType.TYPES.ACTIVE.value, verify_code=None)
+
+    def verify_emails(self, emails: list[str]) -> int:
+        """
+        여러 미인증 유저를 인증 코드 없이 조건부 UPDATE 한번으로 인증 상태로 바꾸는 함수.\n
+        바뀐 row 수를 return하며, 남아있는 인증 코드는 지운다.
+        """
+        verified_count = 0
+
+        for shard, shard_emails in group_by_shard(emails).items():
+            manager = self if self._db or not is_sharded() else self.db_manager(shard)
+            verified_count += manager.filter(
+                email_normalized__in=[normalize_email(email) for email in shard_emails],
+                active_type_id=UserActiveType.TYPES.DEACTIVE.value
+            ).update(active_type_id=UserActiveType.TYPES.ACTIVE.value, verify_code=None)
+
+        get_verification_code_store().discard(emails)
+
+        return verified_count
+
+    def change_active_type(self, emails: list[str], active_type_id: int) -> dict[str, int]:
+        """
+        여러 유저의 활성화 정보를 batch마다 UPDATE 한번으로 바꾸고 바뀐 유저 수와 블랙리스트에 올린 토큰 수를 return하는 함수.\n
+        이미 같은 상태인 유저는 건너뛰며, 인증 상태가 아닌 상태로 바뀐 유저의 리프레시 토큰은 블랙리스트에 올린다.
+        """
+        result = {'updated': 0, 'revoked_tokens': 0}
+        batch_size = settings.ACCOUNT_BULK_CHANGES['BATCH_SIZE']
+
+        for using, emails_normalized in self._batches(emails, batch_size):
+            user_ids = list(
+                self.db_manager(using).filter(email_normalized__in=emails_normalized)
+                .exclude(active_type_id=active_type_id)
+                .values_list('id', flat=True)
+            )
+
+            if not user_ids:
+                continue
+
+            result['updated'] += self.db_manager(using).filter(id__in=user_ids).update(active_type_id=active_type_id)
+
+            if active_type_id != UserActiveType.TYPES.ACTIVE.value:
+                result['revoked_tokens'] += revoke_refresh_tokens(user_ids, using=using, batch_size=batch_size)
+
+        return result
+
+    def logout(self, emails: list[str]) -> int:
+        """
+        여러 유저의 리프레시 토큰을 batch마다 한번에 블랙리스트에 올리고 올린 토큰 수를 return하는 함수.
+        """
+        revoked_count = 0
+        batch_size = settings.ACCOUNT_BULK_CHANGES['BATCH_SIZE']
+
+        for using, emails_normalized in self._batches(emails, batch_size):
+            user_ids = list(
+                self.db_manager(using).filter(email_normalized__in=emails_normalized).values_list('id', flat=True)
+            )
+            revoked_count += revoke_refresh_tokens(user_ids, using=using, batch_size=batch_size)
+
+        return revoked_count
+
+    def issue_tokens(self, user_ids: list[int]) -> Iterator[tuple[int, dict[str, str] | None]]:
+        """
+        여러 유저의 토큰을 비밀번호 확인 없이 발급해 요청한 순서대로 (유저 id, 토큰)을 yield하는 함수.\n
+        batch마다 유저를 한번에 조회하고 OutstandingToken 기록을 bulk insert 한번으로 저장한다.
+        없거나 인증을 마치지 않은 유저의 토큰은 None이다.
+        유저를 나눠 저장한다면 유저 id는 shard마다 따로 매기므로 db_manager로 shard를 지정해야 한다.
+        """
+        batch_size = settings.TOKEN_BATCH_ISSUANCE['BATCH_SIZE']
+
+        for start in range(0, len(user_ids), batch_size):
+            batch = user_ids[start:start + batch_size]
+            users = self.filter(id__in=batch, active_type_id=UserActiveType.TYPES.ACTIVE.value)
+            issued = issue_tokens_in_bulk(list(users))
+
+            for user_id in batch:
+                yield user_id, issued.get(user_id)
+
+    def _batches(self, emails: list[str], batch_size: int):
+        """
+        유저가 저장된 데이터베이스 alias와 정규화한 이메일 batch_size개씩을 yield하는 함수.\n
+        바로 UPDATE할 유저를 읽으므로 replica가 아닌 쓰기 데이터베이스에서 읽는다.
+        """
+        for shard, shard_emails in group_by_shard(emails).items():
+            using = self._db or (shard if is_sharded() else router.db_for_write(self.model))
+            emails_normalized = [normalize_email(email) for email in shard_emails]
+
+            for start in range(0, len(emails_normalized), batch_size):
+                yield using, emails_normalized[start:start + batch_size]
+
     def create_superuser(
         self, 
         email: str, 
@@ -66,8 +261,8 @@ class UserManager(BaseUserManager):
         )
 
         user.is_staff = True
-        user.active_type = UserActiveType.objects.get(id=2)
-        user.save(using=self._db)
+        user.active_type_id = UserActiveType.TYPES.ACTIVE.value
+        user.save(using=user._state.db, update_fields=('is_staff', 'active_type'))
 
         return user
 
@@ -75,6 +270,7 @@ class UserManager(BaseUserManager):
 class User(AbstractBaseUser):
     id = models.BigAutoField(primary_key=True)
     email = models.CharField(max_length=255, unique=True, help_text='이메일')
+    email_normalized = models.CharField(max_length=255, unique=True, help_text='조회용으로 정규화한 이메일')
     username = models.CharField(max_length=255, help_text='사용자 이름')
     nickname = models.CharField(max_length=255, null=True, help_text='사용자 별명')
     active_type = models.ForeignKey(UserActiveType, default=1, on_delete=models.DO_NOTHING, help_text='사용자 활성화 여부')
@@ -87,6 +283,39 @@ class User(AbstractBaseUser):
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username']
 
+    @property
+    def active_type_info(self) -> ActiveTypeInfo:
+        return UserActiveType.get_info(self.active_type_id)
+
+    def save(self, *args, **kwargs):
+        self.email_normalized = normalize_email(self.email)
+
+        update_fields = kwargs.get('update_fields')
+
+        if update_fields is not None and 'email' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'email_normalized'}
+
+        super().save(*args, **kwargs)
+
+    def set_password(self, raw_password: str | None) -> None:
+        """
+        비밀번호를 해싱 백엔드에서 해싱해 저장하는 함수.
+        """
+        self.password = make_password(raw_password)
+        self._password = raw_password
+
+    def check_password(self, raw_password: str) -> bool:
+        """
+        비밀번호를 해싱 백엔드에서 검증하는 함수.\n
+        일치하지만 해시가 현재 해셔 설정과 다르면 백그라운드에서 새로 해싱해 저장한다.
+        """
+        is_correct = check_password(raw_password, self.password)
+
+        if is_correct:
+            schedule_rehash_if_needed(self.id, raw_password, self.password, using=shard_of(self))
+
+        return is_correct
+
     def has_perm(self, perm, obj=None):
         return True
 
@@ -98,19 +327,68 @@ class User(AbstractBaseUser):
         유저 정보를 받아 엑세스 토큰 및 리프레시 토큰을 return하는 함수.
         """
         if self.active_type_id == UserActiveType.TYPES.ACTIVE.value:
-            token = RefreshToken.for_user(self)
-
-            data = {
-                'access_token': str(token.access_token),
-                'access_token_expiration': datetime.fromtimestamp(
-                    token.access_token.payload.get('exp')
-                ).isoformat(),
-                'refresh_token': str(token),
-                'refresh_token_expiration': datetime.fromtimestamp(
-                    token.payload.get('exp')
-                ).isoformat()
-            }
-
-            return data
+            return issue_tokens(self)
         else:
-            raise PermissionDenied('this user is not authenticated.')
\ No newline at end of file
+            raise PermissionDenied('this user is not authenticated.')
+
+
+class EmailOutbox(models.Model):
+    id = models.BigAutoField(primary_key=True)
+    kind = models.CharField(max_length=63, help_text='메일 종류 (예: sign_up_verify_code)')
+    payload = models.JSONField(help_text='메일 태스크에 넘길 데이터')
+    created = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.kind} #{self.id}'
+
+
+class SigningKey(models.Model):
+    """
+    토큰 서명 키. 개인 키는 SECRET_KEY로 암호화한 PEM으로 저장한다.\n
+    next 키는 JWKS에 먼저 공개해 두었다가 다음 교체 때 current가 되며,
+    교체된 current 키는 그 키로 서명한 토큰이 모두 만료될 때(expires)까지 retired로 공개한다. (db.signing)
+    """
+    class Status(models.TextChoices):
+        NEXT = 'next', '다음에 서명할 키'
+        CURRENT = 'current', '지금 서명하는 키'
+        RETIRED = 'retired', '서명하지 않지만 검증을 위해 공개하는 키'
+
+    id = models.BigAutoField(primary_key=True)
+    kid = models.CharField(max_length=64, unique=True, help_text='JWT 헤더와 JWKS의 키 id')
+    algorithm = models.CharField(max_length=15, help_text='서명 알고리즘 (예: RS256, EdDSA)')
+    private_key = models.TextField(help_text='SECRET_KEY로 암호화한 PKCS8 PEM 개인 키')
+    public_key = models.TextField(help_text='PEM 공개 키')
+    status = models.CharField(max_length=15, choices=Status.choices, help_text='키 상태')
+    created = models.DateTimeField(auto_now_add=True)
+    activated = models.DateTimeField(null=True, help_text='서명을 시작한 시각')
+    expires = models.DateTimeField(null=True, help_text='JWKS에서 내릴 시각')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['status'], condition=models.Q(status='current'), name='unique_current_signing_key'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.kid} ({self.status})'
+
+
+class TokenFamilyEvent(models.Model):
+    """
+    리프레시 토큰 family의 감사 기록. 토큰 재발급 요청 중에는 저장하지 않고 모아서 저장한다. (db.families)
+    """
+    class Event(models.TextChoices):
+        ROTATED = 'rotated', '리프레시 토큰 교체'
+        REUSED = 'reused', '이미 교체된 리프레시 토큰 재사용 (family 폐기)'
+        REVOKED = 'revoked', '폐기된 family의 리프레시 토큰 사용'
+
+    id = models.BigAutoField(primary_key=True)
+    family = models.CharField(max_length=255, db_index=True, help_text='처음 발급된 리프레시 토큰의 jti')
+    user_id = models.BigIntegerField(db_index=True, help_text='토큰의 유저 id')
+    jti = models.CharField(max_length=255, help_text='요청에 쓰인 리프레시 토큰의 jti')
+    event = models.CharField(max_length=15, choices=Event.choices, help_text='기록 종류')
+    created = models.DateTimeField(default=timezone.now, help_text='요청 시각 (저장 시각이 아님)')
+
+    def __str__(self):
+        return f'{self.family} {self.event}'
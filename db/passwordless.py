@@ -0,0 +1,149 @@
+import hmac
+import secrets
+import threading
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import caches
+from django.utils.crypto import salted_hmac
+
+from db.emails import normalize_email
+from db.verification import CodeCheck
+
+
+class PasswordlessLoginStore:
+    """
+    비밀번호 없이 로그인할 때 쓰는 일회용 링크 토큰과 코드를 발급하고 확인하는 저장소.\n
+    링크 토큰은 정규화한 이메일과 nonce에 SECRET_KEY로 서명(HMAC)한 값이고, 코드는 nonce의 HMAC에서 뽑은 숫자다.
+    issue는 nonce만 return하므로 메일 대기열(EmailOutbox, spool)에는 링크와 코드가 남지 않으며, 메일은 render로 만든다.
+    캐시에는 nonce만 ttl초 동안 저장하며, 링크나 코드로 로그인하면 nonce를 지워 둘 중 하나로 한번만 쓸 수 있게 한다.
+    링크는 서명 확인과 cache.delete 한번으로 확인하므로 비밀번호 해싱 같은 키 유도 함수를 쓰지 않는다.
+    코드는 max_attempts번 넘게 틀리면 더 이상 확인할 수 없으며, 새로 발급하면 이전 링크와 코드는 쓸 수 없다.
+    """
+    salt = 'db.passwordless.PasswordlessLoginStore'
+
+    def __init__(
+        self,
+        cache_alias: str,
+        key_prefix: str,
+        ttl: int,
+        max_attempts: int,
+        length: int,
+        reissue_interval: int
+    ):
+        self.cache = caches[cache_alias]
+        self.key_prefix = key_prefix
+        self.ttl = ttl
+        self.max_attempts = max_attempts
+        self.length = length
+        self.reissue_interval = reissue_interval
+
+        self.signer = signing.TimestampSigner(salt=self.salt, algorithm='sha256')
+
+    def _key(self, kind: str, value: str) -> str:
+        return f'{self.key_prefix}:{kind}:{value}'
+
+    def code_for(self, nonce: str) -> str:
+        digest = salted_hmac(self.salt, nonce, algorithm='sha256').digest()
+
+        return str(int.from_bytes(digest[:8], 'big') % 10 ** self.length).zfill(self.length)
+
+    def issue(self, email: str) -> str | None:
+        """
+        새 nonce를 발급해 return하는 함수. 이전에 발급한 링크와 코드는 더 이상 쓸 수 없다.\n
+        reissue_interval초 안에 발급한 적이 있다면 None을 return한다.
+        """
+        email = normalize_email(email)
+
+        if not self.cache.add(self._key('issued', email), 1, timeout=self.reissue_interval):
+            return None
+
+        previous_nonce = self.cache.get(self._key('nonce', email))
+        nonce = secrets.token_urlsafe(16)
+
+        if previous_nonce is not None:
+            self.cache.delete(self._key('login', previous_nonce))
+
+        self.cache.set_many(
+            {
+                self._key('login', nonce): email,
+                self._key('nonce', email): nonce,
+                self._key('attempts', email): 0,
+            },
+            timeout=self.ttl
+        )
+
+        return nonce
+
+    def render(self, email: str, nonce: str) -> tuple[str, str]:
+        """
+        issue로 발급한 nonce의 (링크 토큰, 코드)를 return하는 함수.
+        """
+        return self.signer.sign(f'{normalize_email(email)}:{nonce}'), self.code_for(nonce)
+
+    def check_link(self, token: str) -> tuple[CodeCheck, str | None]:
+        """
+        링크 토큰을 확인하고 (결과, 정규화한 이메일)을 return하는 함수. 맞으면 nonce를 지운다.
+        """
+        try:
+            email, nonce = self.signer.unsign(token, max_age=self.ttl).rsplit(':', 1)
+        except (signing.BadSignature, ValueError):
+            return CodeCheck.INVALID, None
+
+        if not self.cache.delete(self._key('login', nonce)):
+            return CodeCheck.MISSING, email
+
+        return CodeCheck.VALID, email
+
+    def check_code(self, email: str, code: str) -> CodeCheck:
+        """
+        이메일로 보낸 코드를 확인하는 함수. 맞으면 nonce를 지운다.
+        """
+        email = normalize_email(email)
+
+        try:
+            attempts = self.cache.incr(self._key('attempts', email))
+        except ValueError:
+            return CodeCheck.MISSING
+
+        if attempts > self.max_attempts:
+            return CodeCheck.LOCKED
+
+        nonce = self.cache.get(self._key('nonce', email))
+
+        if nonce is None:
+            return CodeCheck.MISSING
+
+        if not hmac.compare_digest(self.code_for(nonce), code):
+            return CodeCheck.INVALID
+
+        if not self.cache.delete(self._key('login', nonce)):
+            # 링크로 먼저 로그인했거나 동시에 들어온 다른 요청이 먼저 썼다.
+            return CodeCheck.MISSING
+
+        return CodeCheck.VALID
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_passwordless_login_store() -> PasswordlessLoginStore:
+    """
+    PASSWORDLESS_LOGIN 설정으로 만든 저장소를 return하는 함수.
+    """
+    global _store
+
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                config = settings.PASSWORDLESS_LOGIN
+                _store = PasswordlessLoginStore(
+                    ttl=config['TTL'],
+                    max_attempts=config['MAX_ATTEMPTS'],
+                    length=config['LENGTH'],
+                    reissue_interval=config['REISSUE_INTERVAL'],
+                    **config['OPTIONS']
+                )
+
+    return _store
@@ -0,0 +1,151 @@
+from contextvars import ContextVar
+from itertools import count
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+
+from db.sharding import is_sharded, shard_for_email
+
+
+logger = logging.getLogger(__name__)
+
+# 요청마다 만드는 상태. pinned면 읽기도 primary로 보내고, 요청 중 라우팅 대상 모델에 쓰면 wrote가 된다.
+_request_state = ContextVar('replica_request_state', default=None)
+
+
+def ping(alias: str) -> None:
+    with connections[alias].cursor() as cursor:
+        cursor.execute('SELECT 1')
+
+
+class ReplicaRouter:
+    """
+    models에 속한 모델의 읽기를 replica들에 돌아가며 보내는 데이터베이스 라우터.\n
+    replica는 check_interval초마다 연결을 확인하며, 실패하면 retry_interval초 동안 제외한다.
+    사용할 수 있는 replica가 없거나, 요청이 primary에 고정되어 있다면 primary(default)에서 읽는다.
+    """
+    def __init__(
+        self,
+        replicas: list[str] | None = None,
+        models: list[str] | None = None,
+        check_interval: float | None = None,
+        retry_interval: float | None = None,
+        health_check=ping
+    ):
+        config = getattr(settings, 'DATABASE_REPLICAS', {})
+
+        self.replicas = replicas if replicas is not None else config.get('ALIASES', [])
+        self.models = set(models if models is not None else config.get('MODELS', []))
+        self.check_interval = check_interval if check_interval is not None else config.get('CHECK_INTERVAL', 5.0)
+        self.retry_interval = retry_interval if retry_interval is not None else config.get('RETRY_INTERVAL', 30.0)
+        self.health_check = health_check
+
+        self._lock = threading.Lock()
+        self._counter = count()
+        self._checked_at = {}
+        self._down_until = {}
+
+    def db_for_read(self, model, **hints):
+        if model._meta.label_lower not in self.models:
+            return None
+
+        state = _request_state.get()
+
+        if state is not None and (state['pinned'] or state['wrote']):
+            return 'default'
+
+        for _ in range(len(self.replicas)):
+            replica = self.replicas[next(self._counter) % len(self.replicas)]
+
+            if self.is_healthy(replica):
+                return replica
+
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+
+        if state is not None and model._meta.label_lower in self.models:
+            state['wrote'] = True
+
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def is_healthy(self, alias: str) -> bool:
+        now = time.monotonic()
+
+        if now < self._down_until.get(alias, 0.0):
+            return False
+
+        if now - self._checked_at.get(alias, float('-inf')) < self.check_interval:
+            return True
+
+        with self._lock:
+            if now - self._checked_at.get(alias, float('-inf')) < self.check_interval:
+                return True
+
+            try:
+                self.health_check(alias)
+            except Exception as e:
+                logger.warning(f'replica {alias} is unavailable for {self.retry_interval}s: {e}')
+                self.mark_unhealthy(alias)
+                return False
+
+            self._checked_at[alias] = now
+
+        return True
+
+    def mark_unhealthy(self, alias: str) -> None:
+        self._down_until[alias] = time.monotonic() + self.retry_interval
+        self._checked_at.pop(alias, None)
+
+
+class ReplicaPinningMiddleware:
+    """
+    read-your-writes를 위한 미들웨어.\n
+    요청이 라우팅 대상 모델에 썼다면 STICKY_SECONDS초 동안 유지되는 쿠키를 내려주고,
+    쿠키가 남아있는 동안 같은 클라이언트의 읽기는 primary로 보낸다.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.cookie_name = settings.DATABASE_REPLICAS['COOKIE_NAME']
+        self.sticky_seconds = settings.DATABASE_REPLICAS['STICKY_SECONDS']
+
+    def __call__(self, request):
+        state = {'pinned': self.cookie_name in request.COOKIES, 'wrote': False}
+        token = _request_state.set(state)
+
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_state.reset(token)
+
+        if state['wrote']:
+            response.set_cookie(self.cookie_name, '1', max_age=self.sticky_seconds, httponly=True, samesite='Lax')
+
+        return response
+
+
+class ShardRouter:
+    """
+    새로 저장하는 유저를 정규화한 이메일의 해시로 정한 shard에 쓰는 데이터베이스 라우터.\n
+    조회한 유저와 그 유저에 딸린 객체는 유저가 읽힌 shard를 그대로 쓴다. (Django 기본 동작)
+    hint가 없는 조회와 일괄 UPDATE는 UserManager.for_email처럼 shard를 직접 지정해야 한다.
+    """
+    def db_for_write(self, model, **hints):
+        instance = hints.get('instance')
+
+        if (
+            is_sharded()
+            and model._meta.label_lower == 'db.user'
+            and instance is not None
+            and instance._state.db is None
+        ):
+            return shard_for_email(instance.email)
+
+        return None
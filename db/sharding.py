@@ -0,0 +1,48 @@
+from hashlib import blake2b
+
+from django.conf import settings
+
+from db.emails import normalize_email
+
+
+# 토큰에 유저가 저장된 shard를 담는 claim 이름.
+SHARD_CLAIM = 'shard'
+
+
+def get_shards() -> list[str]:
+    """
+    유저를 나눠 저장하는 데이터베이스 alias 목록을 return하는 함수. 첫번째 shard는 default여야 한다.
+    """
+    return settings.USER_SHARDS
+
+
+def is_sharded() -> bool:
+    return len(get_shards()) > 1
+
+
+def shard_for_email(email: str, shards: list[str] | None = None) -> str:
+    """
+    정규화한 이메일의 해시로 유저가 저장될 shard를 return하는 함수.\n
+    프로세스나 실행 환경이 달라도 같은 값이 나오도록 파이썬 hash() 대신 blake2b를 쓴다.
+    """
+    shards = shards or get_shards()
+    digest = blake2b(normalize_email(email).encode(), digest_size=8).digest()
+
+    return shards[int.from_bytes(digest, 'big') % len(shards)]
+
+
+def shard_of(instance) -> str | None:
+    """
+    유저를 나눠 저장할 때만 instance가 저장된 shard를 return하는 함수.\n
+    나누지 않을 때는 None을 return해 데이터베이스 라우터가 정하게 한다.
+    """
+    return instance._state.db if is_sharded() else None
+
+
+def group_by_shard(emails: list[str]) -> dict[str, list[str]]:
+    groups = {}
+
+    for email in emails:
+        groups.setdefault(shard_for_email(email), []).append(email)
+
+    return groups
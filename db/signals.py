@@ -0,0 +1,38 @@
+from django.core.signals import request_finished, request_started
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from db.blacklist import blacklist_index
+from db.connections import connection_limiter
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def add_blacklisted_token_to_index(sender, instance, created, **kwargs):
+    """
+    이 프로세스에서 블랙리스트에 추가된 토큰을 블랙리스트 인덱스에 바로 반영한다.
+    """
+    if created:
+        blacklist_index.add(instance.token.jti)
+
+
+@receiver(connection_created)
+def count_created_connection(sender, connection, **kwargs):
+    connection_limiter.connection_created(connection)
+
+
+@receiver(request_started)
+def check_persistent_connections(sender, **kwargs):
+    """
+    Django의 close_old_connections 다음에 호출되어, 남은 유지 연결이 끊기지 않았는지 확인한다.
+    """
+    connection_limiter.request_started()
+
+
+@receiver(request_finished)
+def limit_persistent_connections(sender, **kwargs):
+    """
+    Django의 close_old_connections 다음에 호출되어, 워커마다 유지하는 연결 수를 제한한다.
+    """
+    connection_limiter.request_finished()
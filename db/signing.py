@@ -0,0 +1,332 @@
+from base64 import urlsafe_b64encode
+from datetime import timedelta
+from hashlib import sha256
+from typing import NamedTuple
+import json
+import threading
+import time
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+import jwt
+from jwt.algorithms import OKPAlgorithm, RSAAlgorithm
+from jwt.exceptions import InvalidAlgorithmError, InvalidTokenError
+from rest_framework_simplejwt.backends import TokenBackend
+from rest_framework_simplejwt.exceptions import TokenBackendError
+from rest_framework_simplejwt.settings import api_settings
+
+from db.models import SigningKey
+
+
+# 지원하는 비대칭 서명 알고리즘별 JWK 변환기.
+JWK_ALGORITHMS = {
+    'RS256': RSAAlgorithm,
+    'EdDSA': OKPAlgorithm,
+}
+
+
+class LoadedKey(NamedTuple):
+    kid: str
+    algorithm: str
+    status: str
+    public_key: object
+    encrypted_private_key: str
+
+
+def generate_signing_key(algorithm: str, status: str) -> SigningKey:
+    """
+    새 서명 키를 만들어 저장하지 않은 SigningKey로 return하는 함수.\n
+    kid는 공개 키 DER의 sha256으로 정하므로 같은 키는 어느 환경에서나 같은 kid를 가진다.
+    """
+    if algorithm == 'RS256':
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    elif algorithm == 'EdDSA':
+        private_key = ed25519.Ed25519PrivateKey.generate()
+    else:
+        raise ValueError(f'unsupported signing algorithm: {algorithm}')
+
+    public_key = private_key.public_key()
+    public_der = public_key.public_bytes(
+        serialization.Encoding.DER, serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+
+    return SigningKey(
+        kid=urlsafe_b64encode(sha256(public_der).digest()[:16]).rstrip(b'=').decode(),
+        algorithm=algorithm,
+        private_key=private_key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.BestAvailableEncryption(settings.SECRET_KEY.encode())
+        ).decode(),
+        public_key=public_key.public_bytes(
+            serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+        ).decode(),
+        status=status
+    )
+
+
+def rotate_signing_keys(algorithm: str, retire_after: timedelta) -> dict[str, list[str]]:
+    """
+    서명 키를 교체하고 상태가 바뀐 kid 목록을 return하는 함수.\n
+    next 키가 있다면 current로 올리고 기존 current 키는 retire_after 동안 retired로 공개한다.
+    매번 새 next 키를 만들어 공개하므로, JWKS를 캐시한 서비스도 다음 교체 전에 새 키를 받아둘 수 있다.
+    만료된 retired 키는 지운다.
+    """
+    now = timezone.now()
+    result = {'activated': [], 'retired': [], 'created': [], 'deleted': []}
+
+    with transaction.atomic():
+        keys = list(SigningKey.objects.select_for_update().order_by('id'))
+        current = next((key for key in keys if key.status == SigningKey.Status.CURRENT), None)
+        upcoming = next((key for key in keys if key.status == SigningKey.Status.NEXT), None)
+
+        expired = [key for key in keys if key.status == SigningKey.Status.RETIRED and key.expires <= now]
+        SigningKey.objects.filter(id__in=[key.id for key in expired]).delete()
+        result['deleted'] = [key.kid for key in expired]
+
+        if upcoming is not None:
+            if current is not None:
+                SigningKey.objects.filter(id=current.id).update(
+                    status=SigningKey.Status.RETIRED, expires=now + retire_after
+                )
+                result['retired'].append(current.kid)
+
+            SigningKey.objects.filter(id=upcoming.id).update(status=SigningKey.Status.CURRENT, activated=now)
+            result['activated'].append(upcoming.kid)
+        elif current is None:
+            current = generate_signing_key(algorithm, SigningKey.Status.CURRENT)
+            current.activated = now
+            current.save()
+            result['created'].append(current.kid)
+            result['activated'].append(current.kid)
+
+        upcoming = generate_signing_key(algorithm, SigningKey.Status.NEXT)
+        upcoming.save()
+        result['created'].append(upcoming.kid)
+
+    return result
+
+
+class KeyRing:
+    """
+    DB의 서명 키를 프로세스 메모리에 담아두는 클래스.\n
+    reload_interval초마다, 또는 모르는 kid를 만나면 다시 읽으며, 모르는 kid로 다시 읽는 것은 1초에 한번으로 제한한다.
+    키는 요청 중에 만들지 않으므로 배포할 때 rotate_signing_keys 커맨드로 current 키를 먼저 만들어야 한다.
+    개인 키는 서명할 때 한번만 복호화한다.
+    """
+    def __init__(self, algorithm: str, reload_interval: float):
+        self.algorithm = algorithm
+        self.reload_interval = reload_interval
+
+        self._lock = threading.Lock()
+        self._keys = {}
+        self._current = None
+        self._private_keys = {}
+        self._jwks = None
+        self._loaded_at = None
+
+    def current(self) -> tuple[LoadedKey, object]:
+        """
+        서명할 키와 복호화한 개인 키를 return하는 함수.
+        """
+        self._ensure_fresh()
+        key = self._current
+
+        private_key = self._private_keys.get(key.kid)
+
+        if private_key is None:
+            private_key = serialization.load_pem_private_key(
+                key.encrypted_private_key.encode(), password=settings.SECRET_KEY.encode()
+            )
+            self._private_keys[key.kid] = private_key
+
+        return key, private_key
+
+    def get(self, kid: str) -> LoadedKey | None:
+        self._ensure_fresh()
+        key = self._keys.get(kid)
+
+        if key is None and time.monotonic() - self._loaded_at >= 1:
+            with self._lock:
+                self._load()
+
+            key = self._keys.get(kid)
+
+        return key
+
+    def jwks(self) -> tuple[bytes, str]:
+        """
+        공개 중인 키의 JWKS 응답 body와 ETag를 return하는 함수.
+        """
+        self._ensure_fresh()
+
+        return self._jwks
+
+    def reset(self) -> None:
+        with self._lock:
+            self._keys = {}
+            self._current = None
+            self._private_keys = {}
+            self._jwks = None
+            self._loaded_at = None
+
+    def _ensure_fresh(self) -> None:
+        loaded_at = self._loaded_at
+
+        if loaded_at is not None and time.monotonic() - loaded_at < self.reload_interval:
+            return
+
+        with self._lock:
+            if self._loaded_at is None or time.monotonic() - self._loaded_at >= self.reload_interval:
+                self._load()
+
+    def _load(self) -> None:
+        rows = list(SigningKey.objects.filter(Q(expires__isnull=True) | Q(expires__gt=timezone.now())))
+
+        if not any(row.status == SigningKey.Status.CURRENT for row in rows):
+            raise ImproperlyConfigured(
+                'No current signing key. Run `python manage.py rotate_signing_keys` before serving requests.'
+            )
+
+        keys = {
+            row.kid: LoadedKey(
+                kid=row.kid,
+                algorithm=row.algorithm,
+                status=row.status,
+                public_key=serialization.load_pem_public_key(row.public_key.encode()),
+                encrypted_private_key=row.private_key
+            )
+            for row in rows
+        }
+        jwks = json.dumps({
+            'keys': [
+                {
+                    **json.loads(JWK_ALGORITHMS[key.algorithm].to_jwk(key.public_key)),
+                    'kid': key.kid,
+                    'alg': key.algorithm,
+                    'use': 'sig',
+                }
+                for key in sorted(keys.values(), key=lambda key: key.kid)
+            ]
+        }, separators=(',', ':')).encode()
+
+        self._keys = keys
+        self._current = next(key for key in keys.values() if key.status == SigningKey.Status.CURRENT)
+        self._private_keys = {kid: key for kid, key in self._private_keys.items() if kid in keys}
+        self._jwks = (jwks, f'"{sha256(jwks).hexdigest()[:32]}"')
+        self._loaded_at = time.monotonic()
+
+
+class KeyRingTokenBackend(TokenBackend):
+    """
+    KeyRing의 current 키로 서명하고 JWT 헤더의 kid에 해당하는 공개 키로 검증하는 simplejwt 토큰 백엔드.\n
+    legacy_backend가 있다면 kid가 없는 토큰(비대칭 서명 전에 SECRET_KEY로 서명한 토큰)은 legacy_backend로 검증한다.
+    """
+    def __init__(self, key_ring: KeyRing, legacy_backend: TokenBackend | None = None):
+        # 부모 클래스는 알고리즘 하나를 검사하므로 호출하지 않고, 같은 속성만 simplejwt 설정에서 채운다.
+        self.key_ring = key_ring
+        self.legacy_backend = legacy_backend
+        self.algorithm = key_ring.algorithm
+        self.signing_key = None
+        self.verifying_key = None
+        self.audience = api_settings.AUDIENCE
+        self.issuer = api_settings.ISSUER
+        self.jwks_client = None
+        self.leeway = api_settings.LEEWAY
+        self.json_encoder = api_settings.JSON_ENCODER
+
+    def encode(self, payload: dict) -> str:
+        key, private_key = self.key_ring.current()
+        jwt_payload = payload.copy()
+
+        if self.audience is not None:
+            jwt_payload['aud'] = self.audience
+
+        if self.issuer is not None:
+            jwt_payload['iss'] = self.issuer
+
+        return jwt.encode(
+            jwt_payload,
+            private_key,
+            algorithm=key.algorithm,
+            headers={'kid': key.kid},
+            json_encoder=self.json_encoder
+        )
+
+    def decode(self, token: str, verify: bool = True) -> dict:
+        try:
+            kid = jwt.get_unverified_header(token).get('kid')
+        except InvalidTokenError:
+            raise TokenBackendError(_('Token is invalid or expired'))
+
+        if kid is None and self.legacy_backend is not None:
+            return self.legacy_backend.decode(token, verify=verify)
+
+        key = self.key_ring.get(kid) if kid is not None else None
+
+        if key is None and verify:
+            raise TokenBackendError(_('Token is invalid or expired'))
+
+        try:
+            return jwt.decode(
+                token,
+                key.public_key if key is not None else None,
+                algorithms=[key.algorithm] if key is not None else None,
+                audience=self.audience,
+                issuer=self.issuer,
+                leeway=self.get_leeway(),
+                options={
+                    'verify_aud': self.audience is not None,
+                    'verify_signature': verify,
+                },
+            )
+        except InvalidAlgorithmError as ex:
+            raise TokenBackendError(_('Invalid algorithm specified')) from ex
+        except InvalidTokenError:
+            raise TokenBackendError(_('Token is invalid or expired'))
+
+
+_key_ring = None
+_token_backend = None
+
+
+def get_key_ring() -> KeyRing:
+    """
+    SIGNING_KEYS 설정으로 만든 KeyRing을 return하는 함수. 프로세스마다 한번만 만든다.
+    """
+    global _key_ring
+
+    if _key_ring is None:
+        _key_ring = KeyRing(
+            algorithm=settings.SIGNING_KEYS['ALGORITHM'],
+            reload_interval=settings.SIGNING_KEYS['RELOAD_INTERVAL']
+        )
+
+    return _key_ring
+
+
+def get_token_backend() -> TokenBackend:
+    """
+    토큰을 서명하고 검증할 백엔드를 return하는 함수.\n
+    SIGNING_KEYS['ALGORITHM']이 HS로 시작하면 SECRET_KEY로 서명하는 simplejwt 기본 백엔드를 그대로 쓴다.
+    """
+    global _token_backend
+
+    if _token_backend is None:
+        from rest_framework_simplejwt.state import token_backend as legacy_backend
+
+        if settings.SIGNING_KEYS['ALGORITHM'].startswith('HS'):
+            _token_backend = legacy_backend
+        else:
+            _token_backend = KeyRingTokenBackend(
+                get_key_ring(),
+                legacy_backend=legacy_backend if settings.SIGNING_KEYS['ACCEPT_LEGACY_TOKENS'] else None
+            )
+
+    return _token_backend
@@ -0,0 +1,139 @@
+from hashlib import blake2b
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    같은 키로 동시에 들어온 계산을 한번만 하고 결과를 함께 쓰게 하는 클래스.\n
+    같은 프로세스의 호출은 먼저 온 호출이 끝나기를 기다려 그 결과(또는 예외)를 받고,
+    끝난 결과는 캐시에 window초 동안 저장해 다른 프로세스나 조금 늦게 온 호출도 같은 결과를 받는다.
+    다른 프로세스가 계산 중이라면 recheck_delay초 뒤에 한번만 결과를 다시 확인하고, 그래도 없으면 직접 계산한다.
+    비동기 뷰는 요청 스레드 하나에서 동기 코드를 돌리므로, 다른 프로세스를 오래 기다리면 그동안 다른 요청도 멈춘다.
+    예외는 캐시에 저장하지 않는다.
+    """
+    def __init__(self, cache_alias: str, key_prefix: str, window: float, recheck_delay: float):
+        self.cache = caches[cache_alias]
+        self.key_prefix = key_prefix
+        self.window = window
+        self.recheck_delay = recheck_delay
+
+        self._lock = threading.Lock()
+        self._calls = {}
+
+        self._computed = 0
+        self._shared_local = 0
+        self._shared_cache = 0
+        self._recheck_misses = 0
+
+    def _key(self, key: str, kind: str) -> str:
+        return f'{self.key_prefix}:{kind}:{key}'
+
+    def do(self, key: str, func):
+        """
+        key의 결과를 return하는 함수. 이미 계산 중이거나 window초 안에 계산했다면 func를 호출하지 않는다.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.event.wait()
+
+            with self._lock:
+                self._shared_local += 1
+
+            if call.error is not None:
+                raise call.error
+
+            return call.result
+
+        try:
+            call.result = self._do_shared(key, func)
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+            call.event.set()
+
+        return call.result
+
+    def _do_shared(self, key: str, func):
+        result_key = self._key(key, 'result')
+        lock_key = self._key(key, 'lock')
+        result = self.cache.get(result_key)
+
+        if result is None and not self.cache.add(lock_key, 1, timeout=self.window):
+            time.sleep(self.recheck_delay)
+            result = self.cache.get(result_key)
+
+            if result is None:
+                with self._lock:
+                    self._recheck_misses += 1
+
+                return self._compute(result_key, func)
+
+        if result is not None:
+            with self._lock:
+                self._shared_cache += 1
+
+            return result
+
+        try:
+            return self._compute(result_key, func)
+        finally:
+            self.cache.delete(lock_key)
+
+    def _compute(self, result_key: str, func):
+        result = func()
+        self.cache.set(result_key, result, timeout=self.window)
+
+        with self._lock:
+            self._computed += 1
+
+        return result
+
+    def stats(self) -> dict[str, int | float]:
+        """
+        모니터링용 지표를 return하는 함수.
+        """
+        with self._lock:
+            return {
+                'window': self.window,
+                'in_flight': len(self._calls),
+                'computed': self._computed,
+                'shared_local': self._shared_local,
+                'shared_cache': self._shared_cache,
+                'recheck_misses': self._recheck_misses,
+            }
+
+
+def token_digest(token: str) -> str:
+    """
+    토큰 원문 대신 캐시 키로 쓸 digest를 return하는 함수.
+    """
+    return blake2b(token.encode(), digest_size=16).hexdigest()
+
+
+refresh_flight = SingleFlight(
+    cache_alias=settings.TOKEN_REFRESH_SINGLE_FLIGHT['CACHE_ALIAS'],
+    key_prefix=settings.TOKEN_REFRESH_SINGLE_FLIGHT['KEY_PREFIX'],
+    window=settings.TOKEN_REFRESH_SINGLE_FLIGHT['WINDOW'],
+    recheck_delay=settings.TOKEN_REFRESH_SINGLE_FLIGHT['RECHECK_DELAY']
+)
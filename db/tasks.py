@@ -0,0 +1,74 @@
+import time
+
+from celery import shared_task
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from db.sharding import get_shards
+
+
+def prune_expired_tokens(
+    batch_size: int, max_batches: int, pause: float, using: str = 'default'
+) -> dict[str, int]:
+    """
+    만료된 OutstandingToken과 그에 딸린 BlacklistedToken을 batch_size개씩 나눠 지우는 함수.\n
+    기본 키 순서로 훑으며 batch마다 짧은 트랜잭션으로 지우고 pause초 쉬어, 로그인 요청의 insert를 오래 막지 않는다.
+    리프레시 토큰의 수명이 같으므로 id가 클수록 늦게 만료된다. 만료된 토큰이 없는 batch를 만나면 멈춘다.
+    """
+    now = timezone.now()
+    result = {'batches': 0, 'outstanding_tokens': 0, 'blacklisted_tokens': 0}
+    cursor = 0
+
+    for _ in range(max_batches):
+        rows = list(
+            OutstandingToken.objects.using(using).filter(id__gt=cursor)
+            .order_by('id')
+            .values_list('id', 'expires_at')[:batch_size]
+        )
+
+        if not rows:
+            break
+
+        cursor = rows[-1][0]
+        expired_ids = [id for id, expires_at in rows if expires_at <= now]
+
+        if not expired_ids:
+            break
+
+        with transaction.atomic(using=using):
+            blacklisted_count, _ = BlacklistedToken.objects.using(using).filter(token_id__in=expired_ids).delete()
+            outstanding_count, _ = OutstandingToken.objects.using(using).filter(id__in=expired_ids).delete()
+
+        result['batches'] += 1
+        result['blacklisted_tokens'] += blacklisted_count
+        result['outstanding_tokens'] += outstanding_count
+
+        time.sleep(pause)
+
+    return result
+
+
+@shared_task
+def task_prune_expired_tokens() -> dict[str, int]:
+    """
+    만료된 토큰 기록을 주기적으로 지우는 셀러리 태스크.\n
+    유저를 나눠 저장한다면 shard마다 지우며, 지운 row 수를 return해 워커 로그에 남긴다.
+    """
+    config = settings.TOKEN_PRUNING
+    result = {'batches': 0, 'outstanding_tokens': 0, 'blacklisted_tokens': 0}
+
+    for shard in get_shards():
+        shard_result = prune_expired_tokens(
+            batch_size=config['BATCH_SIZE'],
+            max_batches=config['MAX_BATCHES'],
+            pause=config['BATCH_PAUSE'],
+            using=shard
+        )
+
+        for key, value in shard_result.items():
+            result[key] += value
+
+    return result
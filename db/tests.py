@@ -1,10 +1,50 @@
+from concurrent.futures import Future
+from datetime import timedelta
+from io import StringIO
+import asyncio
+import json
+import threading
+import time
+
+import jwt
+import mock
 import pytest
 from model_bakery import baker
 
 from django.contrib.auth import get_user_model
-from django.core.exceptions import PermissionDenied
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, make_password
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.core.exceptions import ImproperlyConfigured, PermissionDenied
+from django.db import connection, connections
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import AccessToken as BaseAccessToken
 
-from db.models import UserActiveType
+from db import hashers
+from db.admission import AdmissionController, AdmissionRejected
+from db.blacklist import BloomFilter, blacklist_index
+from db.connections import PersistentConnectionLimiter
+from db.families import (
+    FamilyCheck, TokenFamilyStore, rotate_tokens, token_family_event_buffer, token_family_store
+)
+from db.hashers import HashingBackend, ProcessPoolHashingBackend, ThreadPoolHashingBackend
+from db.models import ACTIVE_TYPES, SigningKey, TokenFamilyEvent, UserActiveType
+from db.passwordless import PasswordlessLoginStore
+from db.authentication import (
+    CachedJWTAuthentication, ClaimsUser, ShardedJWTAuthentication, VerifiedTokenCache, verified_token_cache
+)
+from db.routers import ReplicaPinningMiddleware, ReplicaRouter, ShardRouter
+from db.sharding import SHARD_CLAIM, is_sharded, shard_for_email
+from db.signing import get_key_ring, rotate_signing_keys
+from db.singleflight import SingleFlight
+from db.tasks import prune_expired_tokens, task_prune_expired_tokens
+from db.tokens import FAMILY_CLAIM, AccessToken, ModelRowBuffer, RefreshToken
+from db.verification import CacheVerificationCodeStore, CodeCheck, VerificationCodeStore
+from db.verifier import JWKSVerifier
 
 
 User = get_user_model()
@@ -30,4 +70,1151 @@ class TestGetTokenMethod:
 
     def test_인증되지않은유저의토큰발급(self):
         with pytest.raises(PermissionDenied):
-            self.deactive_user.get_token()
\ No newline at end of file
+            self.deactive_user.get_token()
+
+    def test_토큰발급시바로기록(self, settings):
+        settings.TOKEN_ISSUANCE = {**settings.TOKEN_ISSUANCE, 'OUTSTANDING_TOKENS': 'sync'}
+
+        token_obj = self.active_user.get_token()
+
+        assert OutstandingToken.objects.filter(
+            user=self.active_user, token=token_obj.get('refresh_token')
+        ).exists()
+
+    def test_토큰발급기록을모아서저장(self, settings):
+        settings.TOKEN_ISSUANCE = {**settings.TOKEN_ISSUANCE, 'OUTSTANDING_TOKENS': 'buffered'}
+        buffer = ModelRowBuffer(name='test-flusher', flush_interval=60, batch_size=100)
+
+        with mock.patch('db.tokens.outstanding_token_buffer', buffer):
+            self.active_user.get_token()
+            self.active_user.get_token()
+
+        assert buffer.pending() == 2
+        assert not OutstandingToken.objects.exists()
+
+        assert buffer.flush() == 2
+        assert OutstandingToken.objects.filter(user=self.active_user).count() == 2
+
+    def test_토큰발급기록하지않음(self, settings):
+        settings.TOKEN_ISSUANCE = {**settings.TOKEN_ISSUANCE, 'OUTSTANDING_TOKENS': 'off'}
+
+        token_obj = self.active_user.get_token()
+
+        assert token_obj.get('refresh_token') is not None
+        assert not OutstandingToken.objects.exists()
+
+
+class TestHashingBackend:
+
+    @pytest.fixture(params=[ThreadPoolHashingBackend, ProcessPoolHashingBackend])
+    def backend(self, request):
+        backend = request.param(max_workers=2, max_queue_size=2)
+
+        yield backend
+
+        backend.shutdown()
+
+    def test_해싱및검증(self, backend):
+        encoded = backend.make_password('test123!')
+
+        assert backend.check_password('test123!', encoded)
+        assert not backend.check_password('test123!!', encoded)
+
+    def test_비동기해싱및검증(self, backend):
+        async def hash_and_check():
+            encoded = await backend.amake_password('test123!')
+
+            return await backend.acheck_password('test123!', encoded)
+
+        assert asyncio.run(hash_and_check())
+
+    def test_작업이끝나면대기열자리반환(self, backend):
+        for _ in range(10):
+            backend.check_password('test123!', 'invalid-hash')
+
+        assert backend.admission.stats()['in_flight'] == 0
+
+    def test_executor를구현하지않은백엔드는생성불가(self):
+        class IncompleteHashingBackend(HashingBackend):
+            pass
+
+        with pytest.raises(TypeError):
+            IncompleteHashingBackend(max_workers=1, max_queue_size=1)
+
+
+class TestAdmissionController:
+
+    @pytest.fixture(autouse=True)
+    def setUpClass(self):
+        self.controller = AdmissionController(
+            max_concurrency=1, max_queue_size=1, max_wait=0.05, retry_after=3
+        )
+
+    def test_대기열이가득차면바로거절(self):
+        self.controller.acquire()
+        waiter = threading.Thread(target=lambda: pytest.raises(AdmissionRejected, self.controller.acquire))
+        waiter.start()
+
+        while self.controller.stats()['queue_depth'] == 0:
+            time.sleep(0.001)
+
+        with pytest.raises(AdmissionRejected) as e:
+            self.controller.acquire()
+
+        waiter.join()
+
+        assert e.value.retry_after == 3
+        assert self.controller.stats()['shed'] == 2
+
+    def test_대기시간초과시거절(self):
+        self.controller.acquire()
+
+        with pytest.raises(AdmissionRejected):
+            self.controller.acquire()
+
+        stats = self.controller.stats()
+
+        assert stats['wait_count'] == 1
+        assert stats['wait_time_max'] >= 0.05
+
+    def test_자리가나면대기중인요청처리(self):
+        self.controller.acquire()
+        threading.Timer(0.01, self.controller.release).start()
+
+        self.controller.acquire()
+
+        assert self.controller.stats()['admitted'] == 2
+
+    def test_비동기대기가취소되면자리반환(self):
+        controller = AdmissionController(max_concurrency=1, max_queue_size=1, max_wait=1.0, retry_after=1)
+        controller.acquire()
+
+        async def cancel_waiting():
+            task = asyncio.ensure_future(controller.aacquire())
+
+            while controller.stats()['queue_depth'] == 0:
+                await asyncio.sleep(0.001)
+
+            task.cancel()
+
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(cancel_waiting())
+        controller.release()
+
+        # 대기 스레드가 취소된 요청 대신 차지한 자리는 바로 반환되어야 한다.
+        deadline = time.monotonic() + 1.0
+
+        while (controller.stats()['admitted'] < 2 or controller.stats()['in_flight']) and time.monotonic() < deadline:
+            time.sleep(0.001)
+
+        assert controller.stats()['admitted'] == 2
+        assert controller.stats()['in_flight'] == 0
+
+
+class SynchronousExecutor:
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_result(fn(*args))
+
+        return future
+
+
+class PendingExecutor:
+    def __init__(self):
+        self.futures = []
+
+    def submit(self, fn, *args):
+        future = Future()
+        self.futures.append(future)
+
+        return future
+
+
+@pytest.mark.django_db
+class TestRehashOnLogin:
+
+    @pytest.fixture(autouse=True)
+    def setUpClass(self, monkeypatch):
+        monkeypatch.setattr(hashers, '_rehash_executor', SynchronousExecutor())
+
+        self.old_encoded = PBKDF2PasswordHasher().encode('test123!', 'oldsalt', iterations=1000)
+        self.user = baker.make(
+            User, username='테스트', email='test@test.devgyurak', password=self.old_encoded,
+            active_type_id=UserActiveType.TYPES.ACTIVE.value
+        )
+
+        yield
+
+        User.objects.all().delete()
+
+    def test_로그인성공시재해싱(self):
+        assert self.user.check_password('test123!')
+
+        self.user.refresh_from_db()
+
+        assert self.user.password != self.old_encoded
+        assert not hashers.password_must_update(self.user.password)
+
+    def test_로그인실패시재해싱하지않음(self):
+        assert not self.user.check_password('test123!!')
+
+        self.user.refresh_from_db()
+
+        assert self.user.password == self.old_encoded
+
+    def test_비밀번호가바뀌었다면덮어쓰지않음(self):
+        User.objects.filter(pk=self.user.pk).update(password='changed')
+
+        assert not hashers._rehash_password(self.user.id, 'test123!', self.old_encoded)
+
+    def test_재해싱작업은중복없이제한된수만대기(self, settings, monkeypatch):
+        settings.PASSWORD_HASHING = {**settings.PASSWORD_HASHING, 'MAX_PENDING_REHASHES': 2}
+        executor = PendingExecutor()
+        monkeypatch.setattr(hashers, '_rehash_executor', executor)
+
+        assert hashers.schedule_rehash_if_needed(1, 'test123!', self.old_encoded) is not None
+        assert hashers.schedule_rehash_if_needed(1, 'test123!', self.old_encoded) is None
+        assert hashers.schedule_rehash_if_needed(2, 'test123!', self.old_encoded) is not None
+        assert hashers.schedule_rehash_if_needed(3, 'test123!', self.old_encoded) is None
+
+        executor.futures[0].set_result(True)
+
+        assert hashers.schedule_rehash_if_needed(3, 'test123!', self.old_encoded) is not None
+        assert len(executor.futures) == 3
+
+        for future in executor.futures[1:]:
+            future.set_result(True)
+
+    def test_해시현황리포트(self):
+        baker.make(User, email='test2@test.devgyurak', password=make_password('test123!'))
+        out = StringIO()
+
+        call_command('password_hash_report', '--timing', '--rounds', '1', stdout=out)
+        report = out.getvalue()
+
+        assert 'iterations=1000' in report
+        assert 'users to rehash on next login: 1' in report
+
+
+@pytest.mark.django_db
+class TestBlacklistIndex:
+
+    @pytest.fixture(autouse=True)
+    def setUpClass(self):
+        blacklist_index.reset()
+        self.user = baker.make(User, active_type_id=UserActiveType.TYPES.ACTIVE.value)
+
+        yield
+
+        blacklist_index.reset()
+        User.objects.all().delete()
+
+    def test_블룸필터(self):
+        bloom_filter = BloomFilter(capacity=1000, error_rate=0.01)
+
+        for i in range(1000):
+            bloom_filter.add(f'jti-{i}')
+
+        false_positives = sum(f'other-{i}' in bloom_filter for i in range(1000))
+
+        assert all(f'jti-{i}' in bloom_filter for i in range(1000))
+        assert false_positives < 50
+
+    def test_블랙리스트가아닌토큰은DB조회안함(self, django_assert_num_queries):
+        refresh_token = self.user.get_token().get('refresh_token')
+        blacklist_index.rebuild()
+
+        with django_assert_num_queries(0):
+            RefreshToken(refresh_token)
+
+    def test_블랙리스트토큰거절(self):
+        refresh_token = self.user.get_token().get('refresh_token')
+        blacklist_index.rebuild()
+
+        RefreshToken(refresh_token).blacklist()
+
+        with pytest.raises(TokenError):
+            RefreshToken(refresh_token)
+
+    def test_다른프로세스에서추가된토큰동기화(self):
+        refresh_token = RefreshToken(self.user.get_token().get('refresh_token'))
+        blacklist_index.rebuild()
+
+        outstanding_token = OutstandingToken.objects.get(jti=refresh_token['jti'])
+        BlacklistedToken.objects.bulk_create([BlacklistedToken(token=outstanding_token)])
+
+        assert not blacklist_index.might_contain(refresh_token['jti'])
+
+        blacklist_index.sync()
+
+        assert blacklist_index.might_contain(refresh_token['jti'])
+
+    def test_늦게커밋된낮은id도동기화(self):
+        early_token, late_token = [RefreshToken(self.user.get_token().get('refresh_token')) for _ in range(2)]
+        BlacklistedToken.objects.bulk_create([
+            BlacklistedToken(id=10, token=OutstandingToken.objects.get(jti=late_token['jti']))
+        ])
+        blacklist_index.rebuild()
+
+        # id 10보다 먼저 매겨졌지만 동기화 뒤에 커밋된 트랜잭션의 행.
+        BlacklistedToken.objects.bulk_create([
+            BlacklistedToken(id=5, token=OutstandingToken.objects.get(jti=early_token['jti']))
+        ])
+        blacklist_index.sync()
+
+        assert blacklist_index.might_contain(early_token['jti'])
+
+    def test_주기적으로필터를새로만듦(self, monkeypatch):
+        early_token, late_token = [RefreshToken(self.user.get_token().get('refresh_token')) for _ in range(2)]
+        BlacklistedToken.objects.bulk_create([
+            BlacklistedToken(id=10, token=OutstandingToken.objects.get(jti=late_token['jti']))
+        ])
+        blacklist_index.rebuild()
+
+        # lookback보다 오래 걸려 커밋된 행은 필터를 새로 만들 때 반영된다.
+        BlacklistedToken.objects.bulk_create([
+            BlacklistedToken(id=5, token=OutstandingToken.objects.get(jti=early_token['jti']))
+        ])
+        monkeypatch.setattr(blacklist_index, 'lookback', timedelta(seconds=-3600))
+        monkeypatch.setattr(blacklist_index, 'sync_interval', 0)
+        monkeypatch.setattr(blacklist_index, 'rebuild_interval', 0)
+
+        assert blacklist_index.might_contain(early_token['jti'])
+
+
+@pytest.mark.django_db
+class TestPruneExpiredTokens:
+
+    @pytest.fixture(autouse=True)
+    def setUpClass(self):
+        now = timezone.now()
+        self.user = baker.make(User, active_type_id=UserActiveType.TYPES.ACTIVE.value)
+
+        expired_tokens = [
+            OutstandingToken.objects.create(
+                user=self.user, jti=f'expired-{i}', token='token', expires_at=now - timedelta(days=1)
+            )
+            for i in range(5)
+        ]
+        BlacklistedToken.objects.create(token=expired_tokens[0])
+
+        self.live_token = OutstandingToken.objects.create(
+            user=self.user, jti='live', token='token', expires_at=now + timedelta(days=1)
+        )
+        BlacklistedToken.objects.create(token=self.live_token)
+
+        yield
+
+        User.objects.all().delete()
+
+    def test_만료된토큰정리(self):
+        result = prune_expired_tokens(batch_size=2, max_batches=10, pause=0)
+
+        assert result == {'batches': 3, 'outstanding_tokens': 5, 'blacklisted_tokens': 1}
+        assert list(OutstandingToken.objects.values_list('jti', flat=True)) == ['live']
+        assert BlacklistedToken.objects.filter(token=self.live_token).exists()
+
+    def test_최대batch수만큼만정리(self):
+        result = prune_expired_tokens(batch_size=2, max_batches=1, pause=0)
+
+        assert result['outstanding_tokens'] == 2
+        assert OutstandingToken.objects.count() == 4
+
+    def test_토큰정리태스크(self, settings):
+        settings.TOKEN_PRUNING = {**settings.TOKEN_PRUNING, 'BATCH_PAUSE': 0}
+
+        result = task_prune_expired_tokens()
+
+        assert result['outstanding_tokens'] == 5
+
+
+class TestVerificationCodeStore:
+
+    @pytest.fixture(autouse=True)
+    def setUpClass(self):
+        self.store = CacheVerificationCodeStore(
+            cache_alias='default', key_prefix='test-verify-code',
+            ttl=60, max_attempts=3, length=6, reissue_interval=60
+        )
+        self.email = 'test@test.devgyurak'
+
+    def test_인증코드는한번만사용(self):
+        code = self.store.issue(self.email)
+
+        assert len(code) == 6
+        assert self.store.check(self.email, code) == CodeCheck.VALID
+        assert self.store.check(self.email, code) == CodeCheck.MISSING
+
+    def test_틀린횟수초과시잠김(self):
+        code = self.store.issue(self.email)
+
+        for _ in range(3):
+            assert self.store.check(self.email, 'wrong') == CodeCheck.INVALID
+
+        assert self.store.check(self.email, code) == CodeCheck.LOCKED
+
+    def test_재발급시틀린횟수초기화(self):
+        self.store.issue(self.email)
+
+        for _ in range(3):
+            self.store.check(self.email, 'wrong')
+
+        code = self.store.reissue(self.email)
+
+        assert self.store.reissue(self.email) is None
+        assert self.store.check(self.email, code) == CodeCheck.VALID
+
+    def test_만료된인증코드(self):
+        store = CacheVerificationCodeStore(
+            cache_alias='default', key_prefix='test-verify-code',
+            ttl=0.01, max_attempts=3, length=6, reissue_interval=60
+        )
+        code = store.issue(self.email)
+        time.sleep(0.05)
+
+        assert store.check(self.email, code) == CodeCheck.MISSING
+
+    def test_메서드를구현하지않은저장소는생성불가(self):
+        class IncompleteVerificationCodeStore(VerificationCodeStore):
+            def issue(self, email: str) -> str:
+                return self.generate()
+
+        with pytest.raises(TypeError):
+            IncompleteVerificationCodeStore(ttl=60, max_attempts=3, length=6, reissue_interval=60)
+
+
+class TestPasswordlessLoginStore:
+
+    @pytest.fixture(autouse=True)
+    def setUpClass(self):
+        self.store = PasswordlessLoginStore(
+            cache_alias='default', key_prefix='test-passwordless-login',
+            ttl=60, max_attempts=3, length=6, reissue_interval=0.01
+        )
+        self.email = 'Test@test.devgyurak'
+
+    def issue(self) -> tuple[str, str]:
+        return self.store.render(self.email, self.store.issue(self.email))
+
+    def test_링크는한번만사용(self):
+        token, code = self.issue()
+
+        assert self.store.check_link(token) == (CodeCheck.VALID, 'test@test.devgyurak')
+        assert self.store.check_link(token)[0] == CodeCheck.MISSING
+        assert self.store.check_code(self.email, code) == CodeCheck.MISSING
+
+    def test_코드는한번만사용(self):
+        token, code = self.issue()
+
+        assert len(code) == 6
+        assert self.store.check_code(self.email, code) == CodeCheck.VALID
+        assert self.store.check_link(token)[0] == CodeCheck.MISSING
+
+    def test_위조된링크(self):
+        token, _ = self.issue()
+
+        assert self.store.check_link(token[:-1])[0] == CodeCheck.INVALID
+        assert self.store.check_link(token.replace('test@', 'admin@'))[0] == CodeCheck.INVALID
+
+    def test_틀린횟수초과시잠김(self):
+        _, code = self.issue()
+
+        for _ in range(3):
+            assert self.store.check_code(self.email, 'wrong') == CodeCheck.INVALID
+
+        assert self.store.check_code(self.email, code) == CodeCheck.LOCKED
+
+    def test_다시발급하면이전링크사용불가(self):
+        token, _ = self.issue()
+
+        assert self.store.issue(self.email) is None
+
+        time.sleep(0.05)
+        new_token, _ = self.issue()
+
+        assert self.store.check_link(token)[0] == CodeCheck.MISSING
+        assert self.store.check_link(new_token)[0] == CodeCheck.VALID
+
+
+@pytest.mark.django_db
+class TestActiveTypeRegistry:
+
+    @pytest.fixture(autouse=True)
+    def setUpClass(self):
+        self.staff_user = User.objects.create_superuser(
+            email='admin@test.devgyurak', password='test777!', username='관리자'
+        )
+
+        yield
+
+        User.objects.all().delete()
+
+    def test_활성화정보조회(self, django_assert_num_queries):
+        with django_assert_num_queries(0):
+            info = UserActiveType.get_info(UserActiveType.TYPES.ACTIVE.value)
+
+        assert info.name == 'ACTIVE'
+        assert set(ACTIVE_TYPES) == {active_type.value for active_type in UserActiveType.TYPES}
+
+    def test_관리자유저생성(self):
+        assert self.staff_user.is_staff
+        assert self.staff_user.active_type_info.name == 'ACTIVE'
+
+    def test_관리자목록쿼리수(self, client):
+        client.force_login(self.staff_user)
+
+        def count_changelist_queries():
+            with CaptureQueriesContext(connection) as context:
+                response = client.get('/admin/db/user/')
+
+            assert response.status_code == 200
+
+            return len(context.captured_queries)
+
+        baker.make(User, _quantity=2, active_type_id=UserActiveType.TYPES.DEACTIVE.value)
+        few_users_queries = count_changelist_queries()
+
+        baker.make(User, _quantity=20, active_type_id=UserActiveType.TYPES.ACTIVE.value)
+
+        assert count_changelist_queries() == few_users_queries
+
+
+class TestReplicaRouter:
+
+    @pytest.fixture(autouse=True)
+    def setUpClass(self, settings):
+        settings.DATABASE_REPLICAS = {'COOKIE_NAME': 'replica_pin', 'STICKY_SECONDS': 5}
+        self.down = set()
+
+        def health_check(alias):
+            if alias in self.down:
+                raise ConnectionError(f'{alias} is down')
+
+        self.router = ReplicaRouter(
+            replicas=['replica1', 'replica2'], models=['db.user'],
+            check_interval=0, retry_interval=60, health_check=health_check
+        )
+
+    def test_replica에돌아가며읽기(self):
+        aliases = [self.router.db_for_read(User) for _ in range(4)]
+
+        assert aliases == ['replica1', 'replica2', 'replica1', 'replica2']
+        assert self.router.db_for_read(OutstandingToken) is None
+        assert self.router.db_for_write(User) == 'default'
+
+    def test_장애난replica제외(self):
+        self.down.add('replica1')
+
+        assert {self.router.db_for_read(User) for _ in range(4)} == {'replica2'}
+
+        self.down.add('replica2')
+        self.router.mark_unhealthy('replica2')
+
+        assert self.router.db_for_read(User) == 'default'
+
+    def test_쓴클라이언트는primary에서읽기(self):
+        def sign_up_view(request):
+            self.router.db_for_write(User)
+            return HttpResponse(self.router.db_for_read(User))
+
+        def login_view(request):
+            return HttpResponse(self.router.db_for_read(User))
+
+        factory = RequestFactory()
+
+        response = ReplicaPinningMiddleware(sign_up_view)(factory.post('/sign-up'))
+
+        assert response.content == b'default'
+        assert response.cookies['replica_pin']['max-age'] == 5
+
+        pinned_request = factory.post('/login')
+        pinned_request.COOKIES['replica_pin'] = '1'
+
+        assert ReplicaPinningMiddleware(login_view)(pinned_request).content == b'default'
+        assert ReplicaPinningMiddleware(login_view)(factory.post('/login')).content.startswith(b'replica')
+
+
+class TestUserSharding:
+
+    @pytest.fixture(autouse=True)
+    def setUpClass(self, settings):
+        settings.USER_SHARDS = ['default', 'shard1', 'shard2']
+        self.router = ShardRouter()
+
+    def test_정규화한이메일로shard결정(self):
+        assert shard_for_email(' Test@Example.com ') == shard_for_email('test@example.com')
+        assert shard_for_email('test@example.com', ['default']) == 'default'
+
+    def test_shard에고르게분산(self):
+        counts = {}
+
+        for i in range(3000):
+            shard = shard_for_email(f'user{i}@example.com')
+            counts[shard] = counts.get(shard, 0) + 1
+
+        assert set(counts) == {'default', 'shard1', 'shard2'}
+        assert min(counts.values()) > 800
+
+    def test_새유저는이메일의shard에저장(self):
+        user = User(email='test@example.com')
+
+        assert self.router.db_for_write(User, instance=user) == shard_for_email('test@example.com')
+
+        user._state.db = 'shard2'
+
+        assert self.router.db_for_write(User, instance=user) is None
+        assert self.router.db_for_write(OutstandingToken, instance=OutstandingToken()) is None
+
+    def test_이메일의shard매니저(self, settings):
+        assert User.objects.for_email('test@example.com')._db == shard_for_email('test@example.com')
+        assert User.objects.db_manager('shard1').for_email('test@example.com')._db == 'shard1'
+
+        settings.USER_SHARDS = ['default']
+
+        assert User.objects.for_email('test@example.com')._db is None
+
+
+@pytest.mark.skipif(
+    not is_sharded(),
+    reason='shard가 여러개인 설정에서만 실행한다. (--ds=login_is_boring.settings_shards)'
+)
+@pytest.mark.django_db(databases='__all__')
+class TestShardedUsers:
+
+    @pytest.fixture(autouse=True)
+    def setUpClass(self, settings):
+        self.shards = settings.USER_SHARDS
+        self.emails = [f'user{i}@example.com' for i in range(30)]
+
+        # --nomigrations로 만든 테스트 DB에는 0004 마이그레이션이 채우는 행이 없다.
+        for shard in self.shards:
+            UserActiveType.objects.using(shard).bulk_create(
+                [UserActiveType(id=info.id, name=info.name, description=info.description) for info in ACTIVE_TYPES.values()]
+            )
+
+        for email in self.emails:
+            User.objects.create_user(email=email, password='password', username='유저')
+
+    def test_유저를이메일의shard에저장하고조회(self):
+        for email in self.emails:
+            shard = shard_for_email(email)
+
+            assert User.objects.using(shard).filter(email=email).exists()
+            assert User.objects.get_by_email(email.upper())._state.db == shard
+
+    def test_토큰의shard에서유저인증(self):
+        email = next(email for email in self.emails if shard_for_email(email) != 'default')
+        User.objects.activate(email)
+        user = User.objects.get_by_email(email)
+        token = RefreshToken(user.get_token()['refresh_token'])
+
+        assert token[SHARD_CLAIM] == user._state.db
+        assert ShardedJWTAuthentication().get_user(token.access_token) == user
+
+    def test_shard를늘리면유저를옮기기(self, settings):
+        settings.USER_SHARDS = self.shards[:-1]
+        call_command('reshard_users', '--source', self.shards[-1], '--batch-size', '7', stdout=StringIO())
+
+        assert not User.objects.using(self.shards[-1]).exists()
+
+        settings.USER_SHARDS = self.shards
+        out = StringIO()
+
+        call_command('reshard_users', '--dry-run', stdout=out)
+
+        assert out.getvalue().endswith(f'users to move: {sum(1 for email in self.emails if shard_for_email(email) == self.shards[-1])}\n')
+
+        call_command('reshard_users', stdout=StringIO())
+
+        for email in self.emails:
+            assert User.objects.using(shard_for_email(email)).filter(email=email).exists()
+
+        assert sum(User.objects.using(shard).count() for shard in self.shards) == len(self.emails)
+
+
+class TestSingleFlight:
+
+    @pytest.fixture(autouse=True)
+    def setUpClass(self):
+        self.flight = SingleFlight(
+            cache_alias='default', key_prefix='test-flight',
+            window=60, recheck_delay=0.1
+        )
+        self.calls = 0
+
+    def slow_compute(self):
+        self.calls += 1
+        time.sleep(0.05)
+
+        return {'access_token': f'token-{self.calls}'}
+
+    def test_동시호출은한번만계산(self):
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(self.flight.do('key', self.slow_compute)))
+            for _ in range(5)
+        ]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        assert self.calls == 1
+        assert results == [{'access_token': 'token-1'}] * 5
+
+    def test_다른프로세스는캐시된결과사용(self):
+        other = SingleFlight(
+            cache_alias='default', key_prefix='test-flight',
+            window=60, recheck_delay=0.1
+        )
+
+        first = self.flight.do('key', self.slow_compute)
+        second = other.do('key', self.slow_compute)
+
+        assert self.calls == 1
+        assert first == second
+        assert other.stats()['shared_cache'] == 1
+
+    def test_다른프로세스가계산중이면결과를기다림(self):
+        other = SingleFlight(
+            cache_alias='default', key_prefix='test-flight',
+            window=60, recheck_delay=0.1
+        )
+        thread = threading.Thread(target=self.flight.do, args=('key', self.slow_compute))
+        thread.start()
+        time.sleep(0.01)
+
+        result = other.do('key', self.slow_compute)
+        thread.join()
+
+        assert self.calls == 1
+        assert result == {'access_token': 'token-1'}
+
+    def test_다시확인해도결과가없으면직접계산(self):
+        self.flight.cache.add('test-flight:lock:key', 1)
+        started = time.monotonic()
+
+        result = self.flight.do('key', self.slow_compute)
+
+        assert time.monotonic() - started < 0.5
+        assert result == {'access_token': 'token-1'}
+        assert self.flight.stats()['recheck_misses'] == 1
+
+    def test_예외는캐시하지않음(self):
+        def fail():
+            raise ValueError('fail')
+
+        with pytest.raises(ValueError):
+            self.flight.do('key', fail)
+
+        assert self.flight.do('key', self.slow_compute) == {'access_token': 'token-1'}
+
+
+class TestPersistentConnectionLimiter:
+
+    @pytest.fixture(autouse=True)
+    def setUpClass(self):
+        self.limiter = PersistentConnectionLimiter(max_connections=1, health_checks=True)
+        self.connection = mock.Mock(alias='default', connection=object())
+
+        with mock.patch('db.connections.connections') as connections:
+            connections.all.return_value = [self.connection]
+            yield
+
+    def run_request(self) -> None:
+        self.limiter.request_started()
+        self.limiter.request_finished()
+
+    def test_최대개수만큼만연결유지(self):
+        self.run_request()
+
+        assert self.connection.close.call_count == 0
+
+        thread = threading.Thread(target=self.run_request)
+        thread.start()
+        thread.join()
+
+        assert self.connection.close.call_count == 1
+        assert self.limiter.stats()['persistent'] == {'default': 1}
+        assert self.limiter.stats()['closed_overflow'] == 1
+
+    def test_끝난스레드의자리재사용(self):
+        thread = threading.Thread(target=self.run_request)
+        thread.start()
+        thread.join()
+
+        self.run_request()
+
+        assert self.connection.close.call_count == 0
+
+    def test_끊긴연결은요청시작시닫기(self):
+        self.run_request()
+        self.connection.is_usable.return_value = False
+        self.limiter.request_started()
+
+        assert self.connection.close.call_count == 1
+        assert self.limiter.stats()['closed_unhealthy'] == 1
+        assert self.limiter.stats()['persistent'] == {'default': 0}
+
+
+@pytest.mark.django_db
+class TestCachedJWTAuthentication:
+
+    @pytest.fixture(autouse=True)
+    def setUpClass(self):
+        self.user = baker.make(User, is_staff=True, active_type_id=UserActiveType.TYPES.ACTIVE.value)
+        self.access_token = self.user.get_token()['access_token']
+        self.request = RequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {self.access_token}')
+        self.authentication = CachedJWTAuthentication()
+
+        yield
+
+        verified_token_cache.clear()
+        User.objects.all().delete()
+
+    def test_같은토큰은검증과조회없이인증(self):
+        user, _ = self.authentication.authenticate(self.request)
+
+        assert user == self.user
+
+        with mock.patch.object(self.authentication, 'get_validated_token') as get_validated_token:
+            with CaptureQueriesContext(connection) as queries:
+                cached_user, _ = self.authentication.authenticate(self.request)
+
+        assert cached_user is user
+        assert len(queries) == 0
+        assert get_validated_token.call_count == 0
+
+    def test_claim만으로유저생성(self, settings):
+        settings.JWT_AUTHENTICATION_CACHE = {**settings.JWT_AUTHENTICATION_CACHE, 'CLAIMS_ONLY_USER': True}
+
+        with CaptureQueriesContext(connection) as queries:
+            user, _ = self.authentication.authenticate(self.request)
+
+        assert len(queries) == 0
+        assert isinstance(user, ClaimsUser)
+        assert user.id == self.user.id
+        assert user.is_staff is True
+        assert user.active_type_info.name == 'ACTIVE'
+
+    def test_만료된토큰과오래된토큰제거(self):
+        cache = VerifiedTokenCache(max_size=2)
+        cache.set(b'expired', time.time() - 1, 'expired')
+        cache.set(b'first', time.time() + 60, 'first')
+        cache.set(b'second', time.time() + 60, 'second')
+
+        assert cache.get(b'expired') is None
+        assert cache.get(b'first') == 'first'
+
+        cache.set(b'third', time.time() + 60, 'third')
+
+        assert cache.get(b'second') is None
+        assert cache.get(b'first') == 'first'
+        assert cache.stats()['size'] == 2
+
+
+@pytest.mark.django_db
+class TestTokenFamilies:
+
+    @pytest.fixture(autouse=True)
+    def setUpClass(self):
+        self.store = TokenFamilyStore(cache_alias='default', key_prefix='test-token-family', ttl=60, grace_period=0)
+        self.user = baker.make(User, active_type_id=UserActiveType.TYPES.ACTIVE.value)
+
+        yield
+
+        User.objects.all().delete()
+
+    def test_교체된jti만사용가능(self):
+        issued_at = int(time.time())
+
+        assert self.store.rotate('family', 'jti-1', 'jti-2', 1, issued_at) == FamilyCheck.ROTATED
+        assert self.store.rotate('family', 'jti-2', 'jti-3', 1, issued_at) == FamilyCheck.ROTATED
+        assert self.store.rotate('family', 'jti-1', 'jti-4', 1, issued_at) == FamilyCheck.REUSED
+        assert self.store.rotate('family', 'jti-3', 'jti-5', 1, issued_at) == FamilyCheck.REVOKED
+
+    def test_유예시간안의재시도는폐기하지않음(self):
+        store = TokenFamilyStore(cache_alias='default', key_prefix='test-token-family', ttl=60, grace_period=10)
+        issued_at = int(time.time())
+
+        assert store.rotate('family', 'jti-1', 'jti-2', 1, issued_at) == FamilyCheck.ROTATED
+        assert store.rotate('family', 'jti-1', 'jti-3', 1, issued_at) == FamilyCheck.RETRIED
+        assert not store.is_revoked('family')
+        assert store.rotate('family', 'jti-2', 'jti-4', 1, issued_at) == FamilyCheck.ROTATED
+
+    def test_유저를폐기하면이전에발급된토큰폐기(self):
+        issued_at = int(time.time())
+        self.store.revoke_users([1])
+
+        assert self.store.rotate('family-1', 'jti-1', 'jti-2', 1, issued_at) == FamilyCheck.REVOKED
+        assert self.store.rotate('family-2', 'jti-3', 'jti-4', 2, issued_at) == FamilyCheck.ROTATED
+        assert self.store.rotate('family-3', 'jti-5', 'jti-6', 1, issued_at + 1) == FamilyCheck.ROTATED
+        assert self.store.is_revoked('family-1')
+
+    def test_폐기직후같은초에발급된토큰은유효(self):
+        revoked = RefreshToken(self.user.get_token()['refresh_token'])
+        time.sleep(0.002)
+        token_family_store.revoke_users([self.user.id])
+        time.sleep(0.002)
+        issued = RefreshToken(self.user.get_token()['refresh_token'])
+
+        assert token_family_store.is_user_revoked(self.user.id, revoked.issued_at)
+        assert not token_family_store.is_user_revoked(self.user.id, issued.issued_at)
+        assert 'iat_ms' not in issued.access_token.payload
+
+    def test_토큰교체시바로기록(self):
+        refresh_token = RefreshToken(self.user.get_token()['refresh_token'])
+        tokens = rotate_tokens(refresh_token)
+
+        assert OutstandingToken.objects.filter(jti=RefreshToken(tokens['refresh_token'])['jti']).exists()
+
+    def test_토큰교체는DB에바로쓰지않음(self, settings, django_assert_num_queries):
+        settings.TOKEN_ISSUANCE = {**settings.TOKEN_ISSUANCE, 'OUTSTANDING_TOKENS': 'buffered'}
+        refresh_token = RefreshToken(self.user.get_token()['refresh_token'])
+        family = refresh_token['jti']
+
+        with django_assert_num_queries(0):
+            tokens = rotate_tokens(refresh_token)
+
+        rotated = RefreshToken(tokens['refresh_token'])
+
+        assert rotated[FAMILY_CLAIM] == family
+        assert rotated['jti'] != family
+
+        token_family_event_buffer.flush()
+
+        assert TokenFamilyEvent.objects.filter(family=family, event=TokenFamilyEvent.Event.ROTATED).count() == 1
+
+    def test_유예시간안의재시도는같은토큰(self):
+        encoded = self.user.get_token()['refresh_token']
+        rotated = rotate_tokens(RefreshToken(encoded))
+
+        assert rotate_tokens(RefreshToken(encoded)) == rotated
+
+        token_family_event_buffer.flush()
+
+        assert list(TokenFamilyEvent.objects.values_list('event', flat=True)) == ['rotated']
+
+    def test_재사용시family폐기(self, monkeypatch):
+        monkeypatch.setattr(token_family_store, 'grace_period', 0)
+        encoded = self.user.get_token()['refresh_token']
+        rotated = rotate_tokens(RefreshToken(encoded))
+
+        with pytest.raises(TokenError):
+            rotate_tokens(RefreshToken(encoded))
+
+        with pytest.raises(TokenError):
+            rotate_tokens(RefreshToken(rotated['refresh_token']))
+
+        token_family_event_buffer.flush()
+
+        assert list(TokenFamilyEvent.objects.order_by('id').values_list('event', flat=True)) == [
+            'rotated', 'reused', 'revoked'
+        ]
+
+
+@pytest.mark.django_db
+class TestBulkAccountChanges:
+
+    @pytest.fixture(autouse=True)
+    def setUpClass(self):
+        blacklist_index.reset()
+        self.users = [
+            baker.make(
+                User, email=f'bulk{i}@test.devgyurak', email_normalized=f'bulk{i}@test.devgyurak',
+                active_type_id=UserActiveType.TYPES.ACTIVE.value
+            )
+            for i in range(5)
+        ]
+        self.refresh_tokens = [user.get_token()['refresh_token'] for user in self.users]
+
+        yield
+
+        blacklist_index.reset()
+        User.objects.all().delete()
+
+    def test_탈퇴시리프레시토큰블랙리스트(self, settings, django_assert_max_num_queries):
+        settings.ACCOUNT_BULK_CHANGES = {'BATCH_SIZE': 2}
+        emails = [user.email for user in self.users[:4]]
+
+        # batch마다 유저 조회, UPDATE, 토큰 조회 및 bulk insert로 유저 수와 상관없이 정해진 수의 쿼리만 쓴다.
+        with django_assert_max_num_queries(4 * 2 + 2):
+            result = User.objects.change_active_type(emails, UserActiveType.TYPES.SECESSION.value)
+
+        assert result == {'updated': 4, 'revoked_tokens': 4}
+        assert User.objects.filter(active_type_id=UserActiveType.TYPES.SECESSION.value).count() == 4
+
+        for refresh_token in self.refresh_tokens[:4]:
+            with pytest.raises(TokenError):
+                RefreshToken(refresh_token)
+
+        RefreshToken(self.refresh_tokens[4])
+
+    def test_같은상태로변경은건너뜀(self):
+        result = User.objects.change_active_type([self.users[0].email], UserActiveType.TYPES.ACTIVE.value)
+
+        assert result == {'updated': 0, 'revoked_tokens': 0}
+
+    def test_로그아웃은한번만블랙리스트(self):
+        emails = [user.email for user in self.users]
+
+        assert User.objects.logout(emails) == 5
+        assert User.objects.logout(emails) == 0
+        assert BlacklistedToken.objects.count() == 5
+
+    def test_다른프로세스가저장하지않은토큰도폐기(self):
+        rotated = rotate_tokens(RefreshToken(self.refresh_tokens[0]))
+        token_family_event_buffer.flush()
+        # 다른 워커가 모아두고 아직 저장하지 않은 토큰 기록처럼 DB에서 지운다.
+        OutstandingToken.objects.filter(jti=RefreshToken(rotated['refresh_token'])['jti']).delete()
+
+        # 블랙리스트에는 처음 발급된 토큰만 올라간다.
+        assert User.objects.logout([self.users[0].email]) == 1
+
+        with pytest.raises(TokenError):
+            rotate_tokens(RefreshToken(rotated['refresh_token']))
+
+    def test_커맨드로탈퇴처리(self, tmp_path):
+        emails_file = tmp_path / 'emails.txt'
+        emails_file.write_text('\n'.join(user.email for user in self.users))
+        out = StringIO()
+
+        call_command('change_active_type', '--active-type', 'SECESSION', '--emails-file', str(emails_file), stdout=out)
+
+        assert 'updated: 5' in out.getvalue()
+        assert 'revoked tokens: 5' in out.getvalue()
+
+
+@pytest.mark.django_db
+class TestBatchTokenIssuance:
+
+    @pytest.fixture(autouse=True)
+    def setUpClass(self):
+        self.users = [
+            baker.make(
+                User, email=f'batch{i}@test.devgyurak', email_normalized=f'batch{i}@test.devgyurak',
+                active_type_id=UserActiveType.TYPES.ACTIVE.value
+            )
+            for i in range(4)
+        ]
+        self.inactive_user = baker.make(
+            User, email='batch-inactive@test.devgyurak', email_normalized='batch-inactive@test.devgyurak',
+            active_type_id=UserActiveType.TYPES.DEACTIVE.value
+        )
+
+        yield
+
+        User.objects.all().delete()
+
+    def test_batch마다조회와저장한번(self, settings, django_assert_num_queries):
+        settings.TOKEN_BATCH_ISSUANCE = {'BATCH_SIZE': 2, 'MAX_USERS': 100}
+        user_ids = [user.id for user in self.users]
+
+        # batch마다 유저 조회 한번과 OutstandingToken bulk insert 한번만 쓴다.
+        with django_assert_num_queries(2 * 2):
+            issued = dict(User.objects.issue_tokens(user_ids))
+
+        assert list(issued) == user_ids
+        assert OutstandingToken.objects.filter(user_id__in=user_ids).count() == 4
+
+        for user_id, tokens in issued.items():
+            assert RefreshToken(tokens['refresh_token'])['user_id'] == user_id
+
+    def test_없거나인증하지않은유저는None(self):
+        missing_user_id = max(user.id for user in self.users) + 100
+        issued = dict(User.objects.issue_tokens([self.inactive_user.id, missing_user_id, self.users[0].id]))
+
+        assert issued[self.inactive_user.id] is None
+        assert issued[missing_user_id] is None
+        assert issued[self.users[0].id] is not None
+        assert OutstandingToken.objects.count() == 1
+
+    def test_커맨드로발급(self):
+        out = StringIO()
+
+        call_command(
+            'issue_tokens', '--user-id', str(self.users[0].id), '--user-id', str(self.inactive_user.id),
+            stdout=out, stderr=StringIO()
+        )
+
+        lines = [json.loads(line) for line in out.getvalue().splitlines()]
+
+        assert lines[0]['user_id'] == self.users[0].id
+        assert 'refresh_token' in lines[0]
+        assert lines[1] == {
+            'user_id': self.inactive_user.id, 'error': 'user does not exist or is not authenticated.'
+        }
+
+
+@pytest.mark.django_db
+class TestSigningKeys:
+
+    @pytest.fixture(autouse=True)
+    def setUpClass(self, client):
+        get_key_ring().reset()
+        self.user = baker.make(User, active_type_id=UserActiveType.TYPES.ACTIVE.value)
+
+        self.verifier = JWKSVerifier('http://testserver/.well-known/jwks.json', min_refresh_interval=0)
+        self.verifier.fetch = lambda etag: self.fetch(client, etag)
+
+        yield
+
+        get_key_ring().reset()
+        User.objects.all().delete()
+
+    def fetch(self, client, etag):
+        response = client.get('/.well-known/jwks.json', HTTP_IF_NONE_MATCH=etag or '')
+
+        return response.status_code, dict(response.items()), response.content
+
+    def test_공개키로서명검증(self):
+        tokens = self.user.get_token()
+        header = jwt.get_unverified_header(tokens['access_token'])
+
+        assert header['alg'] == 'RS256'
+        assert header['kid'] == get_key_ring().current()[0].kid
+        assert self.verifier.verify(tokens['access_token'])['user_id'] == self.user.id
+
+        with pytest.raises(jwt.InvalidTokenError):
+            self.verifier.verify(tokens['refresh_token'])
+
+    def test_이전토큰검증(self):
+        legacy_token = str(BaseAccessToken.for_user(self.user))
+
+        assert 'kid' not in jwt.get_unverified_header(legacy_token)
+        assert AccessToken(legacy_token)['user_id'] == self.user.id
+
+    def test_서명키가없으면설정오류(self):
+        SigningKey.objects.all().delete()
+        get_key_ring().reset()
+
+        with pytest.raises(ImproperlyConfigured):
+            self.user.get_token()
+
+        assert not SigningKey.objects.exists()
+
+    def test_키교체(self):
+        old_access_token = self.user.get_token()['access_token']
+        old_kid = get_key_ring().current()[0].kid
+
+        first = rotate_signing_keys('EdDSA', timedelta(days=7))
+
+        assert first['retired'] == [old_kid]
+        assert len(first['created']) == 1
+
+        second = rotate_signing_keys('EdDSA', timedelta(days=7))
+        get_key_ring().reset()
+
+        assert second['retired'] == first['activated']
+        assert second['activated'] == first['created']
+
+        new_access_token = self.user.get_token()['access_token']
+
+        assert jwt.get_unverified_header(new_access_token) == {'alg': 'EdDSA', 'kid': first['created'][0], 'typ': 'JWT'}
+        assert AccessToken(old_access_token)['user_id'] == self.user.id
+        assert self.verifier.verify(old_access_token)['user_id'] == self.user.id
+        assert self.verifier.verify(new_access_token)['user_id'] == self.user.id
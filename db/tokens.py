@@ -0,0 +1,308 @@
+from datetime import datetime
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections, router
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import AccessToken as BaseAccessToken, RefreshToken as BaseRefreshToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from db.blacklist import blacklist_index
+from db.sharding import SHARD_CLAIM, is_sharded, shard_of
+
+
+logger = logging.getLogger(__name__)
+
+# 유저를 조회하지 않고 인증할 수 있도록 토큰에 담는 claim 이름. (db.authentication.ClaimsUser)
+ACTIVE_TYPE_CLAIM = 'active_type'
+IS_STAFF_CLAIM = 'is_staff'
+
+# 교체된 리프레시 토큰이 처음 발급된 토큰의 jti를 이어받는 claim 이름. (db.families)
+FAMILY_CLAIM = 'fam'
+
+# 유저를 폐기한 시각과 비교하도록 리프레시 토큰의 발급 시각을 밀리초 단위로 담는 claim 이름. (db.families)
+# iat는 초 단위라 같은 초에 폐기한 뒤 발급한 토큰과 폐기 전에 발급한 토큰을 구분할 수 없다.
+ISSUED_AT_MS_CLAIM = 'iat_ms'
+
+
+class SigningKeyMixin:
+    """
+    SIGNING_KEYS 설정의 토큰 백엔드(db.signing)로 서명하고 검증하는 토큰.
+    """
+    @property
+    def token_backend(self):
+        # db.signing은 db.models를 import하고 db.models는 이 모듈을 import하므로 쓸 때 import한다.
+        from db.signing import get_token_backend
+
+        return get_token_backend()
+
+
+class AccessToken(SigningKeyMixin, BaseAccessToken):
+    pass
+
+
+class RefreshToken(SigningKeyMixin, BaseRefreshToken):
+    """
+    블랙리스트 인덱스에 없는 토큰은 BlacklistedToken 테이블을 조회하지 않는 리프레시 토큰.\n
+    유저를 나눠 저장한다면 토큰 기록은 shard claim이 가리키는 유저의 shard에서 읽고 쓴다.
+    """
+    access_token_class = AccessToken
+    no_copy_claims = BaseRefreshToken.no_copy_claims + (ISSUED_AT_MS_CLAIM,)
+
+    @property
+    def shard(self) -> str | None:
+        """
+        유저를 나눠 저장할 때 토큰 기록이 저장된 shard. 나누지 않는다면 None이다.
+        """
+        return self.payload.get(SHARD_CLAIM)
+
+    @property
+    def issued_at(self) -> float:
+        """
+        토큰의 발급 시각(초). iat_ms claim이 없는 이전 토큰은 초 단위의 iat를 쓴다.
+        """
+        issued_at_ms = self.payload.get(ISSUED_AT_MS_CLAIM)
+
+        return issued_at_ms / 1000 if issued_at_ms is not None else self.payload['iat']
+
+    def set_iat(self, claim='iat', at_time=None):
+        super().set_iat(claim, at_time)
+
+        if claim == 'iat':
+            self.payload[ISSUED_AT_MS_CLAIM] = int((at_time or self.current_time).timestamp() * 1000)
+
+    def check_blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+
+        if not blacklist_index.might_contain(jti):
+            return
+
+        if BlacklistedToken.objects.db_manager(self.shard).filter(token__jti=jti).exists():
+            raise TokenError(_('Token is blacklisted'))
+
+    def blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+        token, created = OutstandingToken.objects.db_manager(self.shard).get_or_create(
+            jti=jti,
+            defaults={
+                'token': str(self),
+                'expires_at': datetime_from_epoch(self.payload['exp']),
+            }
+        )
+
+        return BlacklistedToken.objects.db_manager(self.shard).get_or_create(token=token)
+
+
+class ModelRowBuffer:
+    """
+    OutstandingToken 같은 기록용 row를 모아두었다가 백그라운드 스레드에서 한번에 저장하는 클래스.\n
+    flush_interval초마다, 또는 batch_size개가 모이면 모델과 DB별로 bulk_create로 저장한다.
+    """
+    def __init__(self, name: str, flush_interval: float, batch_size: int):
+        self.name = name
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+
+        self._lock = threading.Lock()
+        self._rows = []
+        self._wake = threading.Event()
+        self._flusher = None
+
+    def add(self, row, using: str | None = None) -> None:
+        self._ensure_flusher()
+
+        with self._lock:
+            self._rows.append((using, row))
+            is_full = len(self._rows) >= self.batch_size
+
+        if is_full:
+            self._wake.set()
+
+    def flush(self) -> int:
+        """
+        모아둔 기록을 저장하고 저장한 개수를 return하는 함수.
+        """
+        with self._lock:
+            rows, self._rows = self._rows, []
+
+        if not rows:
+            return 0
+
+        rows_by_shard = {}
+
+        for using, row in rows:
+            rows_by_shard.setdefault((type(row), using), []).append(row)
+
+        for (model, using), shard_rows in rows_by_shard.items():
+            model.objects.db_manager(using).bulk_create(
+                shard_rows, batch_size=self.batch_size, ignore_conflicts=True
+            )
+
+        return len(rows)
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._rows)
+
+    def _ensure_flusher(self) -> None:
+        with self._lock:
+            if self._flusher is None:
+                self._flusher = threading.Thread(
+                    target=self._run, name=self.name, daemon=True
+                )
+                self._flusher.start()
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+
+            try:
+                self.flush()
+            except Exception as e:
+                logger.exception(f'failed to flush {self.name}: {e}')
+            finally:
+                close_old_connections()
+
+
+outstanding_token_buffer = ModelRowBuffer(
+    name='outstanding-token-flusher',
+    flush_interval=settings.TOKEN_ISSUANCE['FLUSH_INTERVAL'],
+    batch_size=settings.TOKEN_ISSUANCE['FLUSH_BATCH_SIZE']
+)
+
+atexit.register(outstanding_token_buffer.flush)
+
+
+def build_outstanding_token(user_id: int, token: RefreshToken, encoded: str) -> OutstandingToken:
+    """
+    발급한 리프레시 토큰의 저장하지 않은 OutstandingToken 기록을 return하는 함수.
+    """
+    return OutstandingToken(
+        user_id=user_id,
+        jti=token[api_settings.JTI_CLAIM],
+        token=encoded,
+        created_at=token.current_time,
+        expires_at=datetime_from_epoch(token['exp'])
+    )
+
+
+def record_outstanding_token(user_id: int, token: RefreshToken, encoded: str, using: str | None = None) -> None:
+    """
+    TOKEN_ISSUANCE['OUTSTANDING_TOKENS'] 설정에 따라 발급한 리프레시 토큰을 기록하는 함수.\n
+    sync는 바로 저장, buffered는 모아서 저장, off는 기록하지 않는다. 유저를 나눠 저장한다면 using에 유저의 shard를 넘긴다.
+    """
+    mode = settings.TOKEN_ISSUANCE['OUTSTANDING_TOKENS']
+
+    if mode == 'off':
+        return
+
+    row = build_outstanding_token(user_id, token, encoded)
+
+    if mode == 'buffered':
+        outstanding_token_buffer.add(row, using=using)
+    else:
+        row.save(force_insert=True, using=using)
+
+
+def revoke_refresh_tokens(user_ids: list[int], using: str | None = None, batch_size: int = 1000) -> int:
+    """
+    유저들의 만료되지 않은 리프레시 토큰을 블랙리스트에 올리고 올린 토큰 수를 return하는 함수.\n
+    batch_size명씩 OutstandingToken을 한번에 조회해 BlacklistedToken을 bulk insert하며, 이 프로세스의 블랙리스트 인덱스에도 바로 넣는다.
+    다른 프로세스가 아직 저장하지 않은(buffered) 토큰이나 기록하지 않은(off) 토큰은 블랙리스트에 올릴 수 없으므로,
+    유저 단위 폐기 시각도 캐시에 저장해 그 전에 발급된 토큰을 재발급에 쓸 수 없게 한다. (db.families)
+    return하는 수는 블랙리스트에 올린 토큰 수다.
+    """
+    # db.families는 db.models를 import하고 db.models는 이 모듈을 import하므로 쓸 때 import한다.
+    from db.families import token_family_store
+
+    using = using or router.db_for_write(OutstandingToken)
+    now = timezone.now()
+    revoked_count = 0
+
+    token_family_store.revoke_users(user_ids, shard=using if is_sharded() else None)
+    outstanding_token_buffer.flush()
+
+    for start in range(0, len(user_ids), batch_size):
+        rows = list(
+            OutstandingToken.objects.using(using).filter(
+                user_id__in=user_ids[start:start + batch_size],
+                expires_at__gt=now,
+                blacklistedtoken__isnull=True
+            ).values_list('id', 'jti')
+        )
+
+        BlacklistedToken.objects.using(using).bulk_create(
+            [BlacklistedToken(token_id=id) for id, _ in rows], batch_size=batch_size, ignore_conflicts=True
+        )
+
+        for _, jti in rows:
+            blacklist_index.add(jti)
+
+        revoked_count += len(rows)
+
+    return revoked_count
+
+
+def create_tokens(user) -> tuple[RefreshToken, dict[str, str]]:
+    """
+    유저의 리프레시 토큰을 만들어 (리프레시 토큰, 엑세스 토큰 및 리프레시 토큰과 각 토큰의 만료일)을 return하는 함수.\n
+    토큰 기록은 저장하지 않는다.
+    """
+    refresh_token = RefreshToken()
+    refresh_token[api_settings.USER_ID_CLAIM] = user.id
+    refresh_token[ACTIVE_TYPE_CLAIM] = user.active_type_id
+    refresh_token[IS_STAFF_CLAIM] = user.is_staff
+
+    if is_sharded():
+        refresh_token[SHARD_CLAIM] = user._state.db
+
+    access_token = refresh_token.access_token
+    encoded_refresh_token = str(refresh_token)
+
+    return refresh_token, {
+        'access_token': str(access_token),
+        'access_token_expiration': datetime.fromtimestamp(access_token['exp']).isoformat(),
+        'refresh_token': encoded_refresh_token,
+        'refresh_token_expiration': datetime.fromtimestamp(refresh_token['exp']).isoformat()
+    }
+
+
+def issue_tokens(user) -> dict[str, str]:
+    """
+    유저의 엑세스 토큰 및 리프레시 토큰과 각 토큰의 만료일을 return하는 함수.
+    """
+    refresh_token, tokens = create_tokens(user)
+
+    record_outstanding_token(user.id, refresh_token, tokens['refresh_token'], using=shard_of(user))
+
+    return tokens
+
+
+def issue_tokens_in_bulk(users: list) -> dict[int, dict[str, str]]:
+    """
+    여러 유저의 토큰을 발급하고 유저 id별 토큰을 return하는 함수.\n
+    OutstandingToken 기록은 유저가 저장된 DB마다 bulk insert 한번으로 저장하며, TOKEN_ISSUANCE가 off라면 기록하지 않는다.
+    기록을 저장한 뒤에 return하므로 return된 토큰은 모두 블랙리스트에 올릴 수 있다.
+    """
+    issued = {}
+    rows_by_shard = {}
+
+    for user in users:
+        refresh_token, tokens = create_tokens(user)
+        issued[user.id] = tokens
+        rows_by_shard.setdefault(shard_of(user), []).append(
+            build_outstanding_token(user.id, refresh_token, tokens['refresh_token'])
+        )
+
+    if settings.TOKEN_ISSUANCE['OUTSTANDING_TOKENS'] != 'off':
+        for using, rows in rows_by_shard.items():
+            OutstandingToken.objects.db_manager(using).bulk_create(rows, batch_size=1000)
+
+    return issued
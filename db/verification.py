@@ -0,0 +1,151 @@
+from abc import ABC, abstractmethod
+from enum import Enum
+import hmac
+import secrets
+import string
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+
+from db.emails import normalize_email
+
+
+class CodeCheck(Enum):
+    VALID = 'valid'
+    INVALID = 'invalid'
+    MISSING = 'missing'
+    LOCKED = 'locked'
+
+
+class VerificationCodeStore(ABC):
+    """
+    이메일 인증 코드 저장소의 기본 클래스.\n
+    하위 클래스는 issue, reissue, get, check, discard를 구현해야 한다.
+    코드는 ttl초가 지나면 사라지며, max_attempts번 넘게 틀리면 더 이상 확인할 수 없다.
+    """
+    def __init__(self, ttl: int, max_attempts: int, length: int, reissue_interval: int):
+        self.ttl = ttl
+        self.max_attempts = max_attempts
+        self.length = length
+        self.reissue_interval = reissue_interval
+
+    def generate(self) -> str:
+        return ''.join(secrets.choice(string.digits) for _ in range(self.length))
+
+    @abstractmethod
+    def issue(self, email: str) -> str:
+        """
+        새 인증 코드를 만들어 저장하고 return하는 함수. 이전 코드와 틀린 횟수는 초기화된다.
+        """
+
+    @abstractmethod
+    def reissue(self, email: str) -> str | None:
+        """
+        reissue_interval초 안에 다시 발급한 적이 없다면 새 인증 코드를 return하고, 있다면 None을 return하는 함수.
+        """
+
+    @abstractmethod
+    def get(self, email: str) -> str | None:
+        """
+        아직 쓰지 않은 인증 코드를 return하는 함수. 만료됐거나 이미 썼다면 None을 return한다.\n
+        메일 대기열에 코드가 남지 않도록 메일을 보내는 워커가 이 함수로 코드를 꺼낸다.
+        """
+
+    @abstractmethod
+    def check(self, email: str, code: str) -> CodeCheck:
+        """
+        인증 코드를 확인하는 함수. 맞으면 코드를 지워 한번만 쓸 수 있게 한다.
+        """
+
+    @abstractmethod
+    def discard(self, emails: list[str]) -> None:
+        """
+        이메일들의 인증 코드와 틀린 횟수를 지우는 함수.
+        """
+
+
+class CacheVerificationCodeStore(VerificationCodeStore):
+    """
+    Django 캐시에 인증 코드와 틀린 횟수를 저장하는 저장소.\n
+    만료는 캐시 TTL에 맡기므로 따로 정리할 필요가 없고, 틀린 횟수는 여러 프로세스가 함께 세도록 cache.incr로 올린다.
+    """
+    def __init__(self, cache_alias: str, key_prefix: str, **kwargs):
+        super().__init__(**kwargs)
+        self.cache = caches[cache_alias]
+        self.key_prefix = key_prefix
+
+    def _key(self, email: str, kind: str) -> str:
+        return f'{self.key_prefix}:{kind}:{normalize_email(email)}'
+
+    def issue(self, email: str) -> str:
+        code = self.generate()
+
+        self.cache.set_many(
+            {self._key(email, 'code'): code, self._key(email, 'attempts'): 0},
+            timeout=self.ttl
+        )
+
+        return code
+
+    def reissue(self, email: str) -> str | None:
+        if not self.cache.add(self._key(email, 'reissued'), 1, timeout=self.reissue_interval):
+            return None
+
+        return self.issue(email)
+
+    def get(self, email: str) -> str | None:
+        return self.cache.get(self._key(email, 'code'))
+
+    def check(self, email: str, code: str) -> CodeCheck:
+        try:
+            attempts = self.cache.incr(self._key(email, 'attempts'))
+        except ValueError:
+            return CodeCheck.MISSING
+
+        if attempts > self.max_attempts:
+            return CodeCheck.LOCKED
+
+        stored_code = self.cache.get(self._key(email, 'code'))
+
+        if stored_code is None:
+            return CodeCheck.MISSING
+
+        if not hmac.compare_digest(stored_code, code):
+            return CodeCheck.INVALID
+
+        self.discard([email])
+
+        return CodeCheck.VALID
+
+    def discard(self, emails: list[str]) -> None:
+        self.cache.delete_many([
+            self._key(email, kind) for email in emails for kind in ('code', 'attempts')
+        ])
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_verification_code_store() -> VerificationCodeStore:
+    """
+    VERIFICATION_CODES 설정에 지정된 인증 코드 저장소를 return하는 함수.
+    """
+    global _store
+
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                config = settings.VERIFICATION_CODES
+                store_class = import_string(config['BACKEND'])
+                _store = store_class(
+                    ttl=config['TTL'],
+                    max_attempts=config['MAX_ATTEMPTS'],
+                    length=config['LENGTH'],
+                    reissue_interval=config['REISSUE_INTERVAL'],
+                    **config['OPTIONS']
+                )
+
+    return _store
@@ -0,0 +1,135 @@
+"""
+다른 파이썬 서비스가 인증 서버를 호출하지 않고 엑세스 토큰을 검증하는 도우미.
+
+Django 없이 PyJWT와 cryptography만 쓰므로 이 파일을 그대로 복사해 넣어도 된다.
+
+    verifier = JWKSVerifier('https://auth.example.com/.well-known/jwks.json')
+    payload = verifier.verify(token)  # 검증에 실패하면 jwt.InvalidTokenError
+
+공개 키는 프로세스 메모리에 두고, JWKS 응답의 Cache-Control max-age가 지나면 ETag로 바뀌었는지 확인한다.
+서명 키는 JWKS에 먼저 공개된 뒤 쓰이므로 보통은 캐시로 충분하며, 모르는 kid를 만나면
+min_refresh_interval초에 한번까지만 다시 받아온다. 인증 서버에 연결할 수 없으면 캐시한 키를 계속 쓴다.
+"""
+import json
+import re
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import jwt
+
+
+MAX_AGE_PATTERN = re.compile(r'max-age=(\d+)')
+
+
+class JWKSVerifier:
+    """
+    jwks_url의 공개 키로 토큰을 검증하는 클래스. 여러 스레드가 함께 써도 된다.
+    """
+    def __init__(
+        self,
+        jwks_url: str,
+        audience: str | None = None,
+        issuer: str | None = None,
+        leeway: float = 0,
+        token_type: str | None = 'access',
+        timeout: float = 2.0,
+        default_max_age: int = 300,
+        min_refresh_interval: float = 30.0
+    ):
+        self.jwks_url = jwks_url
+        self.audience = audience
+        self.issuer = issuer
+        self.leeway = leeway
+        self.token_type = token_type
+        self.timeout = timeout
+        self.default_max_age = default_max_age
+        self.min_refresh_interval = min_refresh_interval
+
+        self._lock = threading.Lock()
+        self._keys = {}
+        self._etag = None
+        self._expires_at = 0.0
+        self._fetched_at = None
+
+    def verify(self, token: str) -> dict:
+        """
+        토큰의 서명, 만료 및 종류를 검증하고 payload를 return하는 함수.
+        """
+        kid = jwt.get_unverified_header(token).get('kid')
+        key = self.get_key(kid)
+
+        if key is None:
+            raise jwt.InvalidTokenError(f'unknown signing key: {kid}')
+
+        algorithm, public_key = key
+        payload = jwt.decode(
+            token,
+            public_key,
+            algorithms=[algorithm],
+            audience=self.audience,
+            issuer=self.issuer,
+            leeway=self.leeway,
+            options={'verify_aud': self.audience is not None}
+        )
+
+        if self.token_type is not None and payload.get('token_type') != self.token_type:
+            raise jwt.InvalidTokenError('unexpected token type')
+
+        return payload
+
+    def get_key(self, kid: str | None) -> tuple[str, object] | None:
+        """
+        kid에 해당하는 (알고리즘, 공개 키)를 return하는 함수. 모르는 kid라면 None을 return한다.
+        """
+        if time.monotonic() >= self._expires_at:
+            self._refresh()
+        elif kid not in self._keys and time.monotonic() - self._fetched_at >= self.min_refresh_interval:
+            self._refresh()
+
+        return self._keys.get(kid)
+
+    def fetch(self, etag: str | None) -> tuple[int, dict[str, str], bytes]:
+        """
+        JWKS를 받아 (status, headers, body)를 return하는 함수. 테스트나 다른 HTTP 클라이언트를 쓸 때 덮어쓴다.
+        """
+        request = urllib.request.Request(self.jwks_url, headers={'If-None-Match': etag} if etag else {})
+
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return response.status, dict(response.headers), response.read()
+        except urllib.error.HTTPError as e:
+            if e.code == 304:
+                return 304, dict(e.headers), b''
+
+            raise
+
+    def _refresh(self) -> None:
+        with self._lock:
+            try:
+                status, headers, body = self.fetch(self._etag)
+            except (OSError, ValueError):
+                if not self._keys:
+                    raise
+
+                # 인증 서버에 연결할 수 없으면 캐시한 키를 쓰고 min_refresh_interval초 뒤에 다시 시도한다.
+                self._fetched_at = time.monotonic()
+                self._expires_at = self._fetched_at + self.min_refresh_interval
+                return
+
+            headers = {name.lower(): value for name, value in headers.items()}
+
+            if status != 304:
+                keys = {}
+
+                for jwk in json.loads(body)['keys']:
+                    keys[jwk['kid']] = (jwk['alg'], jwt.PyJWK(jwk, algorithm=jwk['alg']).key)
+
+                self._keys = keys
+                self._etag = headers.get('etag')
+
+            max_age = MAX_AGE_PATTERN.search(headers.get('cache-control', ''))
+
+            self._fetched_at = time.monotonic()
+            self._expires_at = self._fetched_at + (int(max_age.group(1)) if max_age else self.default_max_age)
@@ -2,6 +2,8 @@ from __future__ import absolute_import, unicode_literals
 from celery import Celery
 import os
 
+from django.conf import settings
+
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'login_is_boring.settings')
 
@@ -10,6 +12,21 @@ app = Celery('login_is_boring')
 app.config_from_object('django.conf:settings', namespace='CELERY')
 app.autodiscover_tasks()
 
+
+@app.on_after_finalize.connect
+def setup_periodic_tasks(sender, **kwargs):
+    sender.add_periodic_task(
+        settings.TOKEN_PRUNING['INTERVAL'],
+        sender.signature('db.tasks.task_prune_expired_tokens'),
+        name='prune-expired-tokens'
+    )
+    sender.add_periodic_task(
+        settings.EMAIL_OUTBOX['RELAY_INTERVAL'],
+        sender.signature('v1.accounts.tasks.task_relay_email_outbox'),
+        name='relay-email-outbox'
+    )
+
+
 @app.task(bind=True)
 def debug_task(self):
     print('Request: {0!r}'.format(self.request))
\ No newline at end of file
@@ -95,14 +95,33 @@ DATABASES = {
     }
 }
 
+# 워커 프로세스마다 요청 사이에 유지하는 DB 연결 설정 (db.connections).
+# CONN_MAX_AGE가 0이 아닐 때만 의미가 있으며, 요청 스레드가 MAX_PERSISTENT개보다 많으면 넘친 스레드의 연결은 요청이 끝날 때 닫는다.
+# HEALTH_CHECKS가 켜져 있으면 요청이 시작될 때 유지된 연결이 끊기지 않았는지 확인한다.
+# Django 3.2는 DATABASES의 CONN_HEALTH_CHECKS를 읽지 않으므로(4.1부터 지원) 이 설정으로 대신한다.
+DATABASE_CONNECTIONS = {
+    'MAX_PERSISTENT': env.int('DATABASE_MAX_PERSISTENT_CONNECTIONS', default=8),
+    'HEALTH_CHECKS': env.bool('DATABASE_CONN_HEALTH_CHECKS', default=False),
+}
+
+# 유저를 정규화한 이메일의 해시로 나눠 저장하는 데이터베이스 alias 목록 (db.sharding).
+# 첫번째는 default여야 하며, default에는 유저 외의 테이블도 함께 저장된다.
+USER_SHARDS = ['default']
+
+# 운영 환경에서는 CACHE_URL을 rediscache://host:port/db 형식으로 지정한다. (django-redis)
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+}
+
 
 REST_FRAMEWORK = {
     'DEFAULT_FILTER_BACKENDS': (
         'django_filters.rest_framework.DjangoFilterBackend',
     ),
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
-    )
+        'db.authentication.CachedJWTAuthentication',
+    ),
+    'EXCEPTION_HANDLER': 'v1.exceptions.exception_handler',
 }
 
 REST_USE_JWT = True
@@ -112,7 +131,95 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
     'ROTATE_REFRESH_TOKENS': False,
     'BLACKLIST_AFTER_ROTATION': True,
-    'TOKEN_USER_CLASS': 'db.User'
+    'TOKEN_USER_CLASS': 'db.User',
+    'AUTH_TOKEN_CLASSES': ('db.tokens.AccessToken',),
+}
+
+# 토큰 서명 키 설정 (db.signing).
+# ALGORITHM이 RS256 또는 EdDSA라면 DB의 SigningKey로 서명하고 /.well-known/jwks.json에 공개 키를 공개해,
+# 다른 서비스가 인증 서버를 호출하지 않고 토큰을 검증할 수 있게 한다. HS256이라면 SECRET_KEY로 서명한다.
+# 서명 키는 RELOAD_INTERVAL초마다 다시 읽으며, JWKS 응답은 JWKS_MAX_AGE초 동안 캐시하게 한다.
+# 서명 키는 요청 중에 만들지 않으므로 처음 배포할 때 migrate 다음에 rotate_signing_keys 커맨드로 키를 만든다.
+# rotate_signing_keys 커맨드는 JWKS_MAX_AGE보다 긴 간격으로 실행해야 새 키가 캐시에 먼저 퍼진다.
+# ACCEPT_LEGACY_TOKENS가 켜져 있으면 kid가 없는(SECRET_KEY로 서명한) 이전 토큰도 검증한다.
+SIGNING_KEYS = {
+    'ALGORITHM': env('JWT_SIGNING_ALGORITHM', default='RS256'),
+    'RELOAD_INTERVAL': env.float('JWT_SIGNING_KEYS_RELOAD_INTERVAL', default=60.0),
+    'JWKS_MAX_AGE': env.int('JWT_JWKS_MAX_AGE', default=3600),
+    'ACCEPT_LEGACY_TOKENS': env.bool('JWT_ACCEPT_LEGACY_TOKENS', default=True),
+}
+
+# 검증한 엑세스 토큰의 프로세스 내 LRU 캐시 (db.authentication.CachedJWTAuthentication).
+# 같은 토큰의 요청은 토큰이 만료될 때까지 서명 검증과 유저 조회를 건너뛰며, 최대 MAX_SIZE개까지 담는다.
+# CLAIMS_ONLY_USER를 켜면 토큰의 active_type, is_staff claim으로 유저를 만들어 처음 볼 때도 유저를 조회하지 않는다.
+JWT_AUTHENTICATION_CACHE = {
+    'MAX_SIZE': env.int('JWT_AUTHENTICATION_CACHE_MAX_SIZE', default=10000),
+    'CLAIMS_ONLY_USER': env.bool('JWT_AUTHENTICATION_CLAIMS_ONLY_USER', default=False),
+}
+
+# 같은 리프레시 토큰으로 동시에 들어온 재발급 요청을 한번만 처리하는 설정 (db.singleflight).
+# 재발급한 엑세스 토큰은 리프레시 토큰의 digest를 키로 캐시에 WINDOW초 동안 저장되며, 그동안 같은 요청에는 같은 토큰을 준다.
+# 다른 워커가 처리 중이라면 RECHECK_DELAY초 뒤에 한번만 결과를 다시 확인하고, 그래도 없으면 직접 발급한다.
+# 비동기 뷰에서는 기다리는 동안 요청 스레드가 멈추므로 RECHECK_DELAY는 발급 한번에 걸리는 시간 정도로 짧게 둔다.
+TOKEN_REFRESH_SINGLE_FLIGHT = {
+    'CACHE_ALIAS': 'default',
+    'KEY_PREFIX': 'refresh-flight',
+    'WINDOW': env.float('TOKEN_REFRESH_SINGLE_FLIGHT_WINDOW', default=3.0),
+    'RECHECK_DELAY': env.float('TOKEN_REFRESH_SINGLE_FLIGHT_RECHECK_DELAY', default=0.05),
+}
+
+# 리프레시 토큰 교체 설정 (db.families).
+# ROTATE가 켜져 있으면 토큰 재발급마다 리프레시 토큰도 새로 발급하고, 이미 교체된 토큰이 다시 오면 그 family를 모두 폐기한다.
+# family의 상태는 캐시에만 저장하며(simplejwt의 ROTATE_REFRESH_TOKENS는 DB 블랙리스트에 쓰므로 끈다),
+# 감사 기록(TokenFamilyEvent)은 AUDIT_FLUSH_INTERVAL초마다 모아서 저장하고, 새 토큰의 OutstandingToken은 TOKEN_ISSUANCE에 따라 기록한다.
+# 일괄 로그아웃과 활성화 정보 변경은 유저별 폐기 시각도 이 캐시에 저장해, 아직 기록되지 않은 토큰도 폐기한다.
+# 운영 환경의 캐시는 TTL이 남은 키를 내보내지 않도록(예: redis maxmemory-policy volatile-ttl 이상) 설정해야 한다.
+# 재사용 감지는 모든 워커가 같은 캐시를 볼 때만 동작하므로, ROTATE는 CACHE_ALIAS가 redis처럼 공유되는 캐시일 때만 켠다.
+# 교체한 지 GRACE_PERIOD초 안에 같은 토큰이 다시 오면 응답을 받지 못한 재시도로 보고 그때 발급한 토큰을 다시 준다.
+# GRACE_PERIOD는 TOKEN_REFRESH_SINGLE_FLIGHT의 WINDOW보다 길어야 한다.
+TOKEN_FAMILIES = {
+    'ROTATE': env.bool('TOKEN_FAMILIES_ROTATE', default=False),
+    'GRACE_PERIOD': env.float('TOKEN_FAMILIES_GRACE_PERIOD', default=10.0),
+    'CACHE_ALIAS': 'default',
+    'KEY_PREFIX': 'token-family',
+    'AUDIT_FLUSH_INTERVAL': env.float('TOKEN_FAMILIES_AUDIT_FLUSH_INTERVAL', default=1.0),
+    'AUDIT_BATCH_SIZE': env.int('TOKEN_FAMILIES_AUDIT_BATCH_SIZE', default=500),
+}
+
+# 여러 유저의 활성화 정보 변경과 로그아웃 설정 (UserManager.change_active_type, UserManager.logout).
+# BATCH_SIZE명씩 UPDATE 한번, OutstandingToken 조회 한번, BlacklistedToken bulk insert 한번으로 처리한다.
+ACCOUNT_BULK_CHANGES = {
+    'BATCH_SIZE': env.int('ACCOUNT_BULK_CHANGES_BATCH_SIZE', default=1000),
+}
+
+# 여러 유저의 토큰을 한번에 발급하는 설정 (UserManager.issue_tokens).
+# 서비스 계정이나 부하 테스트용 계정의 토큰을 BATCH_SIZE명씩 유저 조회 한번, OutstandingToken bulk insert 한번으로 발급하며,
+# API 요청 하나로는 MAX_USERS명까지 발급할 수 있다.
+TOKEN_BATCH_ISSUANCE = {
+    'BATCH_SIZE': env.int('TOKEN_BATCH_ISSUANCE_BATCH_SIZE', default=1000),
+    'MAX_USERS': env.int('TOKEN_BATCH_ISSUANCE_MAX_USERS', default=50000),
+}
+
+# 블랙리스트에 오른 리프레시 토큰 jti의 프로세스 내 블룸 필터 인덱스.
+# 필터에 없는 토큰은 BlacklistedToken 테이블을 조회하지 않는다.
+# 다른 프로세스에서 블랙리스트에 추가한 토큰은 최대 SYNC_INTERVAL초 뒤에 반영된다.
+# id가 커밋 순서와 다르게 매겨질 수 있으므로 동기화마다 직전 동기화 SYNC_LOOKBACK초 전부터 추가된 토큰을 다시 읽으며,
+# SYNC_LOOKBACK보다 오래 걸린 트랜잭션에 대비해 REBUILD_INTERVAL초마다 필터를 새로 만든다.
+TOKEN_BLACKLIST_INDEX = {
+    'CAPACITY': env.int('TOKEN_BLACKLIST_INDEX_CAPACITY', default=100000),
+    'ERROR_RATE': env.float('TOKEN_BLACKLIST_INDEX_ERROR_RATE', default=0.001),
+    'SYNC_INTERVAL': env.float('TOKEN_BLACKLIST_INDEX_SYNC_INTERVAL', default=5.0),
+    'SYNC_LOOKBACK': env.float('TOKEN_BLACKLIST_INDEX_SYNC_LOOKBACK', default=60.0),
+    'REBUILD_INTERVAL': env.float('TOKEN_BLACKLIST_INDEX_REBUILD_INTERVAL', default=3600.0),
+}
+
+# 발급한 리프레시 토큰(OutstandingToken)의 기록 방식.
+# sync: 로그인마다 바로 저장, buffered: 모아서 FLUSH_INTERVAL초마다 bulk insert, off: 기록하지 않음.
+# buffered, off에서는 로그인 요청이 DB에 쓰지 않는다.
+TOKEN_ISSUANCE = {
+    'OUTSTANDING_TOKENS': env('TOKEN_ISSUANCE_OUTSTANDING_TOKENS', default='sync'),
+    'FLUSH_INTERVAL': env.float('TOKEN_ISSUANCE_FLUSH_INTERVAL', default=1.0),
+    'FLUSH_BATCH_SIZE': env.int('TOKEN_ISSUANCE_FLUSH_BATCH_SIZE', default=500),
 }
 
 # Password validation
@@ -134,6 +241,41 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password hashers
+# https://docs.djangoproject.com/en/3.2/topics/auth/passwords/
+# 첫번째 해셔가 목표 해셔이며, 다른 해셔나 다른 WORK_FACTOR로 저장된 해시는
+# 로그인에 성공하면 백그라운드에서 다시 해싱된다.
+# bcrypt(db.hashers.TunableBCryptSHA256PasswordHasher)는 bcrypt 패키지를 설치한 뒤 PASSWORD_HASHER로 지정한다.
+
+PASSWORD_HASHER = env('PASSWORD_HASHER', default='db.hashers.TunablePBKDF2PasswordHasher')
+
+PASSWORD_HASHERS = [PASSWORD_HASHER] + [
+    hasher for hasher in (
+        'db.hashers.TunablePBKDF2PasswordHasher',
+        'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    ) if hasher != PASSWORD_HASHER
+]
+
+
+# Password hashing
+# 비밀번호 해싱/검증을 처리하는 백엔드 설정.
+# 순수 파이썬 해셔를 쓴다면 BACKEND를 'db.hashers.ProcessPoolHashingBackend'로 지정한다.
+# 대기열(MAX_QUEUE_SIZE)이 가득 찼거나 MAX_WAIT초 안에 처리되지 못한 요청은
+# 503과 Retry-After(RETRY_AFTER초) 헤더로 바로 거절한다.
+
+PASSWORD_HASHING = {
+    'BACKEND': env('PASSWORD_HASHING_BACKEND', default='db.hashers.ThreadPoolHashingBackend'),
+    'MAX_WORKERS': env.int('PASSWORD_HASHING_MAX_WORKERS', default=os.cpu_count() or 1),
+    'MAX_QUEUE_SIZE': env.int('PASSWORD_HASHING_MAX_QUEUE_SIZE', default=256),
+    'MAX_WAIT': env.float('PASSWORD_HASHING_MAX_WAIT', default=2.0),
+    'RETRY_AFTER': env.int('PASSWORD_HASHING_RETRY_AFTER', default=1),
+    # Tunable 해셔의 작업량. PBKDF2는 반복 횟수, bcrypt는 rounds이며 None이면 Django 기본값을 사용한다.
+    'WORK_FACTOR': env.int('PASSWORD_HASHING_WORK_FACTOR', default=None),
+    # 백그라운드 재해싱 대기 작업 수 한도. 넘치는 작업과 같은 유저의 중복 작업은 건너뛰고 다음 로그인 때 다시 시도한다.
+    'MAX_PENDING_REHASHES': env.int('PASSWORD_HASHING_MAX_PENDING_REHASHES', default=1000),
+}
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/3.2/topics/i18n/
 
@@ -166,6 +308,25 @@ CELERY_ACCEPT_CONTENT = ['json']
 
 CELERY_TASK_SERIALIZER = 'json'
 
+# 브로커 장애 시 셀러리 태스크를 쌓아두는 로컬 spool 설정 (v1.accounts.spool).
+# 브로커가 BROKER_TIMEOUT초 안에 응답하지 않으면 PATH의 SQLite 파일에 기록하고,
+# RETRY_INTERVAL초마다 BATCH_SIZE개씩 브로커로 다시 보낸다.
+TASK_SPOOL = {
+    'PATH': env.str('TASK_SPOOL_PATH', default=str(BASE_DIR / 'task_spool.sqlite3')),
+    'BROKER_TIMEOUT': env.float('TASK_SPOOL_BROKER_TIMEOUT', default=0.5),
+    'RETRY_INTERVAL': env.float('TASK_SPOOL_RETRY_INTERVAL', default=5.0),
+    'BATCH_SIZE': env.int('TASK_SPOOL_BATCH_SIZE', default=500),
+}
+
+# 만료된 토큰 기록 정리 태스크(db.tasks.task_prune_expired_tokens) 설정.
+# INTERVAL초마다 BATCH_SIZE개씩 최대 MAX_BATCHES번 지우며, batch 사이에 BATCH_PAUSE초 쉰다.
+TOKEN_PRUNING = {
+    'INTERVAL': env.float('TOKEN_PRUNING_INTERVAL', default=3600.0),
+    'BATCH_SIZE': env.int('TOKEN_PRUNING_BATCH_SIZE', default=1000),
+    'MAX_BATCHES': env.int('TOKEN_PRUNING_MAX_BATCHES', default=100),
+    'BATCH_PAUSE': env.float('TOKEN_PRUNING_BATCH_PAUSE', default=0.1),
+}
+
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 
 EMAIL_HOST = env('EMAIL_HOST')
@@ -178,4 +339,53 @@ EMAIL_USE_TLS = True
 
 EMAIL_PORT = 587
 
-DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
\ No newline at end of file
+DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
+
+# 이메일 인증 코드 저장소 설정 (db.verification).
+# 코드는 유저 테이블이 아닌 캐시에 TTL초 동안 저장되며, MAX_ATTEMPTS번 넘게 틀리면 다시 발급받아야 한다.
+# 재발급은 REISSUE_INTERVAL초에 한번만 할 수 있다.
+VERIFICATION_CODES = {
+    'BACKEND': env('VERIFICATION_CODES_BACKEND', default='db.verification.CacheVerificationCodeStore'),
+    'TTL': env.int('VERIFICATION_CODES_TTL', default=60 * 30),
+    'MAX_ATTEMPTS': env.int('VERIFICATION_CODES_MAX_ATTEMPTS', default=5),
+    'LENGTH': 6,
+    'REISSUE_INTERVAL': env.int('VERIFICATION_CODES_REISSUE_INTERVAL', default=60),
+    'OPTIONS': {
+        'cache_alias': 'default',
+        'key_prefix': 'verify-code',
+    },
+}
+
+# 비밀번호 없는 로그인 설정 (db.passwordless).
+# 로그인 링크 토큰과 코드는 TTL초 동안 한번만 쓸 수 있으며, 코드는 MAX_ATTEMPTS번 넘게 틀리면 다시 받아야 한다.
+# 다시 받는 것은 REISSUE_INTERVAL초에 한번만 할 수 있다.
+# LINK_URL이 있으면 메일에 LINK_URL?token=<링크 토큰> 형식의 링크를 담는다. (예: 프론트엔드의 로그인 페이지)
+PASSWORDLESS_LOGIN = {
+    'TTL': env.int('PASSWORDLESS_LOGIN_TTL', default=60 * 10),
+    'MAX_ATTEMPTS': env.int('PASSWORDLESS_LOGIN_MAX_ATTEMPTS', default=5),
+    'LENGTH': 6,
+    'REISSUE_INTERVAL': env.int('PASSWORDLESS_LOGIN_REISSUE_INTERVAL', default=60),
+    'LINK_URL': env('PASSWORDLESS_LOGIN_LINK_URL', default=''),
+    'OPTIONS': {
+        'cache_alias': 'default',
+        'key_prefix': 'passwordless-login',
+    },
+}
+
+# 회원가입 트랜잭션 안에서 기록한 메일(EmailOutbox)을 셀러리로 넘기는 설정.
+# 커밋 직후, 그리고 RELAY_INTERVAL초마다 BATCH_SIZE개씩 묶어 태스크 하나로 넘긴다.
+EMAIL_OUTBOX = {
+    'BATCH_SIZE': env.int('EMAIL_OUTBOX_BATCH_SIZE', default=100),
+    'RELAY_INTERVAL': env.float('EMAIL_OUTBOX_RELAY_INTERVAL', default=5.0),
+}
+
+# 인증 메일 전송 설정.
+# 워커 프로세스마다 SMTP 연결을 POOL_SIZE개까지 유지하며 메일을 BATCH_SIZE개씩 모아 보낸다.
+# 새로 연결할 때는 BATCH_WINDOW초 동안 메일을 더 모으며, IDLE_TIMEOUT초 동안 보낼 메일이 없으면 연결을 닫는다.
+EMAIL_DISPATCH = {
+    'POOL_SIZE': env.int('EMAIL_DISPATCH_POOL_SIZE', default=2),
+    'BATCH_SIZE': env.int('EMAIL_DISPATCH_BATCH_SIZE', default=50),
+    'BATCH_WINDOW': env.float('EMAIL_DISPATCH_BATCH_WINDOW', default=0.05),
+    'IDLE_TIMEOUT': env.float('EMAIL_DISPATCH_IDLE_TIMEOUT', default=30.0),
+    'SEND_TIMEOUT': env.float('EMAIL_DISPATCH_SEND_TIMEOUT', default=60.0),
+}
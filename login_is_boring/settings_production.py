@@ -0,0 +1,27 @@
+"""
+운영 환경 설정.
+
+DATABASE_URL의 DB 연결을 요청마다 새로 맺지 않고 DATABASE_CONN_MAX_AGE초 동안 유지하며,
+유지한 연결은 요청이 시작될 때 끊기지 않았는지 확인한다. (DATABASE_CONNECTIONS['HEALTH_CHECKS'], db.connections)
+워커마다 유지하는 연결 수는 DATABASE_MAX_PERSISTENT_CONNECTIONS이므로,
+DB의 최대 연결 수는 워커 수 x DATABASE_MAX_PERSISTENT_CONNECTIONS보다 커야 한다.
+"""
+from login_is_boring.settings import *  # noqa: F401,F403
+from login_is_boring.settings import BASE_DIR, DATABASE_CONNECTIONS, env
+
+
+DEBUG = env.bool('DEBUG', default=False)
+
+ALLOWED_HOSTS = env.list('ALLOWED_HOSTS', default=[])
+
+DATABASES = {
+    'default': {
+        **env.db('DATABASE_URL', default=f'sqlite:///{BASE_DIR / "db.sqlite3"}'),
+        'CONN_MAX_AGE': env.int('DATABASE_CONN_MAX_AGE', default=600),
+    },
+}
+
+DATABASE_CONNECTIONS = {
+    **DATABASE_CONNECTIONS,
+    'HEALTH_CHECKS': env.bool('DATABASE_CONN_HEALTH_CHECKS', default=True),
+}
@@ -0,0 +1,37 @@
+"""
+읽기 replica를 쓰는 설정.
+
+DATABASE_URL이 primary, DATABASE_REPLICA_URLS(쉼표로 구분)가 replica들이며,
+지정하지 않으면 SQLite 파일 여러 개로 primary와 replica를 흉내낸다.
+테스트에서는 replica가 primary의 테스트 DB를 그대로 가리킨다. (TEST MIRROR)
+"""
+from login_is_boring.settings import *  # noqa: F401,F403
+from login_is_boring.settings import BASE_DIR, MIDDLEWARE, env
+
+
+DATABASES = {
+    'default': env.db('DATABASE_URL', default=f'sqlite:///{BASE_DIR / "db.sqlite3"}'),
+}
+
+REPLICA_URLS = env.list(
+    'DATABASE_REPLICA_URLS',
+    default=[f'sqlite:///{BASE_DIR / "db_replica1.sqlite3"}', f'sqlite:///{BASE_DIR / "db_replica2.sqlite3"}']
+)
+
+for index, url in enumerate(REPLICA_URLS, start=1):
+    DATABASES[f'replica{index}'] = {**env.db_url_config(url), 'TEST': {'MIRROR': 'default'}}
+
+DATABASE_ROUTERS = ['db.routers.ReplicaRouter']
+
+# MODELS의 읽기만 replica로 보내며, replica는 CHECK_INTERVAL초마다 연결을 확인해 실패하면 RETRY_INTERVAL초 동안 제외한다.
+# 유저를 쓴 클라이언트는 STICKY_SECONDS초 동안 COOKIE_NAME 쿠키로 primary에서 읽는다.
+DATABASE_REPLICAS = {
+    'ALIASES': [alias for alias in DATABASES if alias != 'default'],
+    'MODELS': ['db.user', 'db.useractivetype'],
+    'CHECK_INTERVAL': env.float('DATABASE_REPLICA_CHECK_INTERVAL', default=5.0),
+    'RETRY_INTERVAL': env.float('DATABASE_REPLICA_RETRY_INTERVAL', default=30.0),
+    'STICKY_SECONDS': env.int('DATABASE_REPLICA_STICKY_SECONDS', default=5),
+    'COOKIE_NAME': 'replica_pin',
+}
+
+MIDDLEWARE = ['db.routers.ReplicaPinningMiddleware', *MIDDLEWARE]
@@ -0,0 +1,29 @@
+"""
+유저를 여러 데이터베이스에 나눠 저장하는 설정.
+
+DATABASE_URL이 default shard, USER_SHARD_URLS(쉼표로 구분)가 나머지 shard들이며,
+지정하지 않으면 SQLite 파일 여러 개로 shard를 흉내낸다.
+모든 shard에 같은 마이그레이션을 적용해야 한다. (migrate --database <alias>)
+테스트(--ds=login_is_boring.settings_shards)는 DB를 쓰지 않는 테스트와 모든 shard를 쓰는 테스트만 실행하고,
+DB 하나를 가정한 나머지 DB 테스트는 건너뛴다.
+"""
+from login_is_boring.settings import *  # noqa: F401,F403
+from login_is_boring.settings import BASE_DIR, env
+
+
+DATABASES = {
+    'default': env.db('DATABASE_URL', default=f'sqlite:///{BASE_DIR / "db.sqlite3"}'),
+}
+
+USER_SHARD_URLS = env.list(
+    'USER_SHARD_URLS',
+    default=[f'sqlite:///{BASE_DIR / "db_shard1.sqlite3"}', f'sqlite:///{BASE_DIR / "db_shard2.sqlite3"}']
+)
+
+for index, url in enumerate(USER_SHARD_URLS, start=1):
+    DATABASES[f'shard{index}'] = env.db_url_config(url)
+
+DATABASE_ROUTERS = ['db.routers.ShardRouter']
+
+# shard를 늘리거나 줄였다면 reshard_users 커맨드로 유저를 옮긴다.
+USER_SHARDS = list(DATABASES)
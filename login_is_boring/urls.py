@@ -19,6 +19,8 @@ from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 from rest_framework import permissions
 
+from v1.accounts.views import JWKSView
+
 
 schema_view = get_schema_view(
     openapi.Info(
@@ -36,5 +38,6 @@ schema_view = get_schema_view(
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('v1/', include('v1.urls')),
+    path('.well-known/jwks.json', JWKSView.as_view()),
     re_path(r'^swagger/$', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
 ]
@@ -0,0 +1,162 @@
+"""
+ASGI 환경을 위한 계정 API의 비동기 버전.
+
+DRF 3.13은 비동기 뷰를 지원하지 않으므로 Django 비동기 함수 뷰로 작성하고,
+요청/응답 형식과 에러 응답은 동기 뷰(v1.accounts.views)와 같게 맞춘다.
+DB 작업은 sync_to_async로, 비밀번호 해싱/검증은 해싱 백엔드(db.hashers)에서 처리해
+요청이 스레드를 점유하지 않게 한다.
+"""
+from functools import wraps
+import json
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.http import JsonResponse
+from rest_framework import exceptions, status
+
+from db.admission import AdmissionRejected
+from db.hashers import acheck_password, amake_password, schedule_rehash_if_needed
+from db.sharding import shard_for_email, shard_of
+from v1.accounts.serializers import (
+    SignUpSerializer, EmailVerifySerializer, VerifyCodeReissueSerializer, LoginSerializer, TokenRefreshSerializer
+)
+from v1.accounts.outbox import enqueue_email
+from v1.exceptions import ServiceUnavailable
+
+
+def async_api_view(view):
+    """
+    비동기 뷰에 POST 메서드 제한, JSON body 파싱 및 DRF 예외와 과부하 거절의 응답 변환을 적용하는 데코레이터.
+    """
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method != 'POST':
+            return JsonResponse(
+                {'detail': f'Method "{request.method}" not allowed.'},
+                status=status.HTTP_405_METHOD_NOT_ALLOWED
+            )
+
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError:
+            return JsonResponse({'detail': 'JSON parse error'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            return await view(request, data, *args, **kwargs)
+        except exceptions.ValidationError as e:
+            return JsonResponse(e.detail, status=e.status_code, safe=False)
+        except exceptions.APIException as e:
+            response = JsonResponse({'detail': e.detail}, status=e.status_code)
+
+            if getattr(e, 'wait', None):
+                response['Retry-After'] = '%d' % e.wait
+
+            return response
+        except AdmissionRejected as e:
+            exc = ServiceUnavailable(retry_after=e.retry_after)
+            response = JsonResponse({'detail': exc.detail}, status=exc.status_code)
+            response['Retry-After'] = str(exc.wait)
+
+            return response
+
+    # csrf_exempt 데코레이터는 동기 함수로 감싸버리므로 속성만 직접 지정한다.
+    wrapper.csrf_exempt = True
+
+    return wrapper
+
+
+@sync_to_async
+def _save_sign_up(serializer: SignUpSerializer, encoded_password: str) -> None:
+    shard = shard_for_email(serializer.validated_data['email'])
+
+    with transaction.atomic(using=shard):
+        user = serializer.save(encoded_password=encoded_password)
+        enqueue_email('sign_up_verify_code', {'email': user.email}, using=shard)
+
+
+@sync_to_async
+def _verify_email(email: str | None, data: dict) -> None:
+    serializer = EmailVerifySerializer(data=data)
+    serializer.is_valid(raise_exception=True)
+    serializer.verify(email)
+
+
+@sync_to_async
+def _reissue_verify_code(data: dict) -> None:
+    serializer = VerifyCodeReissueSerializer(data=data)
+    serializer.is_valid(raise_exception=True)
+    enqueue_email(
+        'sign_up_verify_code', serializer.reissue(), using=shard_for_email(serializer.validated_data['email'])
+    )
+
+
+@async_api_view
+async def sign_up(request, data):
+    """
+    회원가입 기능 비동기 API.\n회원가입에 성공하면 인증코드가 담긴 이메일을 전송해준다.
+    """
+    serializer = SignUpSerializer(data=data)
+    await sync_to_async(serializer.is_valid)(raise_exception=True)
+
+    encoded_password = await amake_password(serializer.validated_data['password'])
+    await _save_sign_up(serializer, encoded_password)
+
+    return JsonResponse({'detail': 'check your email'}, status=status.HTTP_201_CREATED)
+
+
+@async_api_view
+async def email_verify(request, data):
+    """
+    이메일 인증 비동기 API.\n
+    이메일로 전송된 코드를 body에 담아 전송한다.\n
+    이때 이메일은 query param으로 넘긴다.
+    """
+    await _verify_email(request.GET.get('email'), data)
+
+    return JsonResponse({'detail': 'success to verfiy'}, status=status.HTTP_200_OK)
+
+
+@async_api_view
+async def verify_code_reissue(request, data):
+    """
+    인증 코드 재발급 비동기 API.\n
+    미인증 유저의 이메일을 body에 담아 전송하면 새 인증 코드가 담긴 이메일을 전송해준다.
+    """
+    await _reissue_verify_code(data)
+
+    return JsonResponse({'detail': 'check your email'}, status=status.HTTP_200_OK)
+
+
+@async_api_view
+async def login(request, data):
+    """
+    로그인 비동기 API.\n
+    이메일과 비밀번호를 body에 담아 전송하면,
+    response로 access token, refresh token 그리고 각 토큰의 만료일을 넘겨준다.
+    """
+    serializer = LoginSerializer()
+    attrs = serializer.to_internal_value(data)
+
+    user = await sync_to_async(serializer.get_user)(attrs['email'])
+
+    if not await acheck_password(attrs['password'], user.password):
+        raise exceptions.AuthenticationFailed(detail='password does not match')
+
+    schedule_rehash_if_needed(user.id, attrs['password'], user.password, using=shard_of(user))
+
+    serializer.check_active_type(user)
+
+    return JsonResponse(await sync_to_async(user.get_token)(), status=status.HTTP_200_OK)
+
+
+@async_api_view
+async def token_refresh(request, data):
+    """
+    토큰 리프레시 비동기 API.\n
+    유저의 리프레시 토큰을 body에 담아 전송하면,
+    새로운 access token과 그 만료일을 넘겨준다. (리프레시 토큰을 교체한다면 새 refresh token도 함께)
+    """
+    serializer = TokenRefreshSerializer(data=data)
+    await sync_to_async(serializer.is_valid)(raise_exception=True)
+
+    return JsonResponse(serializer.validated_data, status=status.HTTP_200_OK)
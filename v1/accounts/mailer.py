@@ -0,0 +1,111 @@
+from concurrent.futures import Future
+import queue
+import smtplib
+import threading
+import time
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+
+
+class PooledMailer:
+    """
+    SMTP 연결을 pool_size개까지 오래 유지하면서 메일을 모아 보내는 클래스.\n
+    연결마다 전송 스레드가 하나씩 있으며, 한번에 batch_size개까지 같은 연결로 보낸다.
+    새로 연결해야 할 때는 핸드셰이크 비용을 나누도록 batch_window초 동안 메일을 더 모은다.
+    연결이 끊겼다면 다시 연결해 한번 더 시도하고, idle_timeout초 동안 보낼 메일이 없으면 연결을 닫는다.
+    """
+    def __init__(self, pool_size: int, batch_size: int, batch_window: float, idle_timeout: float):
+        self.pool_size = pool_size
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.idle_timeout = idle_timeout
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._senders = []
+
+    def send(self, message: EmailMessage, timeout: float | None = None) -> None:
+        """
+        메일을 보내고 전송이 끝날 때까지 기다린다. 전송에 실패하면 예외를 발생시킨다.
+        """
+        self.submit(message).result(timeout)
+
+    def submit(self, message: EmailMessage) -> Future:
+        future = Future()
+        self._queue.put((message, future))
+
+        with self._lock:
+            if len(self._senders) < self.pool_size:
+                sender = threading.Thread(target=self._run, name='pooled-mailer', daemon=True)
+                sender.start()
+                self._senders.append(sender)
+
+        return future
+
+    def _run(self) -> None:
+        connection = None
+
+        while True:
+            try:
+                batch = [self._queue.get(timeout=self.idle_timeout)]
+            except queue.Empty:
+                connection = self._close(connection)
+                continue
+
+            deadline = time.monotonic() + (self.batch_window if connection is None else 0)
+
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get(timeout=max(deadline - time.monotonic(), 0)))
+                except queue.Empty:
+                    break
+
+            connection = self._send_batch(connection, batch)
+
+    def _send_batch(self, connection, batch: list[tuple[EmailMessage, Future]]):
+        for message, future in batch:
+            try:
+                connection = self._send_with_reconnect(connection, message)
+            except Exception as e:
+                connection = self._close(connection)
+                future.set_exception(e)
+            else:
+                future.set_result(None)
+
+        return connection
+
+    def _send_with_reconnect(self, connection, message: EmailMessage):
+        try:
+            connection = connection or self._open()
+            connection.send_messages([message])
+        except (smtplib.SMTPServerDisconnected, ConnectionError):
+            # 서버가 유휴 연결을 끊었을 수 있으므로 새로 연결해 한번만 다시 보낸다.
+            self._close(connection)
+            connection = self._open()
+            connection.send_messages([message])
+
+        return connection
+
+    def _open(self):
+        connection = get_connection(fail_silently=False)
+        connection.open()
+
+        return connection
+
+    def _close(self, connection) -> None:
+        if connection is not None:
+            try:
+                connection.close()
+            except Exception:
+                pass
+
+        return None
+
+
+mailer = PooledMailer(
+    pool_size=settings.EMAIL_DISPATCH['POOL_SIZE'],
+    batch_size=settings.EMAIL_DISPATCH['BATCH_SIZE'],
+    batch_window=settings.EMAIL_DISPATCH['BATCH_WINDOW'],
+    idle_timeout=settings.EMAIL_DISPATCH['IDLE_TIMEOUT']
+)
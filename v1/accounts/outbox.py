@@ -0,0 +1,113 @@
+from collections import defaultdict
+import logging
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from db.models import EmailOutbox
+from db.sharding import get_shards
+from v1.accounts.spool import task_spool
+
+
+logger = logging.getLogger(__name__)
+
+# 메일 종류별로 payload 목록을 한번에 받는 셀러리 태스크.
+OUTBOX_TASKS = {
+    'sign_up_verify_code': 'v1.accounts.tasks.task_send_sign_up_verify_code_emails',
+    'login_code': 'v1.accounts.tasks.task_send_login_code_emails',
+}
+
+
+class OutboxRelay:
+    """
+    EmailOutbox에 쌓인 메일을 셀러리로 넘기는 클래스.\n
+    커밋 직후 깨어나거나 interval초마다 돌며, batch_size개씩 종류별로 묶어 태스크 하나로 보낸다.
+    브로커가 응답하지 않으면 태스크는 로컬 spool에 쌓이고, spool에도 기록하지 못하면 row가 남아 다음 차례에 다시 보낸다.
+    """
+    def __init__(self, batch_size: int, interval: float):
+        self.batch_size = batch_size
+        self.interval = interval
+
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._relay = None
+
+    def wake(self) -> None:
+        with self._lock:
+            if self._relay is None:
+                self._relay = threading.Thread(target=self._run, name='email-outbox-relay', daemon=True)
+                self._relay.start()
+
+        self._wake.set()
+
+    def drain(self) -> int:
+        """
+        모든 shard에 쌓인 메일을 셀러리로 넘기고 넘긴 개수를 return하는 함수.
+        """
+        return sum(self._drain(shard) for shard in get_shards())
+
+    def _drain(self, using: str) -> int:
+        relayed = 0
+
+        while True:
+            with transaction.atomic(using=using):
+                rows = list(
+                    EmailOutbox.objects.using(using).select_for_update(skip_locked=True)
+                    .order_by('id')[:self.batch_size]
+                )
+
+                if not rows:
+                    return relayed
+
+                rows_by_kind = defaultdict(list)
+
+                for row in rows:
+                    rows_by_kind[row.kind].append(row)
+
+                failure = None
+
+                # 종류마다 넘긴 직후 지우고, 넘기지 못하면 멈춰 이미 넘긴 종류의 삭제는 커밋한 뒤 예외를 올린다.
+                # 블록 안에서 예외를 올리면 앞서 넘긴 종류의 삭제까지 롤백돼 다음 차례에 같은 메일을 또 보낸다.
+                for kind, kind_rows in rows_by_kind.items():
+                    try:
+                        task_spool.send(OUTBOX_TASKS[kind], [[row.payload for row in kind_rows]])
+                    except Exception as e:
+                        failure = e
+                        break
+
+                    EmailOutbox.objects.using(using).filter(id__in=[row.id for row in kind_rows]).delete()
+                    relayed += len(kind_rows)
+
+            if failure is not None:
+                raise failure
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+            try:
+                self.drain()
+            except Exception as e:
+                logger.exception(f'failed to relay email outbox: {e}')
+            finally:
+                close_old_connections()
+
+
+outbox_relay = OutboxRelay(
+    batch_size=settings.EMAIL_OUTBOX['BATCH_SIZE'],
+    interval=settings.EMAIL_OUTBOX['RELAY_INTERVAL']
+)
+
+
+def enqueue_email(kind: str, payload: dict, using: str | None = None) -> EmailOutbox:
+    """
+    현재 트랜잭션 안에서 보낼 메일을 EmailOutbox에 기록하는 함수.\n
+    트랜잭션이 커밋되면 relay가 깨어나 셀러리로 넘기고, 롤백되면 메일도 함께 사라진다.
+    유저를 나눠 저장한다면 using에 유저의 shard를 넘겨 유저와 같은 트랜잭션에 기록한다.
+    """
+    row = EmailOutbox.objects.db_manager(using).create(kind=kind, payload=payload)
+    transaction.on_commit(outbox_relay.wake, using=using)
+
+    return row
@@ -1,11 +1,24 @@
+import json
 import re
 from datetime import datetime, timedelta
+from typing import Iterator
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import IntegrityError
 from rest_framework import serializers, exceptions
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
 
+from db.emails import normalize_email
+from db.families import rotate_tokens, token_family_store
+from db.hashers import make_password
 from db.models import UserActiveType
+from db.passwordless import get_passwordless_login_store
+from db.sharding import get_shards
+from db.singleflight import refresh_flight, token_digest
+from db.tokens import RefreshToken
+from db.verification import CodeCheck, get_verification_code_store
 
 
 User = get_user_model()
@@ -13,7 +26,7 @@ User = get_user_model()
 class SignUpSerializer(serializers.ModelSerializer):
     email = serializers.EmailField(help_text='이메일 입력')
     password = serializers.CharField(write_only=True, help_text='비밀번호 입력, 최소 8자, 영어 숫자 및 특수문자 한개 필수 포함.')
-    active_type = serializers.CharField(read_only=True, source='active_type.name', help_text='활성화 정보')
+    active_type = serializers.SerializerMethodField(help_text='활성화 정보')
     verify_code = serializers.CharField(read_only=True, help_text='회원 가입시 생성되는 인증 코드')
 
     def validate_username(self, username: str) -> str:
@@ -29,16 +42,6 @@ class SignUpSerializer(serializers.ModelSerializer):
 
         return username
 
-    def validate_email(self, email: str) -> str:
-        """
-        이메일의 유효성을 검사.\n
-        존재하는 이메일인지 아닌지를 검사한다.
-        """
-        if User.objects.filter(email=email).exists():
-            raise serializers.ValidationError('This email already exists.')
-
-        return email
-
     def validate_password(self, password: str) -> str:
         """
         비밀번호의 유효성을 검사.\n
@@ -54,8 +57,27 @@ class SignUpSerializer(serializers.ModelSerializer):
 
         return password
 
+    def get_active_type(self, user: User) -> str:
+        """
+        UserActiveType을 조회하지 않고 활성화 정보 레지스트리에서 이름을 읽는다.
+        """
+        return user.active_type_info.name
+
     def create(self, validated_data):
-        return User.objects.create_user(**validated_data)
+        """
+        중복된 이메일을 미리 조회하지 않고 바로 저장하며, unique 제약 위반을 400으로 바꾼다.\n
+        encoded_password가 넘어오면(미리 해싱한 비동기 뷰) 비밀번호를 다시 해싱하지 않는다.
+        IntegrityError 이후의 트랜잭션은 ValidationError가 뷰의 transaction.atomic 밖으로 전파되며 롤백된다.
+        """
+        password = validated_data.pop('password')
+        encoded_password = validated_data.pop('encoded_password', None) or make_password(password)
+
+        try:
+            return User.objects.create_user_with_encoded_password(
+                encoded_password=encoded_password, **validated_data
+            )
+        except IntegrityError:
+            raise serializers.ValidationError({'email': ['This email already exists.']})
 
     class Meta:
         model = User
@@ -65,21 +87,144 @@ class SignUpSerializer(serializers.ModelSerializer):
 class EmailVerifySerializer(serializers.Serializer):
     verify_code = serializers.CharField(help_text='회원 가입시 생성되는 인증 코드')
 
-    def update(self, instance, validated_data):
-        verify_code = validated_data['verify_code']
+    def verify(self, email: str | None) -> None:
+        """
+        이메일 인증을 처리하는 함수.\n
+        인증 코드는 인증 코드 저장소에서 확인하고 유저는 조건부 UPDATE 한번으로 인증한다.
+        저장소에 코드가 없다면 verify_code 컬럼에 코드가 저장된 이전 유저로 보고 컬럼으로 확인한다.
+        실패했을 때만 유저를 조회해 없는 유저(404)와 인증할 수 없는 이유(400)를 구분한다.
+        """
+        verify_code = self.validated_data['verify_code']
+        result = get_verification_code_store().check(email, verify_code) if email else CodeCheck.MISSING
+
+        if result == CodeCheck.VALID and User.objects.activate(email):
+            return
+
+        if result == CodeCheck.MISSING and email and User.objects.verify_email(email, verify_code):
+            return
 
-        if instance.active_type_id == UserActiveType.TYPES.ACTIVE.value:
+        user = User.objects.for_email(email or '').filter(
+            email_normalized=normalize_email(email or '')
+        ).values('active_type_id', 'verify_code').first()
+
+        if user is None:
+            raise exceptions.NotFound()
+
+        if user['active_type_id'] == UserActiveType.TYPES.ACTIVE.value:
             raise serializers.ValidationError({'detail': 'This user is already verified.'})
 
-        if instance.verify_code == verify_code:
-            instance.active_type_id = UserActiveType.TYPES.ACTIVE.value
-            instance.verify_code = None
+        if result == CodeCheck.LOCKED:
+            raise serializers.ValidationError({'detail': 'too many wrong verify codes, please request a new one.'})
 
-            instance.save(update_fields=('active_type', 'verify_code'))
-        else:
-            raise serializers.ValidationError({'detail': 'verify code is not correct.'})
+        if result == CodeCheck.MISSING and user['verify_code'] is None:
+            raise serializers.ValidationError({'detail': 'verify code has expired, please request a new one.'})
+
+        raise serializers.ValidationError({'detail': 'verify code is not correct.'})
+
+
+class VerifyCodeReissueSerializer(serializers.Serializer):
+    email = serializers.EmailField(help_text='인증 코드를 다시 받을 유저의 이메일')
+
+    def reissue(self) -> dict[str, str]:
+        """
+        미인증 유저의 인증 코드를 유저 테이블을 건드리지 않고 다시 발급하는 함수.\n
+        인증 코드는 메일을 보낼 때 저장소에서 꺼내므로 인증 메일에 담을 이메일만 return한다.
+        """
+        email = self.validated_data['email']
+        active_type_id = User.objects.for_email(email).filter(
+            email_normalized=normalize_email(email)
+        ).values_list('active_type_id', flat=True).first()
+
+        if active_type_id is None:
+            raise exceptions.NotFound()
+
+        if active_type_id == UserActiveType.TYPES.ACTIVE.value:
+            raise serializers.ValidationError({'detail': 'This user is already verified.'})
+
+        store = get_verification_code_store()
+
+        if store.reissue(email) is None:
+            raise exceptions.Throttled(wait=store.reissue_interval)
+
+        return {'email': email}
+
+
+class BulkEmailVerifySerializer(serializers.Serializer):
+    emails = serializers.ListField(
+        child=serializers.EmailField(), allow_empty=False, max_length=1000,
+        help_text='인증 처리할 유저의 이메일 목록, 최대 1000개.'
+    )
+
+    def verify(self) -> dict[str, int]:
+        """
+        미인증 유저들을 조건부 UPDATE 한번으로 인증 상태로 바꾸고 인증된 유저 수를 return하는 함수.
+        """
+        emails = self.validated_data['emails']
+
+        return {'requested': len(emails), 'verified': User.objects.verify_emails(emails)}
+
+
+class BulkActiveTypeChangeSerializer(serializers.Serializer):
+    emails = serializers.ListField(
+        child=serializers.EmailField(), allow_empty=False, max_length=1000,
+        help_text='활성화 정보를 바꿀 유저의 이메일 목록, 최대 1000개.'
+    )
+    active_type = serializers.ChoiceField(
+        choices=UserActiveType.TYPES.choices,
+        help_text='바꿀 활성화 정보 id (1: 이메일 인증 전, 2: 인증 완료, 3: 탈퇴)'
+    )
+
+    def change(self) -> dict[str, int]:
+        """
+        유저들의 활성화 정보를 한번에 바꾸고, 바뀐 유저 수와 블랙리스트에 올린 리프레시 토큰 수를 return하는 함수.
+        """
+        emails = self.validated_data['emails']
+
+        return {
+            'requested': len(emails),
+            **User.objects.change_active_type(emails, self.validated_data['active_type'])
+        }
+
+
+class BulkLogoutSerializer(serializers.Serializer):
+    emails = serializers.ListField(
+        child=serializers.EmailField(), allow_empty=False, max_length=1000,
+        help_text='로그아웃시킬 유저의 이메일 목록, 최대 1000개.'
+    )
+
+    def logout(self) -> dict[str, int]:
+        """
+        유저들의 리프레시 토큰을 한번에 블랙리스트에 올리고 올린 토큰 수를 return하는 함수.
+        """
+        emails = self.validated_data['emails']
+
+        return {'requested': len(emails), 'revoked_tokens': User.objects.logout(emails)}
 
-        return instance
+
+class BulkTokenIssueSerializer(serializers.Serializer):
+    user_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), allow_empty=False,
+        max_length=settings.TOKEN_BATCH_ISSUANCE['MAX_USERS'],
+        help_text=f"토큰을 발급할 유저 id 목록, 최대 {settings.TOKEN_BATCH_ISSUANCE['MAX_USERS']}개."
+    )
+    shard = serializers.ChoiceField(
+        choices=get_shards(), required=False,
+        help_text='유저를 나눠 저장할 때 유저가 저장된 데이터베이스 alias.'
+    )
+
+    def stream(self) -> Iterator[bytes]:
+        """
+        유저마다 토큰을 발급하며 한 줄에 유저 하나씩 NDJSON으로 yield하는 함수.
+        """
+        manager = User.objects.db_manager(self.validated_data.get('shard'))
+
+        for user_id, tokens in manager.issue_tokens(self.validated_data['user_ids']):
+            if tokens is None:
+                line = {'user_id': user_id, 'error': 'user does not exist or is not authenticated.'}
+            else:
+                line = {'user_id': user_id, **tokens}
+
+            yield json.dumps(line).encode() + b'\n'
 
 
 class LoginSerializer(serializers.Serializer):
@@ -92,19 +237,89 @@ class LoginSerializer(serializers.Serializer):
         email = validated_data.get('email')
         password = validated_data.get('password')
 
-        users = User.objects.filter(email=email)
-
-        if not users.exists():
-            raise exceptions.NotFound(detail='user does not exist')
-        
-        user = users.first()
+        user = self.get_user(email)
 
         if not user.check_password(password):
             raise exceptions.AuthenticationFailed(detail='password does not match')
         
+        self.check_active_type(user)
+
+        return user.get_token()
+
+    def get_user(self, email: str) -> User:
+        """
+        정규화한 이메일로 유저를 한번에 조회. 존재하지 않으면 404를 발생시킨다.
+        """
+        try:
+            return User.objects.get_by_email(email)
+        except User.DoesNotExist:
+            raise exceptions.NotFound(detail='user does not exist')
+
+    def check_active_type(self, user: User) -> None:
+        """
+        이메일 인증을 하지 않은 유저라면 401을 발생시킨다.
+        """
         if user.active_type_id == UserActiveType.TYPES.DEACTIVE.value:
             raise exceptions.AuthenticationFailed(detail='this user is not authenticated.')
 
+
+class PasswordlessLoginRequestSerializer(serializers.Serializer):
+    email = serializers.EmailField(help_text='비밀번호 없이 로그인할 유저의 이메일')
+
+    def issue(self) -> dict[str, str]:
+        """
+        로그인 nonce를 발급하고 로그인 메일을 만들 이메일과 nonce를 return하는 함수.\n
+        메일에 담을 코드와 링크는 메일을 보내는 워커가 nonce로 만든다.
+        """
+        email = self.validated_data['email']
+        active_type_id = User.objects.for_email(email).filter(
+            email_normalized=normalize_email(email)
+        ).values_list('active_type_id', flat=True).first()
+
+        if active_type_id is None:
+            raise exceptions.NotFound(detail='user does not exist')
+
+        if active_type_id != UserActiveType.TYPES.ACTIVE.value:
+            raise exceptions.AuthenticationFailed(detail='this user is not authenticated.')
+
+        store = get_passwordless_login_store()
+        nonce = store.issue(email)
+
+        if nonce is None:
+            raise exceptions.Throttled(wait=store.reissue_interval)
+
+        return {'email': email, 'nonce': nonce}
+
+
+class PasswordlessLoginSerializer(LoginSerializer):
+    email = serializers.EmailField(required=False, write_only=True, help_text='코드로 로그인할 때 유저의 이메일')
+    password = None
+    code = serializers.CharField(required=False, write_only=True, help_text='로그인 메일로 받은 코드')
+    token = serializers.CharField(required=False, write_only=True, help_text='로그인 메일의 링크에 담긴 토큰')
+
+    def validate(self, attrs):
+        """
+        링크 토큰 또는 이메일과 코드를 확인하고 로그인과 같은 토큰을 return한다. 비밀번호를 해싱하지 않는다.
+        """
+        store = get_passwordless_login_store()
+
+        if attrs.get('token'):
+            result, email = store.check_link(attrs['token'])
+        elif attrs.get('email') and attrs.get('code'):
+            email = attrs['email']
+            result = store.check_code(email, attrs['code'])
+        else:
+            raise serializers.ValidationError({'detail': 'token, or email and code are required.'})
+
+        if result == CodeCheck.LOCKED:
+            raise exceptions.AuthenticationFailed(detail='too many wrong login codes, please request a new one.')
+
+        if result != CodeCheck.VALID:
+            raise exceptions.AuthenticationFailed(detail='login code is wrong or has expired.')
+
+        user = self.get_user(email)
+        self.check_active_type(user)
+
         return user.get_token()
 
 
@@ -115,19 +330,38 @@ class TokenRefreshSerializer(serializers.Serializer):
         validated_data = super().validate(attrs)
         refresh_token = validated_data.get('refresh_token')
 
+        # 모바일 클라이언트의 재시도로 같은 토큰이 동시에 여러번 오면 한번만 발급하고 같은 엑세스 토큰을 준다.
+        return refresh_flight.do(token_digest(refresh_token), lambda: self.refresh(refresh_token))
+
+    def refresh(self, refresh_token: str) -> dict:
+        """
+        리프레시 토큰을 검증하고 새 엑세스 토큰과 그 만료일을 return하는 함수.\n
+        리프레시 토큰을 교체한다면 새 리프레시 토큰과 그 만료일도 함께 return한다.
+        """
         try:
             token_obj = RefreshToken(refresh_token)
         except:
             raise exceptions.AuthenticationFailed(detail='refresh token is wrong')
 
-        access_token = str(token_obj.access_token)
-        
+        if settings.TOKEN_FAMILIES['ROTATE']:
+            try:
+                return rotate_tokens(token_obj)
+            except TokenError:
+                raise exceptions.AuthenticationFailed(detail='refresh token has already been used')
+
+        if token_family_store.is_user_revoked(
+            token_obj[api_settings.USER_ID_CLAIM], token_obj.issued_at, token_obj.shard
+        ):
+            raise exceptions.AuthenticationFailed(detail='refresh token is wrong')
+
+        access_token = token_obj.access_token
+
         access_token_expiration = datetime.fromtimestamp(
-            token_obj.access_token.payload.get('exp')
+            access_token.payload.get('exp')
         ).isoformat()
 
         data = {
-            'access_token': access_token,
+            'access_token': str(access_token),
             'access_token_expiration': access_token_expiration,
         }
 
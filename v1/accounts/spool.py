@@ -0,0 +1,157 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+from celery import current_app
+from django.conf import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+class TaskSpool:
+    """
+    브로커가 응답하지 않을 때 셀러리 태스크를 로컬 SQLite 파일에 쌓아두는 클래스.\n
+    브로커에는 timeout초 안에 응답하지 않으면 재시도 없이 포기하고 바로 spool에 기록하며,
+    실패한 뒤 retry_interval초 동안은 브로커를 기다리지 않고 spool에 기록한다.
+    백그라운드 스레드가 retry_interval초마다 쌓인 태스크를 batch_size개씩 연결 하나로 다시 보낸다.
+    """
+    def __init__(self, path: str, timeout: float, retry_interval: float, batch_size: int):
+        self.path = path
+        self.timeout = timeout
+        self.retry_interval = retry_interval
+        self.batch_size = batch_size
+
+        self._lock = threading.Lock()
+        self._publish_lock = threading.Lock()
+        self._db = None
+        self._drainer = None
+        self._broker_down_until = 0.0
+        self._spooled = 0
+        self._replayed = 0
+
+    def send(self, task_name: str, args: list) -> bool:
+        """
+        태스크를 브로커로 보내고, 보내지 못했다면 spool에 기록한다. 브로커로 보냈다면 True를 return한다.
+        """
+        self._ensure_drainer()
+
+        if time.monotonic() >= self._broker_down_until:
+            try:
+                self._publish([(task_name, args)])
+                return True
+            except Exception as e:
+                self._mark_broker_down(e)
+
+        self._spool(task_name, args)
+
+        return False
+
+    def drain(self) -> int:
+        """
+        쌓인 태스크를 브로커로 다시 보내고 보낸 개수를 return하는 함수.\n
+        여러 프로세스가 같은 파일을 쓰므로 쓰기 잠금을 잡고 보내며, 보낸 row만 지운다.
+        """
+        replayed = 0
+
+        while True:
+            with self._lock:
+                db = self._connect()
+                db.execute('BEGIN IMMEDIATE')
+
+                try:
+                    rows = db.execute(
+                        'SELECT id, task_name, args FROM spooled_task ORDER BY id LIMIT ?', (self.batch_size,)
+                    ).fetchall()
+
+                    if rows:
+                        self._publish([(task_name, json.loads(args)) for _, task_name, args in rows])
+                        db.executemany('DELETE FROM spooled_task WHERE id = ?', [(row[0],) for row in rows])
+
+                    db.execute('COMMIT')
+                except Exception:
+                    db.execute('ROLLBACK')
+                    raise
+
+            if not rows:
+                return replayed
+
+            replayed += len(rows)
+            self._replayed += len(rows)
+
+    def depth(self) -> int:
+        with self._lock:
+            return self._connect().execute('SELECT COUNT(*) FROM spooled_task').fetchone()[0]
+
+    def stats(self) -> dict:
+        return {
+            'depth': self.depth(),
+            'spooled': self._spooled,
+            'replayed': self._replayed,
+            'broker_available': time.monotonic() >= self._broker_down_until,
+        }
+
+    def _publish(self, tasks: list[tuple[str, list]]) -> None:
+        with self._publish_lock:
+            with current_app.connection_for_write(
+                connect_timeout=self.timeout,
+                transport_options={
+                    'max_retries': 0,
+                    'socket_connect_timeout': self.timeout,
+                    'socket_timeout': self.timeout,
+                }
+            ) as connection:
+                producer = connection.Producer()
+
+                for task_name, args in tasks:
+                    current_app.send_task(task_name, args=args, producer=producer, retry=False)
+
+    def _spool(self, task_name: str, args: list) -> None:
+        with self._lock:
+            self._connect().execute(
+                'INSERT INTO spooled_task (task_name, args, created) VALUES (?, ?, ?)',
+                (task_name, json.dumps(args, ensure_ascii=False), time.time())
+            )
+            self._spooled += 1
+
+    def _mark_broker_down(self, error: Exception) -> None:
+        logger.warning(f'broker is unavailable, spooling tasks for {self.retry_interval}s: {error}')
+        self._broker_down_until = time.monotonic() + self.retry_interval
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            db = sqlite3.connect(str(self.path), timeout=self.timeout, isolation_level=None, check_same_thread=False)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute(
+                'CREATE TABLE IF NOT EXISTS spooled_task ('
+                'id INTEGER PRIMARY KEY AUTOINCREMENT, task_name TEXT NOT NULL, args TEXT NOT NULL, created REAL NOT NULL)'
+            )
+            self._db = db
+
+        return self._db
+
+    def _ensure_drainer(self) -> None:
+        if self._drainer is None:
+            with self._lock:
+                if self._drainer is None:
+                    self._drainer = threading.Thread(target=self._run, name='task-spool-drainer', daemon=True)
+                    self._drainer.start()
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.retry_interval)
+
+            try:
+                self.drain()
+            except Exception as e:
+                self._mark_broker_down(e)
+
+
+task_spool = TaskSpool(
+    path=settings.TASK_SPOOL['PATH'],
+    timeout=settings.TASK_SPOOL['BROKER_TIMEOUT'],
+    retry_interval=settings.TASK_SPOOL['RETRY_INTERVAL'],
+    batch_size=settings.TASK_SPOOL['BATCH_SIZE']
+)
@@ -1,26 +1,108 @@
+import logging
+
 from celery import shared_task
 
-from django.core.mail import send_mail
+from django.core.mail import EmailMessage
 from django.conf import settings
 
+from db.passwordless import get_passwordless_login_store
+from db.verification import get_verification_code_store
+from v1.accounts.mailer import mailer
+from v1.accounts.outbox import outbox_relay
+
+
+logger = logging.getLogger(__name__)
 
 DEFAULT_FROM_EMAIL = settings.DEFAULT_FROM_EMAIL
 
+def build_sign_up_verify_code_email(payload: dict) -> EmailMessage | None:
+    """
+    회원가입 이메일 인증 메일을 만드는 함수.\n
+    인증 코드는 메일 대기열에 남지 않도록 여기서 저장소에서 꺼내며, 만료됐거나 이미 인증했다면 None을 return한다.
+    """
+    verify_code = get_verification_code_store().get(payload['email'])
+
+    if verify_code is None:
+        logger.info(f"skipped verify code email to {payload['email']}: no pending code")
+        return None
+
+    return EmailMessage(
+        subject='회원가입 인증 메일입니다.',
+        body=f"{verify_code}\n해당 문자를 다른 사람과 공유하지 마십시오.",
+        from_email=DEFAULT_FROM_EMAIL,
+        to=[payload['email'], ]
+    )
+
+
 @shared_task
-def task_send_sign_up_verify_code_email(serializer_data: dict) -> None:
+def task_send_sign_up_verify_code_email(payload: dict) -> None:
     """
-    회원가입 이메일 인증 메일을 보내는 셀러리 태스크.
+    회원가입 이메일 인증 메일을 보내는 셀러리 태스크.\n
+    워커 프로세스마다 유지되는 SMTP 연결로 보낸다.
     """
     try:
-        verify_code = serializer_data['verify_code']
-        email = serializer_data['email']
-        
-        send_mail(
-            subject='회원가입 인증 메일입니다.',
-            message=f'{verify_code}\n해당 문자를 다른 사람과 공유하지 마십시오.',
-            from_email=DEFAULT_FROM_EMAIL,
-            recipient_list=[email, ],
-            fail_silently=True
-        )
+        email = payload['email']
+        message = build_sign_up_verify_code_email(payload)
+
+        if message is not None:
+            mailer.send(message, timeout=settings.EMAIL_DISPATCH['SEND_TIMEOUT'])
     except Exception as e:
-        print(f'something went wrong at celery task!\nusername: {email}\nerror: {e}')
\ No newline at end of file
+        logger.exception(f'failed to send email to {email}: {e}')
+
+
+def build_login_code_email(payload: dict) -> EmailMessage:
+    """
+    비밀번호 없는 로그인 메일을 만드는 함수.\n
+    코드와 링크는 메일 대기열에 남지 않도록 payload의 nonce로 여기서 만든다.
+    """
+    token, code = get_passwordless_login_store().render(payload['email'], payload['nonce'])
+    link_url = settings.PASSWORDLESS_LOGIN['LINK_URL']
+    body = f"{code}\n해당 문자를 다른 사람과 공유하지 마십시오."
+
+    if link_url:
+        body += f"\n\n아래 링크로도 로그인할 수 있습니다.\n{link_url}?token={token}"
+
+    return EmailMessage(
+        subject='로그인 인증 메일입니다.',
+        body=body,
+        from_email=DEFAULT_FROM_EMAIL,
+        to=[payload['email'], ]
+    )
+
+
+def send_emails(messages: list[EmailMessage]) -> None:
+    """
+    모든 메일을 워커 프로세스마다 유지되는 SMTP 연결 하나로 보내는 함수.
+    """
+    futures = [(message.to[0], mailer.submit(message)) for message in messages]
+
+    for email, future in futures:
+        try:
+            future.result(settings.EMAIL_DISPATCH['SEND_TIMEOUT'])
+        except Exception as e:
+            logger.exception(f'failed to send email to {email}: {e}')
+
+
+@shared_task
+def task_send_sign_up_verify_code_emails(payload_list: list[dict]) -> None:
+    """
+    여러 회원가입 이메일 인증 메일을 한번에 보내는 셀러리 태스크.
+    """
+    messages = [build_sign_up_verify_code_email(payload) for payload in payload_list]
+    send_emails([message for message in messages if message is not None])
+
+
+@shared_task
+def task_send_login_code_emails(payload_list: list[dict]) -> None:
+    """
+    여러 비밀번호 없는 로그인 메일을 한번에 보내는 셀러리 태스크.
+    """
+    send_emails([build_login_code_email(payload) for payload in payload_list])
+
+
+@shared_task
+def task_relay_email_outbox() -> int:
+    """
+    웹 프로세스가 넘기지 못하고 EmailOutbox에 남은 메일을 주기적으로 셀러리로 넘기는 태스크.
+    """
+    return outbox_relay.drain()
@@ -0,0 +1,189 @@
+import pytest
+from model_bakery import baker
+
+from django.contrib.auth import get_user_model
+
+from db.models import UserActiveType
+
+
+User = get_user_model()
+
+
+@pytest.mark.django_db
+class TestAsyncSignUpView:
+
+    @pytest.fixture(autouse=True)
+    def setUpClass(self):
+        self.user = baker.make(
+            User, username='테스트', email='test@test.devgyurak',
+            nickname='테스트 유저', active_type_id=UserActiveType.TYPES.DEACTIVE.value
+        )
+        self.url = '/v1/accounts/async/sign-up'
+
+        yield
+
+        User.objects.all().delete()
+
+    def test_중복된이메일유저생성(self, client):
+        payload = {
+            'email': 'test@test.devgyurak',
+            'username': '테스트',
+            'nickname': '테스트 유저',
+            'password': 'test777!'
+        }
+
+        response = client.post(
+            self.url,
+            payload,
+            content_type='application/json'
+        )
+
+        assert response.status_code == 400
+        assert response.json().get('email')[0] == 'This email already exists.'
+
+    def test_잘못된메서드로요청(self, client):
+        response = client.get(self.url)
+
+        assert response.status_code == 405
+
+
+@pytest.mark.django_db
+class TestAsyncEmailVerifyView:
+
+    @pytest.fixture(autouse=True)
+    def setUpClass(self):
+        self.url = '/v1/accounts/async/email-verify'
+        self.deactive_user = baker.make(
+            User, username='테스트', email='test1@test.devgyurak',
+            nickname='미인증 테스트 유저', verify_code='000000', active_type_id=UserActiveType.TYPES.DEACTIVE.value
+        )
+
+        yield
+
+        User.objects.all().delete()
+
+    def test_존재하지않는유저이메일인증(self, client):
+        response = client.post(
+            f'{self.url}?email=test@test.devgyurak',
+            {'verify_code': '000000'},
+            content_type='application/json'
+        )
+
+        assert response.status_code == 404
+
+    def test_유저이메일인증(self, client):
+        response = client.post(
+            f'{self.url}?email={self.deactive_user.email}',
+            {'verify_code': '000000'},
+            content_type='application/json'
+        )
+
+        self.deactive_user.refresh_from_db()
+
+        assert response.status_code == 200
+        assert self.deactive_user.active_type_id == UserActiveType.TYPES.ACTIVE.value
+
+
+@pytest.mark.django_db
+class TestAsyncLoginView:
+
+    @pytest.fixture(autouse=True)
+    def setUpClass(self):
+        self.url = '/v1/accounts/async/login'
+        self.deactive_user = baker.make(
+            User, username='미인증', email='test1@test.devgyurak',
+            active_type_id=UserActiveType.TYPES.DEACTIVE.value
+        )
+        self.active_user = baker.make(
+            User, username='인증', email='test2@test.devgyurak',
+            active_type_id=UserActiveType.TYPES.ACTIVE.value
+        )
+
+        self.deactive_user.set_password('test123!')
+        self.active_user.set_password('test123!')
+
+        self.deactive_user.save()
+        self.active_user.save()
+
+        yield
+
+        User.objects.all().delete()
+
+    def test_존재하지않는계정로그인(self, client):
+        response = client.post(
+            self.url,
+            {'email': 'test@test.devgyurak', 'password': 'test123!'},
+            content_type='application/json'
+        )
+
+        assert response.status_code == 404
+
+    def test_미인증유저로그인(self, client):
+        response = client.post(
+            self.url,
+            {'email': 'test1@test.devgyurak', 'password': 'test123!'},
+            content_type='application/json'
+        )
+
+        assert response.status_code == 401
+
+    def test_잘못된비밀번호로그인(self, client):
+        response = client.post(
+            self.url,
+            {'email': 'test2@test.devgyurak', 'password': 'test123!!'},
+            content_type='application/json'
+        )
+
+        assert response.status_code == 401
+
+    def test_로그인(self, client):
+        response = client.post(
+            self.url,
+            {'email': 'test2@test.devgyurak', 'password': 'test123!'},
+            content_type='application/json'
+        )
+
+        body = response.json()
+
+        assert response.status_code == 200
+        assert body.get('access_token') is not None
+        assert body.get('refresh_token') is not None
+
+
+@pytest.mark.django_db
+class TestAsyncTokenRefreshView:
+
+    @pytest.fixture(autouse=True)
+    def setUpClass(self):
+        self.url = '/v1/accounts/async/token-refresh'
+        self.user = baker.make(
+            User, username='테스트', email='test@test.devgyurak',
+            active_type_id=UserActiveType.TYPES.ACTIVE.value
+        )
+
+        yield
+
+        User.objects.all().delete()
+
+    def test_토큰재발급(self, client):
+        tokens = self.user.get_token()
+
+        response = client.post(
+            self.url,
+            {'refresh_token': tokens.get('refresh_token')},
+            content_type='application/json'
+        )
+
+        assert response.status_code == 200
+        assert response.json().get('access_token') is not None
+
+    def test_잘못된토큰으로재발급시도(self, client):
+        tokens = self.user.get_token()
+
+        response = client.post(
+            self.url,
+            {'refresh_token': tokens.get('refresh_token')[:-1]},
+            content_type='application/json'
+        )
+
+        assert response.status_code == 401
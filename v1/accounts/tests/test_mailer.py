@@ -0,0 +1,103 @@
+import smtplib
+
+import mock
+import pytest
+
+from django.core import mail
+
+from db.verification import get_verification_code_store
+from v1.accounts.mailer import PooledMailer
+from v1.accounts.tasks import (
+    build_sign_up_verify_code_email, task_send_sign_up_verify_code_email,
+    task_send_sign_up_verify_code_emails
+)
+
+
+class FlakyConnection:
+    """
+    첫 전송에서 서버가 연결을 끊은 것처럼 동작하는 SMTP 연결.
+    """
+    opened = 0
+
+    def __init__(self, *args, **kwargs):
+        FlakyConnection.opened += 1
+        self.is_first_connection = FlakyConnection.opened == 1
+        self.sent = []
+
+    def open(self):
+        return True
+
+    def close(self):
+        pass
+
+    def send_messages(self, messages):
+        if self.is_first_connection:
+            raise smtplib.SMTPServerDisconnected('Connection unexpectedly closed')
+
+        self.sent.extend(messages)
+
+        return len(messages)
+
+
+class TestPooledMailer:
+
+    @pytest.fixture(autouse=True)
+    def setUpClass(self):
+        self.mailer = PooledMailer(pool_size=1, batch_size=10, batch_window=0, idle_timeout=30)
+        self.payload = {'email': 'test@test.devgyurak'}
+        self.verify_code = get_verification_code_store().issue(self.payload['email'])
+
+        yield
+
+        mail.outbox = []
+
+    def test_메일전송(self):
+        self.mailer.send(build_sign_up_verify_code_email(self.payload), timeout=5)
+
+        assert len(mail.outbox) == 1
+        assert mail.outbox[0].to == ['test@test.devgyurak']
+        assert mail.outbox[0].body.startswith(self.verify_code)
+
+    def test_연결이끊기면다시연결해재전송(self):
+        FlakyConnection.opened = 0
+
+        with mock.patch('v1.accounts.mailer.get_connection', FlakyConnection):
+            self.mailer.send(build_sign_up_verify_code_email(self.payload), timeout=5)
+
+        assert FlakyConnection.opened == 2
+
+    def test_인증메일태스크(self):
+        with mock.patch('v1.accounts.tasks.mailer', self.mailer):
+            task_send_sign_up_verify_code_email(self.payload)
+
+        assert len(mail.outbox) == 1
+
+    def test_인증메일여러개한번에전송(self):
+        payloads = [{'email': f'test{i}@test.devgyurak'} for i in range(3)]
+
+        for payload in payloads:
+            get_verification_code_store().issue(payload['email'])
+
+        with mock.patch('v1.accounts.tasks.mailer', self.mailer):
+            task_send_sign_up_verify_code_emails(payloads)
+
+        assert sorted(message.to[0] for message in mail.outbox) == [
+            'test0@test.devgyurak', 'test1@test.devgyurak', 'test2@test.devgyurak'
+        ]
+
+    def test_전송실패는로그로남김(self, caplog):
+        failing_mailer = mock.Mock()
+        failing_mailer.submit.return_value.result.side_effect = smtplib.SMTPServerDisconnected('closed')
+
+        with mock.patch('v1.accounts.tasks.mailer', failing_mailer):
+            task_send_sign_up_verify_code_emails([self.payload])
+
+        assert 'failed to send email to test@test.devgyurak' in caplog.text
+
+    def test_인증코드가없으면메일을보내지않음(self):
+        get_verification_code_store().discard([self.payload['email']])
+
+        with mock.patch('v1.accounts.tasks.mailer', self.mailer):
+            task_send_sign_up_verify_code_emails([self.payload])
+
+        assert mail.outbox == []
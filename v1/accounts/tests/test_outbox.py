@@ -0,0 +1,59 @@
+import sqlite3
+
+import mock
+import pytest
+
+from db.models import EmailOutbox
+from v1.accounts.outbox import OutboxRelay
+
+
+@pytest.mark.django_db
+class TestOutboxRelay:
+
+    @pytest.fixture(autouse=True)
+    def setUpClass(self):
+        self.relay = OutboxRelay(batch_size=2, interval=60)
+        self.payloads = [
+            {'email': f'test{i}@test.devgyurak'} for i in range(3)
+        ]
+
+        for payload in self.payloads:
+            EmailOutbox.objects.create(kind='sign_up_verify_code', payload=payload)
+
+        yield
+
+        EmailOutbox.objects.all().delete()
+
+    def test_모아서셀러리로전송(self):
+        with mock.patch('v1.accounts.outbox.task_spool.send') as send:
+            relayed = self.relay.drain()
+
+        assert relayed == 3
+        assert send.call_args_list == [
+            mock.call('v1.accounts.tasks.task_send_sign_up_verify_code_emails', [self.payloads[:2]]),
+            mock.call('v1.accounts.tasks.task_send_sign_up_verify_code_emails', [self.payloads[2:]]),
+        ]
+        assert not EmailOutbox.objects.exists()
+
+    def test_전송실패시기록유지(self):
+        with mock.patch(
+            'v1.accounts.outbox.task_spool.send', side_effect=sqlite3.OperationalError('disk I/O error')
+        ):
+            with pytest.raises(sqlite3.OperationalError):
+                self.relay.drain()
+
+        assert EmailOutbox.objects.count() == 3
+
+    def test_전송한종류는실패와상관없이삭제(self):
+        EmailOutbox.objects.all().delete()
+        EmailOutbox.objects.create(kind='sign_up_verify_code', payload=self.payloads[0])
+        EmailOutbox.objects.create(kind='login_code', payload={'email': 'test@test.devgyurak', 'nonce': 'nonce'})
+
+        with mock.patch(
+            'v1.accounts.outbox.task_spool.send',
+            side_effect=[None, sqlite3.OperationalError('disk I/O error')]
+        ):
+            with pytest.raises(sqlite3.OperationalError):
+                self.relay.drain()
+
+        assert list(EmailOutbox.objects.values_list('kind', flat=True)) == ['login_code']
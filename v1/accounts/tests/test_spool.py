@@ -0,0 +1,61 @@
+import time
+
+import mock
+import pytest
+
+from v1.accounts.spool import TaskSpool
+
+
+TASK_NAME = 'v1.accounts.tasks.task_send_sign_up_verify_code_emails'
+
+
+class TestTaskSpool:
+
+    @pytest.fixture(autouse=True)
+    def setUpClass(self, tmp_path):
+        self.spool = TaskSpool(
+            path=tmp_path / 'task_spool.sqlite3', timeout=0.5, retry_interval=60, batch_size=2
+        )
+        self.spool._drainer = mock.Mock()
+        self.args = [[{'email': 'test@test.devgyurak'}]]
+
+    def test_브로커장애시스풀에기록(self):
+        start = time.monotonic()
+        sent = self.spool.send(TASK_NAME, self.args)
+
+        assert not sent
+        assert time.monotonic() - start < 2
+        assert self.spool.depth() == 1
+        assert not self.spool.stats()['broker_available']
+
+    def test_장애중에는브로커를기다리지않음(self):
+        with mock.patch.object(TaskSpool, '_publish', side_effect=ConnectionError) as publish:
+            self.spool.send(TASK_NAME, self.args)
+            self.spool.send(TASK_NAME, self.args)
+
+        assert publish.call_count == 1
+        assert self.spool.depth() == 2
+
+    def test_복구후모아서재전송(self):
+        with mock.patch.object(TaskSpool, '_publish', side_effect=ConnectionError):
+            for _ in range(3):
+                self.spool._spool(TASK_NAME, self.args)
+
+        with mock.patch.object(TaskSpool, '_publish') as publish:
+            replayed = self.spool.drain()
+
+        assert replayed == 3
+        assert publish.call_args_list == [
+            mock.call([(TASK_NAME, self.args)] * 2),
+            mock.call([(TASK_NAME, self.args)]),
+        ]
+        assert self.spool.depth() == 0
+
+    def test_재전송실패시스풀유지(self):
+        self.spool._spool(TASK_NAME, self.args)
+
+        with mock.patch.object(TaskSpool, '_publish', side_effect=ConnectionError):
+            with pytest.raises(ConnectionError):
+                self.spool.drain()
+
+        assert self.spool.depth() == 1
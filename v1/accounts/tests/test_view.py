@@ -1,9 +1,21 @@
+import json
+
+import mock
 import pytest
 from model_bakery import baker
 
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
-from db.models import UserActiveType
+from db.admission import AdmissionRejected
+from db.families import token_family_store
+from db.hashers import get_hashing_backend
+from db.models import EmailOutbox, UserActiveType
+from db.singleflight import refresh_flight
+from db.tokens import AccessToken, outstanding_token_buffer
+from db.verification import CodeCheck, get_verification_code_store
+from v1.accounts.tasks import build_login_code_email
 
 
 User = get_user_model()
@@ -58,6 +70,23 @@ class TestSignUpView:
         assert response.status_code == 400
         assert response.json().get('email')[0] == 'This email already exists.'
 
+    def test_대소문자만다른이메일유저생성(self, client):
+        payload = {
+            'email': 'TEST@test.devgyurak',
+            'username': '테스트',
+            'nickname': '테스트 유저',
+            'password': 'test777!'
+        }
+
+        response = client.post(
+            self.url,
+            payload,
+            content_type='application/json'
+        )
+
+        assert response.status_code == 400
+        assert response.json().get('email')[0] == 'This email already exists.'
+
     def test_이름이잘못된유저생성(self, client):
         payload = {
             'email': 'test@test.gyurak',
@@ -107,10 +136,37 @@ class TestSignUpView:
         )
 
         created_user = User.objects.get(username='테에스트')
+        outbox = EmailOutbox.objects.get(kind='sign_up_verify_code')
 
         assert response.status_code == 201
-        assert len(created_user.verify_code) == 6
+        assert response.json() == {'detail': 'check your email'}
+        assert created_user.verify_code is None
         assert created_user.active_type_id == UserActiveType.TYPES.DEACTIVE.value
+        assert outbox.payload == {'email': 'test@test.gyuraklee'}
+        assert len(get_verification_code_store().get('test@test.gyuraklee')) == 6
+
+    def test_유저생성쿼리수(self, client):
+        payload = {
+            'email': 'test@test.gyuraklee',
+            'username': '테에스트',
+            'nickname': '테스트 유저',
+            'password': 'test777!'
+        }
+
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(
+                self.url,
+                payload,
+                content_type='application/json'
+            )
+
+        # 테스트 트랜잭션 안에서는 transaction.atomic이 SAVEPOINT로 바뀌므로 제외하고 센다.
+        queries = [query['sql'] for query in context.captured_queries if 'SAVEPOINT' not in query['sql']]
+
+        assert response.status_code == 201
+        assert len(queries) == 2
+        assert queries[0].startswith('INSERT INTO "db_user"')
+        assert queries[1].startswith('INSERT INTO "db_emailoutbox"')
 
 
 @pytest.mark.django_db
@@ -145,18 +201,23 @@ class TestEmailVerifyView:
 
         assert response.status_code == 404
 
-    def test_유저이메일인증(self, client):
+    def test_유저이메일인증(self, client, django_assert_num_queries):
         payload = {
             'verify_code': '000000'
         }
 
-        response = client.post(
-            f'{self.url}?email={self.deactive_user.email}',
-            payload,
-            content_type='application/json'
-        )
+        with django_assert_num_queries(1):
+            response = client.post(
+                f'{self.url}?email={self.deactive_user.email}',
+                payload,
+                content_type='application/json'
+            )
+
+        self.deactive_user.refresh_from_db()
 
         assert response.status_code == 200
+        assert self.deactive_user.active_type_id == UserActiveType.TYPES.ACTIVE.value
+        assert self.deactive_user.verify_code is None
 
     def test_이미인증된유저이메일인증(self, client):
         payload = {
@@ -183,6 +244,326 @@ class TestEmailVerifyView:
         )
 
         assert response.status_code == 400
+        assert response.json() == {'detail': 'verify code is not correct.'}
+
+    def test_발급된인증코드로인증(self, client, django_assert_num_queries):
+        user = User.objects.create_user(
+            username='테에스트', email='test3@test.devgyurak', password='test777!'
+        )
+
+        with django_assert_num_queries(1):
+            response = client.post(
+                f'{self.url}?email={user.email}',
+                {'verify_code': user.verify_code},
+                content_type='application/json'
+            )
+
+        user.refresh_from_db()
+
+        assert response.status_code == 200
+        assert user.active_type_id == UserActiveType.TYPES.ACTIVE.value
+
+    def test_만료된인증코드로인증시도(self, client):
+        user = User.objects.create_user(
+            username='테에스트', email='test3@test.devgyurak', password='test777!'
+        )
+        get_verification_code_store().discard([user.email])
+
+        response = client.post(
+            f'{self.url}?email={user.email}',
+            {'verify_code': user.verify_code},
+            content_type='application/json'
+        )
+
+        assert response.status_code == 400
+        assert response.json() == {'detail': 'verify code has expired, please request a new one.'}
+
+    def test_여러번틀리면인증코드잠김(self, client):
+        user = User.objects.create_user(
+            username='테에스트', email='test3@test.devgyurak', password='test777!'
+        )
+        wrong_code = '1' if user.verify_code[0] == '0' else '0'
+
+        for _ in range(get_verification_code_store().max_attempts):
+            client.post(
+                f'{self.url}?email={user.email}',
+                {'verify_code': wrong_code * 6},
+                content_type='application/json'
+            )
+
+        response = client.post(
+            f'{self.url}?email={user.email}',
+            {'verify_code': user.verify_code},
+            content_type='application/json'
+        )
+
+        assert response.status_code == 400
+        assert response.json() == {'detail': 'too many wrong verify codes, please request a new one.'}
+
+    def test_이메일없이인증시도(self, client):
+        payload = {
+            'verify_code': '000000'
+        }
+
+        response = client.post(self.url, payload, content_type='application/json')
+
+        assert response.status_code == 404
+
+
+@pytest.mark.django_db
+class TestVerifyCodeReissueView:
+
+    @pytest.fixture(autouse=True)
+    def setUpClass(self):
+        self.url = '/v1/accounts/verify-code/reissue'
+        self.deactive_user = User.objects.create_user(
+            username='테스트', email='test1@test.devgyurak', password='test777!'
+        )
+        self.active_user = baker.make(
+            User, username='테스트', email='test2@test.devgyurak',
+            active_type_id=UserActiveType.TYPES.ACTIVE.value
+        )
+
+        yield
+
+        User.objects.all().delete()
+        EmailOutbox.objects.all().delete()
+
+    def test_인증코드재발급(self, client):
+        response = client.post(self.url, {'email': self.deactive_user.email}, content_type='application/json')
+        verify_code = get_verification_code_store().get(self.deactive_user.email)
+
+        assert response.status_code == 200
+        assert EmailOutbox.objects.get().payload == {'email': self.deactive_user.email}
+        assert get_verification_code_store().check(self.deactive_user.email, verify_code) == CodeCheck.VALID
+
+    def test_연속으로재발급시도(self, client):
+        client.post(self.url, {'email': self.deactive_user.email}, content_type='application/json')
+        response = client.post(self.url, {'email': self.deactive_user.email}, content_type='application/json')
+
+        assert response.status_code == 429
+        assert 'Retry-After' in response
+        assert EmailOutbox.objects.count() == 1
+
+    def test_이미인증된유저재발급시도(self, client):
+        response = client.post(self.url, {'email': self.active_user.email}, content_type='application/json')
+
+        assert response.status_code == 400
+
+
+@pytest.mark.django_db
+class TestBulkEmailVerifyView:
+
+    @pytest.fixture(autouse=True)
+    def setUpClass(self):
+        self.url = '/v1/accounts/email-verify/bulk'
+        self.staff_user = baker.make(
+            User, username='관리자', email='admin@test.devgyurak',
+            is_staff=True, active_type_id=UserActiveType.TYPES.ACTIVE.value
+        )
+        self.deactive_users = [
+            baker.make(
+                User, username='테스트', email=f'test{i}@test.devgyurak',
+                verify_code='000000', active_type_id=UserActiveType.TYPES.DEACTIVE.value
+            )
+            for i in range(3)
+        ]
+
+        yield
+
+        User.objects.all().delete()
+
+    def test_이메일일괄인증(self, client):
+        access_token = self.staff_user.get_token().get('access_token')
+        payload = {
+            'emails': [user.email for user in self.deactive_users] + [self.staff_user.email]
+        }
+
+        response = client.post(
+            self.url, payload, content_type='application/json', HTTP_AUTHORIZATION=f'Bearer {access_token}'
+        )
+
+        assert response.status_code == 200
+        assert response.json() == {'requested': 4, 'verified': 3}
+        assert not User.objects.filter(active_type_id=UserActiveType.TYPES.DEACTIVE.value).exists()
+
+    def test_일반유저일괄인증시도(self, client):
+        User.objects.filter(email='test0@test.devgyurak').update(active_type_id=UserActiveType.TYPES.ACTIVE.value)
+        access_token = User.objects.get(email='test0@test.devgyurak').get_token().get('access_token')
+
+        response = client.post(
+            self.url,
+            {'emails': ['test1@test.devgyurak']},
+            content_type='application/json',
+            HTTP_AUTHORIZATION=f'Bearer {access_token}'
+        )
+
+        assert response.status_code == 403
+
+
+@pytest.mark.django_db
+class TestBulkActiveTypeChangeView:
+
+    @pytest.fixture(autouse=True)
+    def setUpClass(self):
+        self.url = '/v1/accounts/active-type/bulk'
+        self.staff_user = baker.make(
+            User, username='관리자', email='admin@test.devgyurak',
+            is_staff=True, active_type_id=UserActiveType.TYPES.ACTIVE.value
+        )
+        self.users = [
+            baker.make(
+                User, username='테스트', email=f'test{i}@test.devgyurak', email_normalized=f'test{i}@test.devgyurak',
+                active_type_id=UserActiveType.TYPES.ACTIVE.value
+            )
+            for i in range(3)
+        ]
+
+        yield
+
+        User.objects.all().delete()
+
+    def test_활성화정보일괄변경(self, client):
+        access_token = self.staff_user.get_token().get('access_token')
+        refresh_token = self.users[0].get_token().get('refresh_token')
+        payload = {
+            'emails': [user.email for user in self.users],
+            'active_type': UserActiveType.TYPES.SECESSION.value
+        }
+
+        response = client.post(
+            self.url, payload, content_type='application/json', HTTP_AUTHORIZATION=f'Bearer {access_token}'
+        )
+        refresh_response = client.post(
+            '/v1/accounts/token-refresh', {'refresh_token': refresh_token}, content_type='application/json'
+        )
+
+        assert response.status_code == 200
+        assert response.json() == {'requested': 3, 'updated': 3, 'revoked_tokens': 1}
+        assert refresh_response.status_code == 401
+
+    def test_없는활성화정보로변경시도(self, client):
+        access_token = self.staff_user.get_token().get('access_token')
+
+        response = client.post(
+            self.url,
+            {'emails': [self.users[0].email], 'active_type': 99},
+            content_type='application/json',
+            HTTP_AUTHORIZATION=f'Bearer {access_token}'
+        )
+
+        assert response.status_code == 400
+
+
+@pytest.mark.django_db
+class TestBulkLogoutView:
+
+    @pytest.fixture(autouse=True)
+    def setUpClass(self):
+        self.url = '/v1/accounts/logout/bulk'
+        self.staff_user = baker.make(
+            User, username='관리자', email='admin@test.devgyurak',
+            is_staff=True, active_type_id=UserActiveType.TYPES.ACTIVE.value
+        )
+        self.user = baker.make(
+            User, username='테스트', email='test@test.devgyurak', email_normalized='test@test.devgyurak',
+            active_type_id=UserActiveType.TYPES.ACTIVE.value
+        )
+
+        yield
+
+        User.objects.all().delete()
+
+    def test_일괄로그아웃(self, client):
+        access_token = self.staff_user.get_token().get('access_token')
+        refresh_token = self.user.get_token().get('refresh_token')
+
+        response = client.post(
+            self.url, {'emails': [self.user.email]}, content_type='application/json',
+            HTTP_AUTHORIZATION=f'Bearer {access_token}'
+        )
+        refresh_response = client.post(
+            '/v1/accounts/token-refresh', {'refresh_token': refresh_token}, content_type='application/json'
+        )
+
+        assert response.status_code == 200
+        assert response.json() == {'requested': 1, 'revoked_tokens': 1}
+        assert refresh_response.status_code == 401
+
+    def test_저장되지않은토큰도일괄로그아웃(self, client, settings):
+        settings.TOKEN_FAMILIES = {**settings.TOKEN_FAMILIES, 'ROTATE': False}
+        settings.TOKEN_ISSUANCE = {**settings.TOKEN_ISSUANCE, 'OUTSTANDING_TOKENS': 'buffered'}
+        access_token = self.staff_user.get_token().get('access_token')
+        refresh_token = self.user.get_token().get('refresh_token')
+        # 다른 워커가 모아두고 아직 저장하지 않은 토큰 기록.
+        outstanding_token_buffer._rows.clear()
+
+        response = client.post(
+            self.url, {'emails': [self.user.email]}, content_type='application/json',
+            HTTP_AUTHORIZATION=f'Bearer {access_token}'
+        )
+        refresh_response = client.post(
+            '/v1/accounts/token-refresh', {'refresh_token': refresh_token}, content_type='application/json'
+        )
+
+        assert response.json() == {'requested': 1, 'revoked_tokens': 0}
+        assert refresh_response.status_code == 401
+
+    def test_일반유저일괄로그아웃시도(self, client):
+        access_token = self.user.get_token().get('access_token')
+
+        response = client.post(
+            self.url, {'emails': [self.staff_user.email]}, content_type='application/json',
+            HTTP_AUTHORIZATION=f'Bearer {access_token}'
+        )
+
+        assert response.status_code == 403
+
+
+@pytest.mark.django_db
+class TestBulkTokenIssueView:
+
+    @pytest.fixture(autouse=True)
+    def setUpClass(self):
+        self.url = '/v1/accounts/tokens/bulk'
+        self.staff_user = baker.make(
+            User, username='관리자', email='admin@test.devgyurak',
+            is_staff=True, active_type_id=UserActiveType.TYPES.ACTIVE.value
+        )
+        self.user = baker.make(
+            User, username='테스트', email='test@test.devgyurak', email_normalized='test@test.devgyurak',
+            active_type_id=UserActiveType.TYPES.ACTIVE.value
+        )
+
+        yield
+
+        User.objects.all().delete()
+
+    def test_토큰일괄발급(self, client):
+        access_token = self.staff_user.get_token().get('access_token')
+        missing_user_id = self.user.id + 100
+
+        response = client.post(
+            self.url, {'user_ids': [self.user.id, missing_user_id]}, content_type='application/json',
+            HTTP_AUTHORIZATION=f'Bearer {access_token}'
+        )
+        lines = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+
+        assert response.status_code == 200
+        assert response['Content-Type'] == 'application/x-ndjson'
+        assert lines[0]['user_id'] == self.user.id
+        assert lines[1] == {'user_id': missing_user_id, 'error': 'user does not exist or is not authenticated.'}
+        assert AccessToken(lines[0]['access_token'])['user_id'] == self.user.id
+
+    def test_일반유저토큰일괄발급시도(self, client):
+        access_token = self.user.get_token().get('access_token')
+
+        response = client.post(
+            self.url, {'user_ids': [self.staff_user.id]}, content_type='application/json',
+            HTTP_AUTHORIZATION=f'Bearer {access_token}'
+        )
+
+        assert response.status_code == 403
 
 
 @pytest.mark.django_db
@@ -270,6 +651,123 @@ class TestLoginView:
         assert body.get('access_token') is not None
         assert body.get('refresh_token') is not None
 
+    def test_대소문자가다른이메일로로그인(self, client, settings):
+        settings.TOKEN_ISSUANCE = {**settings.TOKEN_ISSUANCE, 'OUTSTANDING_TOKENS': 'off'}
+        payload = {
+            'email': 'Test2@TEST.devgyurak',
+            'password': 'test123!'
+        }
+
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(
+                self.url,
+                payload,
+                content_type='application/json'
+            )
+
+        # 테스트 트랜잭션 안에서는 transaction.atomic이 SAVEPOINT로 바뀌므로 제외하고 센다.
+        queries = [query['sql'] for query in context.captured_queries if 'SAVEPOINT' not in query['sql']]
+
+        assert response.status_code == 200
+        assert len(queries) == 1
+        assert '"email_normalized" = ' in queries[0]
+
+    def test_과부하시로그인거절(self, client, monkeypatch):
+        def reject():
+            raise AdmissionRejected(retry_after=3)
+
+        monkeypatch.setattr(get_hashing_backend().admission, 'acquire', reject)
+
+        payload = {
+            'email': 'test2@test.devgyurak',
+            'password': 'test123!'
+        }
+
+        response = client.post(
+            self.url,
+            payload,
+            content_type='application/json'
+        )
+
+        assert response.status_code == 503
+        assert response['Retry-After'] == '3'
+
+
+@pytest.mark.django_db
+class TestPasswordlessLoginView:
+
+    @pytest.fixture(autouse=True)
+    def setUpClass(self):
+        self.request_url = '/v1/accounts/login/passwordless'
+        self.url = '/v1/accounts/login/passwordless/verify'
+        self.user = baker.make(
+            User, username='테스트', email='test@test.devgyurak', email_normalized='test@test.devgyurak',
+            active_type_id=UserActiveType.TYPES.ACTIVE.value
+        )
+
+        yield
+
+        User.objects.all().delete()
+
+    def request_login_email(self, client) -> str:
+        response = client.post(self.request_url, {'email': self.user.email}, content_type='application/json')
+
+        assert response.status_code == 200
+
+        payload = EmailOutbox.objects.get(kind='login_code').payload
+
+        # 메일 대기열에는 코드와 링크가 남지 않는다.
+        assert set(payload) == {'email', 'nonce'}
+
+        return build_login_code_email(payload).body
+
+    def test_코드로로그인(self, client, settings):
+        settings.PASSWORDLESS_LOGIN = {**settings.PASSWORDLESS_LOGIN, 'LINK_URL': ''}
+        body = self.request_login_email(client)
+        code = body.split('\n')[0]
+
+        with mock.patch('db.models.check_password') as check_password:
+            response = client.post(
+                self.url, {'email': self.user.email, 'code': code}, content_type='application/json'
+            )
+
+        assert response.status_code == 200
+        assert set(response.json()) == set(self.user.get_token())
+        assert '?token=' not in body
+        assert not check_password.called
+
+    def test_링크로한번만로그인(self, client, settings):
+        settings.PASSWORDLESS_LOGIN = {**settings.PASSWORDLESS_LOGIN, 'LINK_URL': 'https://test.devgyurak/login'}
+        body = self.request_login_email(client)
+        token = body.split('https://test.devgyurak/login?token=')[1]
+
+        response = client.post(self.url, {'token': token}, content_type='application/json')
+        reused = client.post(self.url, {'token': token}, content_type='application/json')
+
+        assert response.status_code == 200
+        assert 'access_token' in response.json()
+        assert reused.status_code == 401
+
+    def test_연속으로요청시도(self, client):
+        self.request_login_email(client)
+
+        response = client.post(self.request_url, {'email': self.user.email}, content_type='application/json')
+
+        assert response.status_code == 429
+
+    def test_탈퇴한유저로그인메일요청(self, client):
+        User.objects.filter(pk=self.user.pk).update(active_type_id=UserActiveType.TYPES.SECESSION.value)
+
+        response = client.post(self.request_url, {'email': self.user.email}, content_type='application/json')
+
+        assert response.status_code == 401
+        assert not EmailOutbox.objects.exists()
+
+    def test_토큰이나코드없이로그인시도(self, client):
+        response = client.post(self.url, {'email': self.user.email}, content_type='application/json')
+
+        assert response.status_code == 400
+
 
 @pytest.mark.django_db
 class TestTokenRefreshView:
@@ -311,6 +809,45 @@ class TestTokenRefreshView:
         assert response.status_code == 200
         assert expired_access_token != refreshed_access_token
 
+    def test_같은토큰으로재발급재시도(self, client):
+        refresh_token = self.user.get_token().get('refresh_token')
+
+        responses = [
+            client.post(self.url, {'refresh_token': refresh_token}, content_type='application/json')
+            for _ in range(3)
+        ]
+
+        assert all(response.status_code == 200 for response in responses)
+        assert len({response.json()['access_token'] for response in responses}) == 1
+
+    def test_재발급시리프레시토큰교체(self, client, monkeypatch, settings):
+        settings.TOKEN_FAMILIES = {**settings.TOKEN_FAMILIES, 'ROTATE': True}
+        monkeypatch.setattr(refresh_flight, 'window', 0)
+        monkeypatch.setattr(token_family_store, 'grace_period', 0)
+        refresh_token = self.user.get_token().get('refresh_token')
+
+        response = client.post(self.url, {'refresh_token': refresh_token}, content_type='application/json')
+        rotated_refresh_token = response.json()['refresh_token']
+
+        reused = client.post(self.url, {'refresh_token': refresh_token}, content_type='application/json')
+        revoked = client.post(self.url, {'refresh_token': rotated_refresh_token}, content_type='application/json')
+
+        assert response.status_code == 200
+        assert rotated_refresh_token != refresh_token
+        assert reused.status_code == 401
+        assert revoked.status_code == 401
+
+    def test_교체직후재시도는같은토큰(self, client, monkeypatch, settings):
+        settings.TOKEN_FAMILIES = {**settings.TOKEN_FAMILIES, 'ROTATE': True}
+        monkeypatch.setattr(refresh_flight, 'window', 0)
+        refresh_token = self.user.get_token().get('refresh_token')
+
+        response = client.post(self.url, {'refresh_token': refresh_token}, content_type='application/json')
+        retried = client.post(self.url, {'refresh_token': refresh_token}, content_type='application/json')
+
+        assert retried.status_code == 200
+        assert retried.json() == response.json()
+
     def test_잘못된토큰으로재발급시도(self, client):
         tokens = self.user.get_token()
         forgery_refresh_token = tokens.get('refresh_token')[:-1]
@@ -325,4 +862,29 @@ class TestTokenRefreshView:
             content_type='application/json'
         )
 
-        assert response.status_code == 401
\ No newline at end of file
+        assert response.status_code == 401
+
+
+@pytest.mark.django_db
+class TestJWKSView:
+
+    @pytest.fixture(autouse=True)
+    def setUpClass(self):
+        self.url = '/.well-known/jwks.json'
+
+    def test_공개키조회(self, client, settings):
+        response = client.get(self.url)
+        keys = response.json()['keys']
+
+        assert response.status_code == 200
+        assert f"max-age={settings.SIGNING_KEYS['JWKS_MAX_AGE']}" in response['Cache-Control']
+        assert all(key['kty'] in ('RSA', 'OKP') and key['use'] == 'sig' and 'kid' in key for key in keys)
+        assert all('d' not in key for key in keys)
+
+    def test_바뀌지않은공개키는304(self, client):
+        etag = client.get(self.url)['ETag']
+
+        response = client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == 304
+        assert response['ETag'] == etag
@@ -1,13 +1,28 @@
 from django.urls import path
 
+from v1.accounts import async_views
 from v1.accounts.views import (
-    SignUpView, EmailVerifyView, LoginView, TokenRefreshView
+    SignUpView, EmailVerifyView, BulkEmailVerifyView, VerifyCodeReissueView, BulkActiveTypeChangeView,
+    BulkLogoutView, BulkTokenIssueView, LoginView, PasswordlessLoginRequestView, PasswordlessLoginView,
+    TokenRefreshView
 )
 
 
 urlpatterns = [
     path('sign-up', SignUpView.as_view()),
     path('email-verify', EmailVerifyView.as_view()),
+    path('email-verify/bulk', BulkEmailVerifyView.as_view()),
+    path('verify-code/reissue', VerifyCodeReissueView.as_view()),
+    path('active-type/bulk', BulkActiveTypeChangeView.as_view()),
+    path('logout/bulk', BulkLogoutView.as_view()),
     path('login', LoginView.as_view()),
+    path('login/passwordless', PasswordlessLoginRequestView.as_view()),
+    path('login/passwordless/verify', PasswordlessLoginView.as_view()),
     path('token-refresh', TokenRefreshView.as_view()),
+    path('tokens/bulk', BulkTokenIssueView.as_view()),
+    path('async/sign-up', async_views.sign_up),
+    path('async/email-verify', async_views.email_verify),
+    path('async/verify-code/reissue', async_views.verify_code_reissue),
+    path('async/login', async_views.login),
+    path('async/token-refresh', async_views.token_refresh),
 ]
@@ -1,18 +1,22 @@
-from django.contrib.auth import get_user_model
+from django.conf import settings
 from django.db import transaction
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
 from django.utils.decorators import method_decorator
+from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
-from rest_framework import status
+from rest_framework import permissions, status
 from rest_framework.generics import GenericAPIView
 from rest_framework.response import Response
 
+from db.sharding import shard_for_email
+from db.signing import get_key_ring
 from v1.accounts.serializers import (
-    SignUpSerializer, EmailVerifySerializer, LoginSerializer, TokenRefreshSerializer
+    SignUpSerializer, EmailVerifySerializer, BulkEmailVerifySerializer, VerifyCodeReissueSerializer,
+    BulkActiveTypeChangeSerializer, BulkLogoutSerializer, BulkTokenIssueSerializer, LoginSerializer,
+    PasswordlessLoginRequestSerializer, PasswordlessLoginSerializer, TokenRefreshSerializer
 )
-from v1.accounts.tasks import task_send_sign_up_verify_code_email
-
-
-User = get_user_model()
+from v1.accounts.outbox import enqueue_email
 
 
 @method_decorator(
@@ -29,15 +33,18 @@ User = get_user_model()
 class SignUpView(GenericAPIView):
     serializer_class = SignUpSerializer
 
-    @transaction.atomic()
     def post(self, request, *args, **kwargs):
         """
         회원가입 기능 API.\n회원가입에 성공하면 인증코드가 담긴 이메일을 전송해준다.
         """
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
-        task_send_sign_up_verify_code_email.delay(serializer.data)
+        shard = shard_for_email(serializer.validated_data['email'])
+
+        with transaction.atomic(using=shard):
+            user = serializer.save()
+            enqueue_email('sign_up_verify_code', {'email': user.email}, using=shard)
+
         return Response({'detail': 'check your email'}, status=status.HTTP_201_CREATED)
 
 
@@ -46,6 +53,9 @@ class SignUpView(GenericAPIView):
     decorator=swagger_auto_schema(
         tags=['sign-up'],
         operation_summary='이메일 인증',
+        manual_parameters=[
+            openapi.Parameter('email', openapi.IN_QUERY, description='인증할 유저의 이메일', type=openapi.TYPE_STRING)
+        ],
         responses={
             200: '이메일 인증 성공.',
             400: '잘못된 데이터. (형식에 맞지 않거나 중복된 데이터)',
@@ -54,33 +64,136 @@ class SignUpView(GenericAPIView):
     )
 )
 class EmailVerifyView(GenericAPIView):
-    queryset = User.objects.all()
     serializer_class = EmailVerifySerializer
-    filterset_fields = ('email',)
-
-    def get_queryset(self):
-        queryset = self.filter_queryset(super().get_queryset())
-        
-        return queryset
 
-    @transaction.atomic()
     def post(self, request, *args, **kwargs):
         """
         이메일 인증 API.\n
         이메일로 전송된 코드를 body에 담아 전송한다.\n
         이때 이메일은 query param으로 넘긴다.
         """
-        qs = self.get_queryset()
-        
-        if not qs.exists():
-            return Response(status=status.HTTP_404_NOT_FOUND)
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.verify(request.query_params.get('email'))
+        return Response({'detail': 'success to verfiy'}, status=status.HTTP_200_OK)
+
 
-        user = qs.first()
+@method_decorator(
+    name='post',
+    decorator=swagger_auto_schema(
+        tags=['sign-up'],
+        operation_summary='인증 코드 재발급',
+        responses={
+            200: '재발급 성공.',
+            400: '잘못된 데이터. (형식에 맞지 않거나 이미 인증된 유저)',
+            404: '해당하는 계정 정보를 찾을 수 없음.',
+            429: '재발급 요청이 너무 잦음.'
+        }
+    )
+)
+class VerifyCodeReissueView(GenericAPIView):
+    serializer_class = VerifyCodeReissueSerializer
 
-        serializer = self.get_serializer(user, data=request.data)
+    def post(self, request, *args, **kwargs):
+        """
+        인증 코드 재발급 API.\n
+        미인증 유저의 이메일을 body에 담아 전송하면 새 인증 코드가 담긴 이메일을 전송해준다.\n
+        이전 인증 코드는 더 이상 사용할 수 없다.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        enqueue_email(
+            'sign_up_verify_code', serializer.reissue(), using=shard_for_email(serializer.validated_data['email'])
+        )
+        return Response({'detail': 'check your email'}, status=status.HTTP_200_OK)
+
+
+@method_decorator(
+    name='post',
+    decorator=swagger_auto_schema(
+        tags=['sign-up'],
+        operation_summary='이메일 일괄 인증',
+        responses={
+            200: '일괄 인증 성공.',
+            400: '잘못된 데이터. (형식에 맞지 않는 데이터)',
+            401: '인증되지 않은 유저.',
+            403: '관리자가 아닌 유저.'
+        }
+    )
+)
+class BulkEmailVerifyView(GenericAPIView):
+    permission_classes = (permissions.IsAdminUser,)
+    serializer_class = BulkEmailVerifySerializer
+
+    def post(self, request, *args, **kwargs):
+        """
+        이메일 일괄 인증 API.\n
+        미인증 유저들의 이메일 목록을 body에 담아 전송하면 인증 코드 없이 인증 상태로 바꾸고,
+        요청한 유저 수와 실제로 인증된 유저 수를 넘겨준다.
+        """
+        serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
-        return Response({'detail': 'success to verfiy'}, status=status.HTTP_200_OK)
+
+        return Response(serializer.verify(), status=status.HTTP_200_OK)
+
+
+@method_decorator(
+    name='post',
+    decorator=swagger_auto_schema(
+        tags=['accounts'],
+        operation_summary='활성화 정보 일괄 변경',
+        responses={
+            200: '일괄 변경 성공.',
+            400: '잘못된 데이터. (형식에 맞지 않는 데이터)',
+            401: '인증되지 않은 유저.',
+            403: '관리자가 아닌 유저.'
+        }
+    )
+)
+class BulkActiveTypeChangeView(GenericAPIView):
+    permission_classes = (permissions.IsAdminUser,)
+    serializer_class = BulkActiveTypeChangeSerializer
+
+    def post(self, request, *args, **kwargs):
+        """
+        활성화 정보 일괄 변경 API.\n
+        유저들의 이메일 목록과 바꿀 활성화 정보를 body에 담아 전송하면 한번에 바꾸고,
+        요청한 유저 수, 실제로 바뀐 유저 수 및 블랙리스트에 올린 리프레시 토큰 수를 넘겨준다.\n
+        인증 완료가 아닌 상태(미인증, 탈퇴)로 바뀐 유저의 리프레시 토큰은 더 이상 쓸 수 없다.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        return Response(serializer.change(), status=status.HTTP_200_OK)
+
+
+@method_decorator(
+    name='post',
+    decorator=swagger_auto_schema(
+        tags=['login'],
+        operation_summary='일괄 로그아웃',
+        responses={
+            200: '일괄 로그아웃 성공.',
+            400: '잘못된 데이터. (형식에 맞지 않는 데이터)',
+            401: '인증되지 않은 유저.',
+            403: '관리자가 아닌 유저.'
+        }
+    )
+)
+class BulkLogoutView(GenericAPIView):
+    permission_classes = (permissions.IsAdminUser,)
+    serializer_class = BulkLogoutSerializer
+
+    def post(self, request, *args, **kwargs):
+        """
+        일괄 로그아웃 API.\n
+        유저들의 이메일 목록을 body에 담아 전송하면 유저들의 리프레시 토큰을 모두 블랙리스트에 올리고,
+        요청한 유저 수와 블랙리스트에 올린 리프레시 토큰 수를 넘겨준다.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        return Response(serializer.logout(), status=status.HTTP_200_OK)
 
 
 @method_decorator(
@@ -112,6 +225,94 @@ class LoginView(GenericAPIView):
         return Response(serializer.validated_data, status=status.HTTP_200_OK)
 
 
+@method_decorator(
+    name='post',
+    decorator=swagger_auto_schema(
+        tags=['login'],
+        operation_summary='비밀번호 없는 로그인 메일 요청',
+        responses={
+            200: '요청 성공.',
+            400: '잘못된 데이터. (형식에 맞지 않는 데이터)',
+            401: '인증을 마치지 않았거나 탈퇴한 유저.',
+            404: '해당하는 계정 정보를 찾을 수 없음.',
+            429: '요청이 너무 잦음.'
+        }
+    )
+)
+class PasswordlessLoginRequestView(GenericAPIView):
+    serializer_class = PasswordlessLoginRequestSerializer
+
+    def post(self, request, *args, **kwargs):
+        """
+        비밀번호 없는 로그인 메일 요청 API.\n
+        이메일을 body에 담아 전송하면 한번만 쓸 수 있는 로그인 코드(와 링크)가 담긴 이메일을 전송해준다.\n
+        이전에 받은 코드와 링크는 더 이상 사용할 수 없다.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        enqueue_email('login_code', serializer.issue(), using=shard_for_email(serializer.validated_data['email']))
+
+        return Response({'detail': 'check your email'}, status=status.HTTP_200_OK)
+
+
+@method_decorator(
+    name='post',
+    decorator=swagger_auto_schema(
+        tags=['login'],
+        operation_summary='비밀번호 없는 로그인',
+        responses={
+            200: '로그인 성공.',
+            400: '잘못된 데이터. (토큰이나 이메일과 코드가 없음)',
+            401: '잘못되었거나 만료된 코드 및 링크, 또는 이메일 미인증 유저.',
+            404: '해당하는 계정 정보를 찾을 수 없음.'
+        }
+    )
+)
+class PasswordlessLoginView(GenericAPIView):
+    serializer_class = PasswordlessLoginSerializer
+
+    def post(self, request, *args, **kwargs):
+        """
+        비밀번호 없는 로그인 API.\n
+        로그인 메일의 링크에 담긴 token, 또는 이메일과 메일로 받은 code를 body에 담아 전송하면,
+        로그인 API와 같이 access token, refresh token 그리고 각 토큰의 만료일을 넘겨준다.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        return Response(serializer.validated_data, status=status.HTTP_200_OK)
+
+
+@method_decorator(
+    name='post',
+    decorator=swagger_auto_schema(
+        tags=['login'],
+        operation_summary='토큰 일괄 발급',
+        responses={
+            200: '발급 성공. (한 줄에 유저 하나씩 NDJSON)',
+            400: '잘못된 데이터. (형식에 맞지 않는 데이터)',
+            401: '인증되지 않은 유저.',
+            403: '관리자가 아닌 유저.'
+        }
+    )
+)
+class BulkTokenIssueView(GenericAPIView):
+    permission_classes = (permissions.IsAdminUser,)
+    serializer_class = BulkTokenIssueSerializer
+
+    def post(self, request, *args, **kwargs):
+        """
+        토큰 일괄 발급 API.\n
+        서비스 계정이나 부하 테스트용 계정의 유저 id 목록을 body에 담아 전송하면 비밀번호 확인 없이 토큰을 발급해,
+        한 줄에 유저 하나씩 user_id와 로그인 API와 같은 토큰을 NDJSON으로 넘겨준다.\n
+        없거나 이메일 인증을 마치지 않은 유저의 줄에는 토큰 대신 error가 담긴다.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        return StreamingHttpResponse(serializer.stream(), content_type='application/x-ndjson')
+
+
 @method_decorator(
     name='post',
     decorator=swagger_auto_schema(
@@ -131,9 +332,40 @@ class TokenRefreshView(GenericAPIView):
         """
         토큰 리프레시 API.\n
         유저의 리프레시 토큰을 body에 담아 전송하면,
-        새로운 access token과 그 만료일을 넘겨준다. 
+        새로운 access token과 그 만료일을 넘겨준다.\n
+        TOKEN_FAMILIES['ROTATE']가 켜져 있으면 새로운 refresh token과 그 만료일도 넘겨주며, 보낸 refresh token은 더 쓸 수 없다.
+        이미 쓴 refresh token을 다시 보내면 그 토큰에서 이어진 refresh token이 모두 폐기된다.
         """
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        return Response(serializer.validated_data, status=status.HTTP_200_OK)
\ No newline at end of file
+        return Response(serializer.validated_data, status=status.HTTP_200_OK)
+
+@method_decorator(
+    name='get',
+    decorator=swagger_auto_schema(
+        tags=['login'],
+        operation_summary='토큰 서명 공개 키 (JWKS)',
+        responses={
+            200: '조회 성공.',
+            304: '캐시한 JWKS가 그대로 유효함.'
+        }
+    )
+)
+class JWKSView(GenericAPIView):
+    authentication_classes = ()
+    permission_classes = (permissions.AllowAny,)
+
+    def get(self, request, *args, **kwargs):
+        """
+        토큰 서명 공개 키 API.\n
+        토큰을 검증할 때 쓰는 공개 키를 JWKS 형식으로 넘겨준다.\n
+        다음에 서명할 키와 교체된 키도 함께 공개하므로 SIGNING_KEYS['JWKS_MAX_AGE']초 동안 캐시해도 되며,
+        If-None-Match에 ETag를 담아 보내면 키가 바뀌지 않았을 때 304로 응답한다.
+        """
+        body, etag = get_key_ring().jwks()
+        response = get_conditional_response(request, etag=etag) or HttpResponse(body, content_type='application/json')
+        response['ETag'] = etag
+        patch_cache_control(response, public=True, max_age=settings.SIGNING_KEYS['JWKS_MAX_AGE'])
+
+        return response
@@ -1,9 +1,39 @@
 from django.contrib import admin
 from django.contrib.auth import get_user_model
 
-from db.models import UserActiveType
+from db.models import ACTIVE_TYPES, UserActiveType
 
 User = get_user_model()
 
+
+class ActiveTypeListFilter(admin.SimpleListFilter):
+    """
+    UserActiveType 테이블을 조회하지 않고 활성화 정보 레지스트리로 만드는 필터.
+    """
+    title = '활성화 정보'
+    parameter_name = 'active_type'
+
+    def lookups(self, request, model_admin):
+        return [(info.id, info.name) for info in ACTIVE_TYPES.values()]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(active_type_id=self.value())
+
+        return queryset
+
+
+class UserAdmin(admin.ModelAdmin):
+    list_display = ('id', 'email', 'username', 'nickname', 'active_type_name', 'is_staff', 'created')
+    list_filter = (ActiveTypeListFilter, 'is_staff')
+    search_fields = ('email_normalized', 'username')
+    fields = ('email', 'username', 'nickname', 'active_type', 'is_staff', 'last_login')
+    readonly_fields = ('last_login',)
+
+    @admin.display(description='활성화 정보', ordering='active_type_id')
+    def active_type_name(self, user: User) -> str:
+        return user.active_type_info.name
+
+
 admin.site.register(UserActiveType)
-admin.site.register(User)
\ No newline at end of file
+admin.site.register(User, UserAdmin)
@@ -0,0 +1,25 @@
+from rest_framework import exceptions, status
+from rest_framework.views import exception_handler as drf_exception_handler
+
+from db.admission import AdmissionRejected
+
+
+class ServiceUnavailable(exceptions.APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'server is busy, please retry later.'
+    default_code = 'service_unavailable'
+
+    def __init__(self, retry_after: int, detail=None, code=None):
+        super().__init__(detail, code)
+        # DRF의 exception handler가 wait 속성으로 Retry-After 헤더를 채운다.
+        self.wait = retry_after
+
+
+def exception_handler(exc, context):
+    """
+    DRF 기본 exception handler에 과부하로 거절된 요청을 503으로 응답하는 처리를 더한 함수.
+    """
+    if isinstance(exc, AdmissionRejected):
+        exc = ServiceUnavailable(retry_after=exc.retry_after)
+
+    return drf_exception_handler(exc, context)
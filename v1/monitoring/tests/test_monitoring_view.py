@@ -0,0 +1,154 @@
+import mock
+import pytest
+from model_bakery import baker
+
+from django.contrib.auth import get_user_model
+
+from db.models import UserActiveType
+
+
+User = get_user_model()
+
+
+@pytest.mark.django_db
+class TestHashingStatsView:
+
+    @pytest.fixture(autouse=True)
+    def setUpClass(self):
+        self.url = '/v1/monitoring/hashing'
+        self.staff_user = baker.make(
+            User, username='관리자', email='admin@test.devgyurak',
+            is_staff=True, active_type_id=UserActiveType.TYPES.ACTIVE.value
+        )
+        self.user = baker.make(
+            User, username='테스트', email='test@test.devgyurak',
+            active_type_id=UserActiveType.TYPES.ACTIVE.value
+        )
+
+        yield
+
+        User.objects.all().delete()
+
+    def test_관리자지표조회(self, client):
+        access_token = self.staff_user.get_token().get('access_token')
+
+        response = client.get(self.url, HTTP_AUTHORIZATION=f'Bearer {access_token}')
+        body = response.json()
+
+        assert response.status_code == 200
+        assert 'queue_depth' in body
+        assert 'shed' in body
+
+    def test_일반유저지표조회(self, client):
+        access_token = self.user.get_token().get('access_token')
+
+        response = client.get(self.url, HTTP_AUTHORIZATION=f'Bearer {access_token}')
+
+        assert response.status_code == 403
+
+    def test_없는지표조회(self, client):
+        access_token = self.staff_user.get_token().get('access_token')
+
+        response = client.get('/v1/monitoring/unknown', HTTP_AUTHORIZATION=f'Bearer {access_token}')
+
+        assert response.status_code == 404
+
+
+@pytest.mark.django_db
+class TestTaskSpoolStatsView:
+
+    @pytest.fixture(autouse=True)
+    def setUpClass(self):
+        self.url = '/v1/monitoring/task-spool'
+        self.staff_user = baker.make(
+            User, username='관리자', email='admin@test.devgyurak',
+            is_staff=True, active_type_id=UserActiveType.TYPES.ACTIVE.value
+        )
+
+        yield
+
+        User.objects.all().delete()
+
+    def test_관리자지표조회(self, client):
+        access_token = self.staff_user.get_token().get('access_token')
+
+        with mock.patch('v1.monitoring.views.task_spool.depth', return_value=3):
+            response = client.get(self.url, HTTP_AUTHORIZATION=f'Bearer {access_token}')
+
+        assert response.status_code == 200
+        assert response.json()['depth'] == 3
+
+
+@pytest.mark.django_db
+class TestDatabaseConnectionStatsView:
+
+    @pytest.fixture(autouse=True)
+    def setUpClass(self):
+        self.url = '/v1/monitoring/db-connections'
+        self.staff_user = baker.make(
+            User, username='관리자', email='admin@test.devgyurak',
+            is_staff=True, active_type_id=UserActiveType.TYPES.ACTIVE.value
+        )
+
+        yield
+
+        User.objects.all().delete()
+
+    def test_관리자지표조회(self, client):
+        access_token = self.staff_user.get_token().get('access_token')
+
+        response = client.get(self.url, HTTP_AUTHORIZATION=f'Bearer {access_token}')
+        body = response.json()
+
+        assert response.status_code == 200
+        assert 'max_connections' in body
+        assert 'opened' in body
+
+
+@pytest.mark.django_db
+class TestAuthenticationCacheStatsView:
+
+    @pytest.fixture(autouse=True)
+    def setUpClass(self):
+        self.url = '/v1/monitoring/auth-cache'
+        self.staff_user = baker.make(
+            User, username='관리자', email='admin@test.devgyurak',
+            is_staff=True, active_type_id=UserActiveType.TYPES.ACTIVE.value
+        )
+
+        yield
+
+        User.objects.all().delete()
+
+    def test_관리자지표조회(self, client):
+        access_token = self.staff_user.get_token().get('access_token')
+
+        client.get(self.url, HTTP_AUTHORIZATION=f'Bearer {access_token}')
+        response = client.get(self.url, HTTP_AUTHORIZATION=f'Bearer {access_token}')
+
+        assert response.status_code == 200
+        assert response.json()['hits'] >= 1
+
+
+@pytest.mark.django_db
+class TestTokenRefreshFlightStatsView:
+
+    @pytest.fixture(autouse=True)
+    def setUpClass(self):
+        self.url = '/v1/monitoring/token-refresh'
+        self.staff_user = baker.make(
+            User, username='관리자', email='admin@test.devgyurak',
+            is_staff=True, active_type_id=UserActiveType.TYPES.ACTIVE.value
+        )
+
+        yield
+
+        User.objects.all().delete()
+
+    def test_관리자지표조회(self, client):
+        access_token = self.staff_user.get_token().get('access_token')
+
+        response = client.get(self.url, HTTP_AUTHORIZATION=f'Bearer {access_token}')
+
+        assert response.status_code == 200
+        assert 'computed' in response.json()
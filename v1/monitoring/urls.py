@@ -0,0 +1,8 @@
+from django.urls import path
+
+from v1.monitoring.views import StatsView
+
+
+urlpatterns = [
+    path('<str:name>', StatsView.as_view()),
+]
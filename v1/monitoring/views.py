@@ -0,0 +1,56 @@
+from django.http import Http404
+from django.utils.decorators import method_decorator
+from drf_yasg.utils import swagger_auto_schema
+from rest_framework import permissions, status
+from rest_framework.generics import GenericAPIView
+from rest_framework.response import Response
+
+from db.authentication import verified_token_cache
+from db.connections import connection_limiter
+from db.hashers import get_hashing_backend
+from db.singleflight import refresh_flight
+from v1.accounts.spool import task_spool
+
+
+# 지표 이름별로 이 워커의 지표를 return하는 함수.
+STATS_PROVIDERS = {
+    # 비밀번호 해싱 처리 중인 작업 수, 대기열 길이, 대기 시간 및 거절된 요청 수.
+    'hashing': lambda: get_hashing_backend().admission.stats(),
+    # 브로커로 보내지 못해 쌓인 셀러리 태스크 수와 브로커 사용 가능 여부.
+    'task-spool': lambda: task_spool.stats(),
+    # 새로 맺은 DB 연결 수, 재사용한 연결 수 및 유지 중인 연결 수.
+    'db-connections': lambda: connection_limiter.stats(),
+    # JWT 인증 캐시에 담긴 토큰 수와 캐시 적중, 실패 횟수.
+    'auth-cache': lambda: verified_token_cache.stats(),
+    # 토큰 재발급을 직접 한 횟수와 다른 요청의 결과를 함께 쓴 횟수.
+    'token-refresh': lambda: refresh_flight.stats(),
+}
+
+
+@method_decorator(
+    name='get',
+    decorator=swagger_auto_schema(
+        tags=['monitoring'],
+        operation_summary='워커 지표',
+        responses={
+            200: '조회 성공.',
+            401: '인증되지 않은 유저.',
+            403: '관리자가 아닌 유저.',
+            404: '없는 지표.'
+        }
+    )
+)
+class StatsView(GenericAPIView):
+    permission_classes = (permissions.IsAdminUser,)
+
+    def get(self, request, name, *args, **kwargs):
+        """
+        워커 지표 API.\n
+        name(hashing, task-spool, db-connections, auth-cache, token-refresh)의 이 워커 지표를 넘겨준다.
+        """
+        provider = STATS_PROVIDERS.get(name)
+
+        if provider is None:
+            raise Http404
+
+        return Response(provider(), status=status.HTTP_200_OK)
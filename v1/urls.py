@@ -3,4 +3,5 @@ from django.urls import include, path
 
 urlpatterns = [
     path('accounts/', include('v1.accounts.urls')),
+    path('monitoring/', include('v1.monitoring.urls')),
 ]
\ No newline at end of file